@@ -0,0 +1,77 @@
+"""Benchmark da agregação dos gráficos do gerenciador de clientes.
+
+Uso: python benchmarks/bench_agregacoes.py [--vendas 100000] [--clientes 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.agregacoes import agregar_graficos_clientes
+from services.dados_colunares import TIPOS_CLIENTES, TIPOS_VENDAS, TabelaColunar
+
+
+def gerar_dados(qtd_vendas, qtd_clientes, semente=42):
+    aleatorio = random.Random(semente)
+    clientes = [{"nome": f"Cliente {i}", "ativo": aleatorio.random() < 0.7} for i in range(qtd_clientes)]
+    vendas = [
+        {
+            "cliente": f"Cliente {aleatorio.randrange(qtd_clientes)}",
+            "data_venda": f"{aleatorio.randint(2021, 2024)}-{aleatorio.randint(1, 12):02d}-{aleatorio.randint(1, 28):02d}",
+            "valor": round(aleatorio.uniform(10, 500), 2),
+        }
+        for _ in range(qtd_vendas)
+    ]
+    return vendas, clientes
+
+
+def agregacao_antiga(vendas, clientes):
+    """Implementação anterior (laço aninhado), mantida só para comparação."""
+    vendas_por_mes = {}
+    for venda in vendas:
+        mes = venda["data_venda"].split("-")[1]
+        vendas_por_mes[mes] = vendas_por_mes.get(mes, 0) + venda["valor"]
+    ativos = sum(1 for cliente in clientes if cliente["ativo"])
+    vendas_vs_clientes = {}
+    for cliente in clientes:
+        vendas_vs_clientes[cliente["nome"]] = sum(1 for venda in vendas if venda["cliente"] == cliente["nome"])
+    return vendas_por_mes, ativos, vendas_vs_clientes
+
+
+def cronometrar(funcao, *args, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vendas", type=int, default=100_000)
+    parser.add_argument("--clientes", type=int, default=10_000)
+    parser.add_argument("--amostra-antiga", type=int, default=200,
+                        help="clientes usados para medir (e extrapolar) a implementação antiga")
+    args = parser.parse_args()
+
+    vendas, clientes = gerar_dados(args.vendas, args.clientes)
+    vendas_colunar = TabelaColunar.de_linhas(
+        vendas, {coluna: TIPOS_VENDAS[coluna] for coluna in ("cliente", "data_venda", "valor")})
+    clientes_colunar = TabelaColunar.de_linhas(clientes, TIPOS_CLIENTES)
+
+    tempo_novo = cronometrar(agregar_graficos_clientes, vendas_colunar, clientes_colunar)
+    print(f"agregar_graficos_clientes: {args.vendas} vendas x {args.clientes} clientes -> {tempo_novo * 1000:.1f} ms")
+
+    # A versão antiga é O(clientes x vendas); mede numa amostra de clientes e extrapola
+    amostra = clientes[:args.amostra_antiga]
+    tempo_antigo = cronometrar(agregacao_antiga, vendas, amostra, repeticoes=1)
+    estimado = tempo_antigo * len(clientes) / len(amostra)
+    print(f"laço aninhado (estimado a partir de {len(amostra)} clientes): {estimado:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark da análise de clientes (RFM e coortes, services/analise_clientes.py).
+
+Gera as vendas e os clientes de um usuário sintético em colunas (como chegam
+do Supabase, em lotes) e mede a conversão, a ligação vendas -> clientes e a
+análise completa. Uma fração das vendas vem sem `cliente_id` (vendas
+anteriores à sql/008_vendas_cliente_id.sql), ligadas pelo nome.
+
+Para comparação, mede também o cálculo de RFM/coortes por cliente filtrando
+as vendas pelo nome em Python, numa amostra de clientes, e extrapola.
+
+Uso: python benchmarks/bench_analise.py [--tamanho grande] [--sem-id 0.2]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_memoria import gerar_lotes  # noqa: E402
+from benchmarks.tenants_sinteticos import TAMANHOS  # noqa: E402
+from services.analise_clientes import COLUNAS_VENDAS_ANALISE, calcular_analise, ligar_vendas_clientes  # noqa: E402
+from services.dados_colunares import TIPOS_CLIENTES, TIPOS_VENDAS, TabelaColunar  # noqa: E402
+
+
+def sem_id(lotes, fracao):
+    """Remove o `cliente_id` de uma fração das vendas (as de id múltiplo de 1/fração)."""
+    passo = round(1 / fracao) if fracao else 0
+    for lote in lotes:
+        if passo:
+            for venda in lote:
+                if venda["id"] % passo == 0:
+                    venda["cliente_id"] = None
+        yield lote
+
+
+def analise_por_cliente(vendas, clientes, hoje):
+    """Cálculo ingênuo (uma passada pelas vendas para cada cliente), mantido só para comparação."""
+    resultado = {}
+    for cliente in clientes:
+        compras = [venda for venda in vendas if venda["cliente"] == cliente["nome"]]
+        if not compras:
+            continue
+        datas = sorted(date.fromisoformat(venda["data_venda"]) for venda in compras)
+        meses = {(data.year, data.month) for data in datas}
+        resultado[cliente["nome"]] = {
+            "recencia": (hoje - datas[-1]).days,
+            "frequencia": len(compras),
+            "monetario": sum(venda["valor"] or 0 for venda in compras),
+            "coorte": (datas[0].year, datas[0].month),
+            "meses": meses,
+        }
+    return resultado
+
+
+def cronometrar(funcao, *args, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanho", default="grande", help=f"entre {', '.join(TAMANHOS)}")
+    parser.add_argument("--sem-id", type=float, default=0.2, help="fração das vendas sem cliente_id")
+    parser.add_argument("--amostra-antiga", type=int, default=20,
+                        help="clientes usados para medir (e extrapolar) o cálculo por cliente")
+    args = parser.parse_args()
+
+    tamanho = TAMANHOS[args.tamanho]
+    tipos_vendas = {coluna: TIPOS_VENDAS[coluna] for coluna in COLUNAS_VENDAS_ANALISE}
+    print(f"{args.tamanho}: {tamanho['vendas']:,} vendas, {tamanho['clientes']:,} clientes, "
+          f"{args.sem_id:.0%} das vendas sem cliente_id")
+
+    inicio = time.perf_counter()
+    vendas = TabelaColunar.de_lotes(
+        sem_id(gerar_lotes("vendas", tamanho["vendas"], tamanho["clientes"]), args.sem_id), tipos_vendas)
+    clientes = TabelaColunar.de_lotes(gerar_lotes("clientes", tamanho["clientes"], tamanho["clientes"]),
+                                      TIPOS_CLIENTES)
+    print(f"  geração e conversão em colunas: {time.perf_counter() - inicio:.1f} s")
+
+    hoje = date.today()
+    # A primeira chamada monta os índices de clientes.posicoes(), que ficam na tabela (em cache)
+    inicio = time.perf_counter()
+    ligar_vendas_clientes(vendas, clientes)
+    print(f"  ligação vendas -> clientes (1ª vez, com os índices): {(time.perf_counter() - inicio) * 1000:.0f} ms")
+    print(f"  ligação vendas -> clientes: {cronometrar(ligar_vendas_clientes, vendas, clientes) * 1000:.0f} ms")
+    tempo_analise = cronometrar(calcular_analise, vendas, clientes, hoje)
+    print(f"  análise completa (RFM + coortes): {tempo_analise * 1000:.0f} ms")
+
+    analise = calcular_analise(vendas, clientes, hoje)
+    resumo = analise.resumo()
+    print(f"  {resumo['clientes_com_compras']:,} clientes com compras, "
+          f"{resumo['vendas_sem_cliente']:,} vendas sem cliente, {len(resumo['coortes'])} coortes")
+    for segmento in resumo["segmentos"]:
+        print(f"    {segmento['nome']:<22}{segmento['clientes']:>9,}")
+
+    # O cálculo por cliente é O(clientes x vendas); mede numa amostra de clientes e extrapola
+    linhas_vendas = [dict(venda) for venda in vendas]
+    amostra = [dict(cliente) for cliente in clientes[:args.amostra_antiga]]
+    tempo_antigo = cronometrar(analise_por_cliente, linhas_vendas, amostra, hoje, repeticoes=1)
+    estimado = tempo_antigo * len(clientes) / len(amostra)
+    print(f"  cálculo por cliente (estimado a partir de {len(amostra)} clientes): {estimado / 60:,.1f} min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Benchmark de memória: vendas e clientes em listas de dicts x em colunas (services/dados_colunares.py).
+
+Para cada tamanho de usuário sintético, carrega as vendas e os clientes pelos
+dois caminhos, a partir de lotes de 1000 linhas decodificados de JSON (como
+chegam do Supabase), e mede com tracemalloc: memória retida depois da carga,
+pico durante a carga e pico extra da agregação dos gráficos, além do tempo
+da agregação e da estimativa usada pelo limite do cache (CACHE_MAX_BYTES).
+
+Uso: python benchmarks/bench_memoria.py [--tamanhos pequeno,medio,grande]
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.tenants_sinteticos import PAGAMENTOS, TAMANHOS, VENDEDORES, nome_cliente  # noqa: E402
+from services.agregacoes import agregar_graficos_clientes  # noqa: E402
+from services.cache_dados import estimar_tamanho  # noqa: E402
+from services.dados_colunares import TIPOS_CLIENTES, TIPOS_VENDAS, TabelaColunar  # noqa: E402
+from services.paginacao import TAMANHO_LOTE_SUPABASE  # noqa: E402
+
+
+def id_cliente(indice):
+    """`client__c` determinístico do cliente de número `indice`."""
+    return str(uuid.UUID(int=indice + 1))
+
+
+def gerar_lotes(tabela, quantidade, qtd_clientes, semente=42):
+    """Lotes de linhas como o Supabase as devolve (cada lote passa por JSON, como na resposta HTTP)."""
+    aleatorio = random.Random(semente)
+    inicio = date.today() - timedelta(days=3 * 365)
+    for primeira in range(0, quantidade, TAMANHO_LOTE_SUPABASE):
+        lote = []
+        for indice in range(primeira, min(quantidade, primeira + TAMANHO_LOTE_SUPABASE)):
+            if tabela == "clientes":
+                lote.append({"client__c": id_cliente(indice), "nome": nome_cliente(indice),
+                             "ativo": aleatorio.random() < 0.8})
+                continue
+            quantidade_itens = aleatorio.randint(1, 5)
+            cliente = aleatorio.randrange(qtd_clientes)
+            lote.append({
+                "id": indice + 1,
+                "cliente_id": id_cliente(cliente),
+                "cliente": nome_cliente(cliente),
+                "vendedor": aleatorio.choice(VENDEDORES),
+                "pagamento": aleatorio.choice(PAGAMENTOS),
+                "data_venda": (inicio + timedelta(days=aleatorio.randrange(3 * 365))).isoformat(),
+                "valor": round(aleatorio.uniform(20, 1500), 2),
+                "quantidade": quantidade_itens,
+            })
+        yield json.loads(json.dumps(lote))
+
+
+def carregar_listas(tamanho):
+    """Caminho anterior: todas as linhas acumuladas numa lista de dicts."""
+    vendas, clientes = [], []
+    for lote in gerar_lotes("vendas", tamanho["vendas"], tamanho["clientes"]):
+        vendas.extend(lote)
+    for lote in gerar_lotes("clientes", tamanho["clientes"], tamanho["clientes"]):
+        clientes.extend(lote)
+    return vendas, clientes
+
+
+def carregar_colunas(tamanho):
+    """Caminho colunar: cada lote é convertido em arrays ao chegar."""
+    vendas = TabelaColunar.de_lotes(gerar_lotes("vendas", tamanho["vendas"], tamanho["clientes"]), TIPOS_VENDAS)
+    clientes = TabelaColunar.de_lotes(gerar_lotes("clientes", tamanho["clientes"], tamanho["clientes"]),
+                                      TIPOS_CLIENTES)
+    return vendas, clientes
+
+
+def agregacao_listas(vendas, clientes):
+    """Agregação anterior (DataFrame montado das listas de dicts), mantida só para comparação."""
+    import pandas as pd
+
+    vendas_df = pd.DataFrame(vendas, columns=["cliente", "data_venda", "valor"])
+    mes = vendas_df["data_venda"].astype("string").str.slice(0, 7).rename("mes")
+    valores = pd.to_numeric(vendas_df["valor"], errors="coerce").fillna(0)
+    agrupado = valores.groupby([mes, vendas_df["cliente"]], sort=False, dropna=False).agg(["sum", "size"])
+    vendas_por_mes = agrupado["sum"].groupby(level="mes", dropna=True).sum().sort_index()
+    vendas_por_cliente = agrupado["size"].groupby(level="cliente", dropna=True).sum()
+
+    clientes_df = pd.DataFrame(clientes, columns=["nome", "ativo"])
+    nomes = clientes_df["nome"].drop_duplicates()
+    vendas_vs_clientes = vendas_por_cliente.reindex(nomes, fill_value=0).astype(int)
+    ativos = int(clientes_df["ativo"].fillna(False).astype(bool).sum())
+    return vendas_por_mes, vendas_vs_clientes, ativos
+
+
+def medir(carregar, agregar, tamanho):
+    """Retorna (dados, medidas em bytes/ms) de um caminho."""
+    gc.collect()
+    tracemalloc.start()
+    dados = carregar(tamanho)
+    retida, pico_carga = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    agregar(*dados)
+    pico_agregacao = tracemalloc.get_traced_memory()[1] - retida
+    tracemalloc.stop()
+
+    # Tempo medido sem o tracemalloc, que deixa as alocações mais lentas
+    tempos = []
+    for _ in range(3):
+        inicio = time.perf_counter()
+        agregar(*dados)
+        tempos.append(time.perf_counter() - inicio)
+    return dados, {
+        "retida": retida,
+        "pico_carga": pico_carga,
+        "pico_agregacao": pico_agregacao,
+        "agregacao_ms": min(tempos) * 1000,
+    }
+
+
+def _mb(valor):
+    return f"{valor / 1024 / 1024:,.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", default="pequeno,medio", help=f"entre {', '.join(TAMANHOS)}")
+    args = parser.parse_args()
+
+    # Carrega numpy/pandas antes das medições, para não contar a importação
+    importlib.import_module("pandas")
+
+    for nome in args.tamanhos.split(","):
+        tamanho = TAMANHOS[nome]
+        print(f"\n{nome}: {tamanho['vendas']:,} vendas, {tamanho['clientes']:,} clientes")
+
+        (vendas, clientes), listas = medir(carregar_listas, agregacao_listas, tamanho)
+        listas["cache"] = estimar_tamanho(vendas) + estimar_tamanho(clientes)
+        del vendas, clientes
+        (vendas, clientes), colunas = medir(carregar_colunas, agregar_graficos_clientes, tamanho)
+        colunas["cache"] = estimar_tamanho(vendas) + estimar_tamanho(clientes)
+        del vendas, clientes
+
+        print(f"  {'':<22}{'listas de dicts':>18}{'colunas':>14}{'redução':>10}")
+        for chave, rotulo in (("retida", "memória retida"), ("pico_carga", "pico na carga"),
+                              ("pico_agregacao", "pico na agregação"), ("cache", "estimativa do cache")):
+            reducao = listas[chave] / colunas[chave] if colunas[chave] else float("inf")
+            print(f"  {rotulo:<22}{_mb(listas[chave]):>18}{_mb(colunas[chave]):>14}{reducao:>9.1f}x")
+        print(f"  {'agregação':<22}{listas['agregacao_ms']:>15.1f} ms{colunas['agregacao_ms']:>11.1f} ms"
+              f"{listas['agregacao_ms'] / colunas['agregacao_ms']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark da previsão de fluxo de caixa (services/previsao_financeira.py).
+
+Uso: python benchmarks/bench_previsao.py [--investimentos 5000] [--meses-vendas 36] [--horizonte 24]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.previsao_financeira import calcular_previsao
+
+
+def gerar_dados(qtd_investimentos, meses_vendas, semente=42):
+    aleatorio = random.Random(semente)
+    investimentos = []
+    ultimos_pagamentos = {}
+    for indice in range(qtd_investimentos):
+        duracao = aleatorio.randint(1, 60)
+        # Último pagamento em algum mês de 2023 ou 2024 (a próxima parcela depende dele)
+        ultimos_pagamentos[str(indice)] = f"{2023 + aleatorio.randint(0, 1)}-{aleatorio.randint(1, 12):02d}-10"
+        investimentos.append({
+            "investimento__c": str(indice),
+            "valor": round(aleatorio.uniform(50, 2000), 2),
+            "duracao": duracao,
+            "pagamentos": aleatorio.randint(0, duracao),
+            "tipo_pagamento": aleatorio.choice(("mensal", "mensal", "anual")),
+            "encerrado": aleatorio.random() < 0.2,
+        })
+    receitas = [round(10_000 + 150 * mes + aleatorio.uniform(-800, 800), 2) for mes in range(meses_vendas)]
+    return investimentos, receitas, ultimos_pagamentos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--investimentos", type=int, default=5_000)
+    parser.add_argument("--meses-vendas", type=int, default=36)
+    parser.add_argument("--horizonte", type=int, default=24)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    investimentos, receitas, ultimos_pagamentos = gerar_dados(args.investimentos, args.meses_vendas)
+    hoje = date(2024, 12, 15)
+    calcular_previsao(investimentos, receitas, args.horizonte, hoje, ultimos_pagamentos)  # aquece imports do numpy
+
+    tempos = []
+    for _ in range(args.repeticoes):
+        inicio = time.perf_counter()
+        calcular_previsao(investimentos, receitas, args.horizonte, hoje, ultimos_pagamentos)
+        tempos.append(time.perf_counter() - inicio)
+    print(f"calcular_previsao: {args.investimentos} investimentos, horizonte {args.horizonte} meses "
+          f"-> {min(tempos) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
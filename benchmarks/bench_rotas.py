@@ -0,0 +1,283 @@
+"""Benchmark das rotas da aplicação com um Supabase falso em memória (sem rede).
+
+Cria usuários sintéticos (benchmarks/tenants_sinteticos.py), executa cenários
+pelas rotas do Flask e mede, por cenário: percentis de latência, pico de
+memória da requisição e chamadas ao banco. Compara com o baseline gravado e
+termina com código 1 se algum cenário piorou.
+
+Uso:
+    python benchmarks/bench_rotas.py [--tamanhos pequeno,medio] [--cenarios sales,clientes]
+                                     [--repeticoes 20] [--frio] [--latencia-ms 0]
+                                     [--baseline benchmarks/baseline_rotas.json] [--salvar-baseline]
+
+As latências incluem o tempo do banco falso (coluna "banco"), que percorre as
+linhas do usuário em Python; a diferença é o custo da aplicação. As chamadas
+ao banco não dependem da máquina; os tempos sim, então o baseline deve ser
+regravado (--salvar-baseline) na máquina onde as comparações são feitas.
+"""
+import argparse
+import gc
+import io
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# A aplicação exige as variáveis, mas nenhuma conexão é feita
+os.environ.setdefault("SUPABASE_URL", "http://supabase.invalido")
+os.environ.setdefault("SUPABASE_KEY", "chave-de-benchmark")
+
+from benchmarks.supabase_falso import SupabaseFalso  # noqa: E402
+from benchmarks.tenants_sinteticos import TAMANHOS, gerar_tenant, nome_cliente  # noqa: E402
+from services import busca_clientes, supabase_client  # noqa: E402
+from services.cache_dados import cache_dados  # noqa: E402
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_rotas.json")
+
+
+def instalar_banco(banco):
+    """Faz `obter_supabase()` (e portanto todas as rotas) usar o banco falso neste processo."""
+    with supabase_client._lock:
+        supabase_client._clientes.clear()
+        supabase_client._clientes.update(dados=banco, auth=banco)
+        supabase_client._clientes_pid = os.getpid()
+
+
+def limpar_caches():
+    cache_dados.limpar()
+    with busca_clientes._lock:
+        busca_clientes._indices.clear()
+
+
+# Cenários: função (cliente de teste, contexto, repetição) -> resposta
+
+def cenario_clientes(cliente, contexto, repeticao):
+    return cliente.get("/clientes")
+
+
+def cenario_clientes_busca(cliente, contexto, repeticao):
+    return cliente.get("/clientes", query_string={"q": nome_cliente(repeticao * 7919 % contexto["clientes"])})
+
+
+def cenario_sales(cliente, contexto, repeticao):
+    return cliente.get("/sales")
+
+
+def cenario_sales_post(cliente, contexto, repeticao):
+    return cliente.post("/sales", data={
+        "cliente": nome_cliente(repeticao % contexto["clientes"]),
+        "vendedor": "Marina",
+        "data_venda": "2024-06-15",
+        "pagamento": "Pix",
+        "produto": ["Camiseta", "Tênis"],
+        "quantidade": ["2", "1"],
+        "desconto": ["0", "10"],
+    })
+
+
+def cenario_investments(cliente, contexto, repeticao):
+    return cliente.get("/investments")
+
+
+def cenario_importacao_csv(cliente, contexto, repeticao, linhas=200):
+    """CSV com `linhas` clientes novos e 10% de linhas repetindo clientes já cadastrados."""
+    arquivo = io.StringIO()
+    arquivo.write("nome,contato,endereco,email\n")
+    for i in range(linhas):
+        if i % 10 == 0:
+            indice = (repeticao * linhas + i) % contexto["clientes"]
+            arquivo.write(f"{nome_cliente(indice)},11{9_0000_0000 + indice:09d},Rua A,cliente{indice}@exemplo.com.br\n")
+        else:
+            novo = f"{repeticao}-{i}"
+            arquivo.write(f"Importado {novo},21{repeticao:04d}{i:05d},Rua B {i},importado{novo}@exemplo.com.br\n")
+    dados = io.BytesIO(arquivo.getvalue().encode("utf-8"))
+    resposta = cliente.post("/api/tarefas", data={"tipo": "importar_clientes_csv", "csv_file": (dados, "clientes.csv")},
+                            content_type="multipart/form-data")
+    return esperar_tarefa(cliente, resposta)
+
+
+def esperar_tarefa(cliente, resposta, intervalo=0.005):
+    """Acompanha a tarefa enviada (resposta 202) até terminar: mede o trabalho todo, não só o envio."""
+    if resposta.status_code != 202:
+        return resposta
+    url = resposta.headers["Location"]
+    while True:
+        resposta = cliente.get(url)
+        status = resposta.json["status"]
+        if status not in ("na_fila", "executando"):
+            if status != "concluida":
+                resposta.status_code = 500  # conta como erro
+            return resposta
+        time.sleep(intervalo)
+
+
+def cenario_atualizar_investimento(cliente, contexto, repeticao):
+    investimentos = contexto["investimentos"]
+    return cliente.post("/atualizar_investimento", json={
+        "investment_id": investimentos[repeticao % len(investimentos)],
+        "data_pagamento": "2024-06-15",
+        "valor_pagamento": 150.0,
+    })
+
+
+CENARIOS = {
+    "clientes": cenario_clientes,
+    "clientes_busca": cenario_clientes_busca,
+    "sales": cenario_sales,
+    "sales_post": cenario_sales_post,
+    "investments": cenario_investments,
+    "importacao_csv": cenario_importacao_csv,
+    "atualizar_investimento": cenario_atualizar_investimento,
+}
+
+
+def percentil(valores, p):
+    """Percentil pelo método nearest-rank (valores já ordenados)."""
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+def medir_cenario(app, banco, contexto, cenario, repeticoes, frio):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["user_id"] = contexto["user_id"]
+
+    def executar(repeticao):
+        if frio:
+            limpar_caches()
+        banco.zerar_contadores()
+        inicio = time.perf_counter()
+        resposta = cenario(cliente, contexto, repeticao)
+        duracao = time.perf_counter() - inicio
+        resposta.close()
+        return duracao, banco.chamadas, banco.tempo_banco, resposta.status_code
+
+    executar(0)  # aquecimento (imports, templates, caches)
+
+    tempos, chamadas, tempos_banco, erros = [], [], [], 0
+    for repeticao in range(1, repeticoes + 1):
+        duracao, quantidade, tempo_banco, status = executar(repeticao)
+        tempos.append(duracao * 1000)
+        chamadas.append(quantidade)
+        tempos_banco.append(tempo_banco * 1000)
+        erros += status >= 400
+
+    # Memória medida numa execução à parte, porque o tracemalloc deixa tudo mais lento
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        atual, _ = tracemalloc.get_traced_memory()
+        executar(repeticoes + 1)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    tempos.sort()
+    return {
+        "n": repeticoes,
+        "p50_ms": round(percentil(tempos, 50), 2),
+        "p95_ms": round(percentil(tempos, 95), 2),
+        "p99_ms": round(percentil(tempos, 99), 2),
+        "max_ms": round(tempos[-1], 2),
+        "banco_ms": round(sum(tempos_banco) / len(tempos_banco), 2),
+        "chamadas": round(sum(chamadas) / len(chamadas), 2),
+        "memoria_mb": round((pico - atual) / 1024 / 1024, 2),
+        "erros": erros,
+    }
+
+
+def comparar(resultado, base, tolerancia):
+    """Lista de pioras do resultado em relação ao baseline (vazia se não houver)."""
+    pioras = []
+    if resultado["chamadas"] > base["chamadas"] + 0.5:
+        pioras.append(f"chamadas {base['chamadas']} -> {resultado['chamadas']}")
+    # A mediana é a latência mais estável entre execuções; diferenças absolutas pequenas são ruído
+    if resultado["p50_ms"] > base["p50_ms"] * (1 + tolerancia) and resultado["p50_ms"] - base["p50_ms"] > 2:
+        pioras.append(f"p50 {base['p50_ms']} -> {resultado['p50_ms']} ms")
+    if resultado["memoria_mb"] > base["memoria_mb"] * (1 + tolerancia) and resultado["memoria_mb"] - base["memoria_mb"] > 1:
+        pioras.append(f"memória {base['memoria_mb']} -> {resultado['memoria_mb']} MB")
+    if resultado["erros"] > base.get("erros", 0):
+        pioras.append(f"erros {base.get('erros', 0)} -> {resultado['erros']}")
+    return pioras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", default="pequeno,medio", help=f"Entre {', '.join(TAMANHOS)}.")
+    parser.add_argument("--cenarios", default=",".join(CENARIOS), help=f"Entre {', '.join(CENARIOS)}.")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--frio", action="store_true", help="Limpa os caches da aplicação antes de cada requisição.")
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Latência simulada por chamada ao banco.")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO)
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os resultados como novo baseline.")
+    parser.add_argument("--tolerancia", type=float, default=0.5, help="Piora relativa aceita na mediana e na memória.")
+    args = parser.parse_args()
+
+    tamanhos = [tamanho.strip() for tamanho in args.tamanhos.split(",") if tamanho.strip()]
+    cenarios = [cenario.strip() for cenario in args.cenarios.split(",") if cenario.strip()]
+    desconhecidos = [nome for nome in tamanhos if nome not in TAMANHOS] + [nome for nome in cenarios if nome not in CENARIOS]
+    if desconhecidos:
+        parser.error(f"Desconhecido: {', '.join(desconhecidos)}")
+
+    from main import app
+    app.config["TESTING"] = True
+
+    banco = SupabaseFalso(latencia_ms=args.latencia_ms)
+    instalar_banco(banco)
+
+    resultados = {}
+    for tamanho in tamanhos:
+        config = TAMANHOS[tamanho]
+        user_id = f"tenant-{tamanho}"
+        inicio = time.perf_counter()
+        gerar_tenant(banco, user_id, **config)
+        # Os dados do banco falso não fazem parte da aplicação: tira-os das varreduras do coletor de lixo
+        gc.collect()
+        gc.freeze()
+        print(f"# {tamanho}: {config['vendas']} vendas, {config['clientes']} clientes, "
+              f"{config['investimentos']} investimentos (gerado em {time.perf_counter() - inicio:.1f} s)", file=sys.stderr)
+        contexto = {
+            "user_id": user_id,
+            "clientes": config["clientes"],
+            "investimentos": [linha["investimento__c"] for linha in banco.linhas("investimento", user_id)],
+        }
+        for nome in cenarios:
+            chave = f"{tamanho}/{nome}" + ("/frio" if args.frio else "")
+            resultados[chave] = medir_cenario(app, banco, contexto, CENARIOS[nome], args.repeticoes, args.frio)
+            print(f"  {chave}: p95 {resultados[chave]['p95_ms']} ms", file=sys.stderr)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as arquivo:
+            baseline = json.load(arquivo)
+
+    cabecalho = f"{'cenário':<38}{'p50':>9}{'p95':>9}{'p99':>9}{'banco':>9}{'chamadas':>10}{'memória':>10}  comparação"
+    print(cabecalho)
+    print("-" * len(cabecalho))
+    regressoes = 0
+    for chave, resultado in resultados.items():
+        if chave in baseline:
+            pioras = comparar(resultado, baseline[chave], args.tolerancia)
+            regressoes += bool(pioras)
+            comparacao = "PIOROU: " + "; ".join(pioras) if pioras else f"ok (p50 base {baseline[chave]['p50_ms']} ms)"
+        else:
+            comparacao = "sem baseline"
+        print(f"{chave:<38}{resultado['p50_ms']:>9.2f}{resultado['p95_ms']:>9.2f}{resultado['p99_ms']:>9.2f}"
+              f"{resultado['banco_ms']:>9.2f}{resultado['chamadas']:>10.2f}{resultado['memoria_mb']:>9.2f}M  {comparacao}")
+
+    if args.salvar_baseline:
+        baseline.update(resultados)
+        with open(args.baseline, "w", encoding="utf-8") as arquivo:
+            json.dump(dict(sorted(baseline.items())), arquivo, indent=2, ensure_ascii=False)
+            arquivo.write("\n")
+        print(f"Baseline gravado em {args.baseline}")
+    elif regressoes:
+        print(f"{regressoes} cenário(s) pioraram em relação ao baseline.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Mede o tempo de inicialização da aplicação (import de main.py) por módulo.
+
+Uso: python benchmarks/medir_inicializacao.py [--top 20] [--modulo main] [--repeticoes 3]
+
+Cada medição roda num processo Python novo com `-X importtime`, para que nenhum
+módulo já esteja carregado. O tempo de cada import é somado no pacote de topo
+(ex.: todos os `pandas.*` contam como `pandas`).
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Linha do -X importtime: "import time:  self [us] | cumulative | imported package"
+LINHA_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# Variáveis mínimas para o create_app não recusar a inicialização
+AMBIENTE_PADRAO = {
+    "SUPABASE_URL": "https://exemplo.supabase.co",
+    "SUPABASE_KEY": "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.exemplo",
+}
+
+
+def medir_uma_vez(modulo):
+    """Importa o módulo num processo novo e devolve {módulo: tempo próprio em µs}."""
+    ambiente = {**AMBIENTE_PADRAO, **os.environ}
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ_PROJETO, env=ambiente, capture_output=True, text=True,
+    )
+    if processo.returncode != 0:
+        erro = [linha for linha in processo.stderr.splitlines() if not linha.startswith("import time:")]
+        raise RuntimeError(f"Falha ao importar {modulo}:\n" + "\n".join(erro[-10:]))
+
+    tempos = {}
+    total = 0
+    for linha in processo.stderr.splitlines():
+        encontrado = LINHA_IMPORTTIME.match(linha)
+        if not encontrado:
+            continue
+        proprio, cumulativo, recuo, nome = encontrado.groups()
+        tempos[nome] = int(proprio)
+        if len(recuo) == 1:
+            # Imports de primeiro nível: o cumulativo deles soma o tempo total
+            total += int(cumulativo)
+    return tempos, total
+
+
+def agrupar_por_pacote(tempos):
+    pacotes = {}
+    for nome, tempo in tempos.items():
+        pacote = nome.split(".")[0]
+        pacotes[pacote] = pacotes.get(pacote, 0) + tempo
+    return pacotes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modulo", default="main", help="módulo a importar (padrão: main)")
+    parser.add_argument("--top", type=int, default=20, help="quantidade de pacotes listados")
+    parser.add_argument("--repeticoes", type=int, default=3,
+                        help="processos medidos; vale o menor tempo de cada pacote")
+    parser.add_argument("--modulos", action="store_true",
+                        help="lista módulos individuais em vez de agrupar por pacote")
+    args = parser.parse_args()
+
+    melhores = {}
+    totais = []
+    for _ in range(args.repeticoes):
+        tempos, total = medir_uma_vez(args.modulo)
+        totais.append(total)
+        if not args.modulos:
+            tempos = agrupar_por_pacote(tempos)
+        for nome, tempo in tempos.items():
+            melhores[nome] = min(tempo, melhores.get(nome, tempo))
+
+    print(f"import {args.modulo}: {min(totais) / 1000:.1f} ms (melhor de {args.repeticoes})")
+    print(f"{'pacote' if not args.modulos else 'módulo':<40} {'ms':>9}")
+    for nome, tempo in sorted(melhores.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{nome:<40} {tempo / 1000:>9.1f}")
+
+    carregados = [pacote for pacote in ("pandas", "numpy", "supabase", "realtime", "storage3") if pacote in melhores]
+    print("pacotes pesados carregados na inicialização:", ", ".join(carregados) or "nenhum")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""Substituto em memória do Supabase/PostgREST para os benchmarks.
+
+Implementa a parte da API usada pela aplicação (`table().select().eq()...
+.execute()`, filtros `or`, ordenação, `insert/update/delete` e as RPCs dos
+arquivos em sql/), sem rede. As linhas de cada tabela ficam também separadas
+por `user_id`, para que as consultas de um usuário não percorram as linhas
+dos outros (como faria o índice no banco).
+
+Conta as chamadas e o tempo gasto dentro do "banco" e pode simular a
+latência de rede de cada chamada (`latencia_ms`).
+"""
+import heapq
+import itertools
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# Colunas preenchidas pelo banco ao inserir (default / identity)
+PADROES_INSERCAO = {
+    "clientes": lambda: {"client__c": str(uuid.uuid4()), "ativo": True},
+    "investimento": lambda: {"investimento__c": str(uuid.uuid4()), "pagamentos": 0, "total_pago": 0,
+                             "encerrado": False, "sentido": True},
+    "investimento_pagamentos": lambda: {"origem": "app", "criado_em": datetime.now(timezone.utc).isoformat()},
+    "tarefas": lambda: {"cancelamento_pedido": False},
+}
+
+
+class Resposta:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _converter(valor_linha, valor):
+    """Converte o valor do filtro (às vezes texto, como na URL do PostgREST) para o tipo da coluna."""
+    if isinstance(valor, str) and valor_linha is not None and not isinstance(valor_linha, str):
+        if isinstance(valor_linha, bool):
+            return valor.lower() == "true"
+        try:
+            return type(valor_linha)(valor)
+        except (TypeError, ValueError):
+            return valor
+    return valor
+
+
+def _comparar(operador, valor_linha, valor):
+    if operador == "is":
+        return valor_linha is None if str(valor).lower() in ("null", "none") else valor_linha == _converter(valor_linha, valor)
+    if operador == "in":
+        return valor_linha is not None and valor_linha in [_converter(valor_linha, item) for item in valor]
+    if valor_linha is None:
+        return False
+    if operador in ("like", "ilike"):
+        padrao = "^" + ".*".join(re.escape(parte) for parte in str(valor).split("%")) + "$"
+        return re.match(padrao, str(valor_linha), re.IGNORECASE if operador == "ilike" else 0) is not None
+    valor = _converter(valor_linha, valor)
+    try:
+        if operador == "eq":
+            return valor_linha == valor
+        if operador == "neq":
+            return valor_linha != valor
+        if operador == "gt":
+            return valor_linha > valor
+        if operador == "gte":
+            return valor_linha >= valor
+        if operador == "lt":
+            return valor_linha < valor
+        if operador == "lte":
+            return valor_linha <= valor
+    except TypeError:
+        return False
+    raise ValueError(f"Operador não suportado: {operador}")
+
+
+def _dividir(expressao):
+    """Divide uma expressão `or` do PostgREST nas vírgulas de primeiro nível (fora de aspas e parênteses)."""
+    partes, atual, profundidade, aspas, escape = [], "", 0, False, False
+    for caractere in expressao:
+        if escape:
+            atual += caractere
+            escape = False
+            continue
+        if caractere == "\\" and aspas:
+            atual += caractere
+            escape = True
+            continue
+        if caractere == '"':
+            aspas = not aspas
+        elif not aspas and caractere == "(":
+            profundidade += 1
+        elif not aspas and caractere == ")":
+            profundidade -= 1
+        if caractere == "," and profundidade == 0 and not aspas:
+            partes.append(atual)
+            atual = ""
+        else:
+            atual += caractere
+    partes.append(atual)
+    return partes
+
+
+def _valor_texto(valor):
+    if len(valor) >= 2 and valor[0] == valor[-1] == '"':
+        return valor[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return valor
+
+
+def _predicados_or(expressao):
+    predicados = []
+    for parte in _dividir(expressao):
+        if parte.startswith("and(") or parte.startswith("or("):
+            internos = _predicados_or(parte[parte.index("(") + 1:-1])
+            combinar = all if parte.startswith("and(") else any
+            predicados.append(lambda linha, internos=internos, combinar=combinar: combinar(p(linha) for p in internos))
+        else:
+            coluna, operador, valor = parte.split(".", 2)
+            valor = _valor_texto(valor)
+            predicados.append(lambda linha, c=coluna, o=operador, v=valor: _comparar(o, linha.get(c), v))
+    return predicados
+
+
+def _chave_ordem(coluna):
+    # Nulos por último na ordem crescente (e primeiro na decrescente), como no Postgres
+    return lambda linha: (linha.get(coluna) is None, 0 if linha.get(coluna) is None else linha.get(coluna))
+
+
+class ConsultaFalsa:
+    def __init__(self, banco, tabela):
+        self.banco = banco
+        self.tabela = tabela
+        self.operacao = "select"
+        self.colunas = "*"
+        self.contar = None
+        self.predicados = []
+        self.user_id = None
+        self.ordens = []
+        self.limite = None
+        self.deslocamento = 0
+        self.dados = None
+
+    # Leitura
+    def select(self, colunas="*", count=None):
+        self.colunas = colunas
+        self.contar = count
+        return self
+
+    def _filtro(self, coluna, operador, valor):
+        if coluna == "user_id" and operador == "eq" and self.user_id is None:
+            self.user_id = valor
+        else:
+            self.predicados.append(lambda linha: _comparar(operador, linha.get(coluna), valor))
+        return self
+
+    def eq(self, coluna, valor):
+        return self._filtro(coluna, "eq", valor)
+
+    def neq(self, coluna, valor):
+        return self._filtro(coluna, "neq", valor)
+
+    def gt(self, coluna, valor):
+        return self._filtro(coluna, "gt", valor)
+
+    def gte(self, coluna, valor):
+        return self._filtro(coluna, "gte", valor)
+
+    def lt(self, coluna, valor):
+        return self._filtro(coluna, "lt", valor)
+
+    def lte(self, coluna, valor):
+        return self._filtro(coluna, "lte", valor)
+
+    def like(self, coluna, valor):
+        return self._filtro(coluna, "like", valor)
+
+    def ilike(self, coluna, valor):
+        return self._filtro(coluna, "ilike", valor)
+
+    def is_(self, coluna, valor):
+        return self._filtro(coluna, "is", valor)
+
+    def in_(self, coluna, valores):
+        return self._filtro(coluna, "in", list(valores))
+
+    def filter(self, coluna, operador, valor):
+        if operador == "in" and isinstance(valor, str):
+            valor = [_valor_texto(item) for item in _dividir(valor.strip("()"))]
+        return self._filtro(coluna, operador, valor)
+
+    def or_(self, expressao):
+        predicados = _predicados_or(expressao)
+        self.predicados.append(lambda linha: any(p(linha) for p in predicados))
+        return self
+
+    def order(self, coluna, desc=False):
+        self.ordens.append((coluna, desc))
+        return self
+
+    def limit(self, quantidade):
+        self.limite = quantidade
+        return self
+
+    def range(self, inicio, fim):
+        self.deslocamento = inicio
+        self.limite = fim - inicio + 1
+        return self
+
+    # Escrita
+    def insert(self, linhas):
+        self.operacao = "insert"
+        self.dados = linhas
+        return self
+
+    def update(self, valores):
+        self.operacao = "update"
+        self.dados = valores
+        return self
+
+    def delete(self):
+        self.operacao = "delete"
+        return self
+
+    def execute(self):
+        return self.banco._executar(self._executar)
+
+    def _selecionadas(self):
+        linhas = self.banco.linhas(self.tabela, self.user_id)
+        if not self.predicados:
+            return linhas
+        return [linha for linha in linhas if all(predicado(linha) for predicado in self.predicados)]
+
+    def _executar(self):
+        if self.operacao == "insert":
+            return Resposta(self.banco.inserir(self.tabela, self.dados))
+        if self.operacao == "update":
+            linhas = self._selecionadas()
+            for linha in linhas:
+                linha.update(self.dados)
+            return Resposta([dict(linha) for linha in linhas])
+        if self.operacao == "delete":
+            linhas = self._selecionadas()
+            self.banco.remover(self.tabela, linhas)
+            return Resposta([dict(linha) for linha in linhas])
+
+        linhas = self._selecionadas()
+        total = len(linhas)
+        fim = None if self.limite is None else self.deslocamento + self.limite
+        sentidos = {desc for _, desc in self.ordens}
+        if self.ordens and fim is not None and len(sentidos) == 1:
+            # Só as primeiras linhas interessam: seleção parcial em vez de ordenar tudo
+            chaves = [_chave_ordem(coluna) for coluna, _ in self.ordens]
+            chave = lambda linha: tuple(c(linha) for c in chaves)
+            escolher = heapq.nlargest if sentidos == {True} else heapq.nsmallest
+            linhas = escolher(fim, linhas, key=chave)[self.deslocamento:]
+        else:
+            linhas = list(linhas)
+            for coluna, desc in reversed(self.ordens):
+                linhas.sort(key=_chave_ordem(coluna), reverse=desc)
+            linhas = linhas[self.deslocamento:fim]
+
+        if self.colunas.strip() == "*":
+            linhas = [dict(linha) for linha in linhas]
+        else:
+            colunas = [coluna.strip() for coluna in self.colunas.split(",")]
+            linhas = [{coluna: linha.get(coluna) for coluna in colunas} for linha in linhas]
+        return Resposta(linhas, total if self.contar else None)
+
+
+class ChamadaRpc:
+    def __init__(self, banco, funcao, parametros):
+        self.banco = banco
+        self.funcao = funcao
+        self.parametros = parametros or {}
+
+    def execute(self):
+        implementacao = getattr(self.banco, "rpc_" + self.funcao, None)
+        if implementacao is None:
+            raise ValueError(f"RPC não implementada no banco falso: {self.funcao}")
+        return self.banco._executar(lambda: Resposta(implementacao(**self.parametros)))
+
+
+class SupabaseFalso:
+    """Cliente Supabase falso, com os dados em memória (ver o docstring do módulo)."""
+
+    def __init__(self, latencia_ms=0.0):
+        self.latencia = latencia_ms / 1000
+        self.auth = SimpleNamespace()
+        self._tabelas = {}  # tabela -> [linhas]
+        self._por_usuario = {}  # tabela -> {user_id: [linhas]}
+        self._ids = {}  # tabela -> contador do id
+        self._resumo = {}  # chave primária de vendas_resumo -> linha
+        self._ids_envio = {}  # user_id -> id_envio das vendas (o índice único de sql/006_vendas_id_envio.sql)
+        self._lock = threading.RLock()
+        self.chamadas = 0
+        self.tempo_banco = 0.0
+
+    # Acesso pelo código da aplicação
+    def table(self, tabela):
+        return ConsultaFalsa(self, tabela)
+
+    def rpc(self, funcao, parametros=None):
+        return ChamadaRpc(self, funcao, parametros)
+
+    def zerar_contadores(self):
+        with self._lock:
+            self.chamadas = 0
+            self.tempo_banco = 0.0
+
+    def _executar(self, operacao):
+        if self.latencia:
+            time.sleep(self.latencia)
+        inicio = time.perf_counter()
+        with self._lock:
+            try:
+                return operacao()
+            finally:
+                self.chamadas += 1
+                self.tempo_banco += time.perf_counter() - inicio
+
+    # Armazenamento
+    def linhas(self, tabela, user_id=None):
+        if user_id is None:
+            return self._tabelas.get(tabela, [])
+        return self._por_usuario.get(tabela, {}).get(user_id, [])
+
+    def inserir(self, tabela, linhas, padroes=True):
+        """Insere linhas (dict ou lista) preenchendo id e defaults. Retorna cópias das linhas inseridas."""
+        linhas = linhas if isinstance(linhas, list) else [linhas]
+        contador = self._ids.setdefault(tabela, itertools.count(1))
+        todas = self._tabelas.setdefault(tabela, [])
+        por_usuario = self._por_usuario.setdefault(tabela, {})
+        inseridas = []
+        for linha in linhas:
+            nova = PADROES_INSERCAO[tabela]() if padroes and tabela in PADROES_INSERCAO else {}
+            nova.update(linha)
+            nova.setdefault("id", next(contador))
+            todas.append(nova)
+            por_usuario.setdefault(nova.get("user_id"), []).append(nova)
+            inseridas.append(nova)
+        return [dict(linha) for linha in inseridas] if padroes else inseridas
+
+    def remover(self, tabela, linhas):
+        remover = {id(linha) for linha in linhas}
+        if not remover:
+            return
+        self._tabelas[tabela] = [linha for linha in self._tabelas.get(tabela, []) if id(linha) not in remover]
+        for user_id, linhas_usuario in self._por_usuario.get(tabela, {}).items():
+            self._por_usuario[tabela][user_id] = [linha for linha in linhas_usuario if id(linha) not in remover]
+        if tabela == "vendas_resumo":
+            self._resumo = {chave: linha for chave, linha in self._resumo.items() if id(linha) not in remover}
+
+    # RPCs (mesma semântica das funções em sql/)
+    def rpc_registrar_vendas_resumo(self, p_vendas):
+        for venda in p_vendas:
+            data = str(venda.get("data_venda") or "")[:10]
+            if not data:
+                continue
+            for granularidade, periodo in (("dia", data), ("mes", data[:8] + "01")):
+                for dimensao, chave in (("total", ""), ("cliente", venda.get("cliente")),
+                                        ("vendedor", venda.get("vendedor")), ("pagamento", venda.get("pagamento"))):
+                    chave = chave or ""
+                    primaria = (venda["user_id"], granularidade, periodo, dimensao, chave)
+                    linha = self._resumo.get(primaria)
+                    if linha is None:
+                        linha = self.inserir("vendas_resumo", {
+                            "user_id": venda["user_id"], "granularidade": granularidade, "periodo": periodo,
+                            "dimensao": dimensao, "chave": chave, "receita": 0.0, "num_vendas": 0,
+                        }, padroes=False)[0]
+                        self._resumo[primaria] = linha
+                    linha["receita"] = round(linha["receita"] + float(venda.get("valor") or 0), 2)
+                    linha["num_vendas"] += 1
+        return None
+
+    def rpc_reconstruir_vendas_resumo(self, p_user_id):
+        self.remover("vendas_resumo", self.linhas("vendas_resumo", p_user_id))
+        self.rpc_registrar_vendas_resumo(self.linhas("vendas", p_user_id))
+        return len(self.linhas("vendas_resumo", p_user_id))
+
+    def rpc_gravar_vendas_lote(self, p_vendas):
+        existentes = set()
+        for user_id in {venda.get("user_id") for venda in p_vendas}:
+            if user_id not in self._ids_envio:
+                self._ids_envio[user_id] = {linha.get("id_envio") for linha in self.linhas("vendas", user_id)}
+            existentes |= self._ids_envio[user_id]
+        novas = []
+        for venda in p_vendas:
+            if venda.get("id_envio") not in existentes:
+                existentes.add(venda.get("id_envio"))
+                self._ids_envio[venda.get("user_id")].add(venda.get("id_envio"))
+                novas.append(venda)
+        inseridas = self.inserir("vendas", novas) if novas else []
+        self.rpc_registrar_vendas_resumo(inseridas)
+        return inseridas
+
+    def rpc_registrar_pagamentos_investimento(self, p_user_id, p_pagamentos):
+        investimentos = {linha["investimento__c"]: linha for linha in self.linhas("investimento", p_user_id)}
+        atualizados = {}
+        for item in p_pagamentos:
+            investimento = investimentos.get(str(item.get("investimento__c")))
+            if investimento is None:
+                continue
+            sentido = item.get("sentido", True)
+            self.inserir("investimento_pagamentos", {
+                "investimento__c": investimento["investimento__c"], "user_id": p_user_id,
+                "data": item["data"], "valor": float(item["valor"]),
+            })
+            investimento["pagamentos"] = (investimento.get("pagamentos") or 0) + 1
+            investimento["total_pago"] = round((investimento.get("total_pago") or 0) + float(item["valor"]), 2)
+            investimento["sentido"] = sentido
+            investimento["encerrado"] = bool(item.get("encerrar", False)) or not sentido
+            atualizados[investimento["investimento__c"]] = investimento
+        return [dict(linha) for linha in atualizados.values()]
+
+    def rpc_registrar_pagamento_investimento(self, p_user_id, p_investimento, p_data, p_valor,
+                                             p_sentido=True, p_encerrar=False):
+        return self.rpc_registrar_pagamentos_investimento(p_user_id, [{
+            "investimento__c": p_investimento, "data": p_data, "valor": p_valor,
+            "sentido": p_sentido, "encerrar": p_encerrar,
+        }])
+
+    def rpc_ultimos_pagamentos_investimentos(self, p_user_id):
+        ultimos = {}
+        for linha in self.linhas("investimento_pagamentos", p_user_id):
+            chave = linha["investimento__c"]
+            if str(linha["data"]) > ultimos.get(chave, ""):
+                ultimos[chave] = str(linha["data"])
+        return [{"investimento__c": chave, "data": data} for chave, data in ultimos.items()]
+
+    def rpc_incrementar_versoes_cache(self, p_user_id, p_tabelas):
+        versoes = {linha["tabela"]: linha for linha in self.linhas("cache_versoes", p_user_id)}
+        for tabela in p_tabelas:
+            if tabela not in versoes:
+                versoes[tabela] = self.inserir("cache_versoes", {"user_id": p_user_id, "tabela": tabela, "versao": 0},
+                                               padroes=False)[0]
+            versoes[tabela]["versao"] += 1
+        return [{"tabela": tabela, "versao": versoes[tabela]["versao"]} for tabela in p_tabelas]
+
+    def rpc_migrar_historico_pagamentos(self, p_user_id=None):
+        return 0
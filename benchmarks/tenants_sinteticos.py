@@ -0,0 +1,98 @@
+"""Geração de usuários (tenants) sintéticos no banco falso dos benchmarks."""
+import random
+from datetime import date, timedelta
+
+# Tamanhos pré-definidos: vendas, clientes, investimentos, pagamentos por investimento
+TAMANHOS = {
+    "pequeno": {"vendas": 1_000, "clientes": 100, "investimentos": 20, "pagamentos": 6},
+    "medio": {"vendas": 100_000, "clientes": 10_000, "investimentos": 200, "pagamentos": 12},
+    "grande": {"vendas": 1_000_000, "clientes": 100_000, "investimentos": 1_000, "pagamentos": 24},
+}
+
+NOMES = ("Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Heitor", "Isabela", "João",
+         "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Thiago", "Vitória", "William")
+SOBRENOMES = ("Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+              "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes")
+CIDADES = (("São Paulo", "SP"), ("Rio de Janeiro", "RJ"), ("Belo Horizonte", "MG"), ("Curitiba", "PR"),
+           ("Porto Alegre", "RS"), ("Salvador", "BA"), ("Recife", "PE"), ("Fortaleza", "CE"))
+PAGAMENTOS = ("Crédito", "Débito", "Pix", "Dinheiro", "Boleto")
+PRODUTOS = (("Camiseta", 49.9), ("Calça", 129.9), ("Tênis", 299.0), ("Boné", 39.9), ("Jaqueta", 349.0),
+            ("Meia", 19.9), ("Bermuda", 89.9), ("Mochila", 199.0))
+VENDEDORES = ("Marina", "Rogério", "Tatiane", "Vinícius", "Yasmin")
+
+
+def nome_cliente(indice):
+    """Nome determinístico e (quase) único do cliente de número `indice`."""
+    return f"{NOMES[indice % len(NOMES)]} {SOBRENOMES[(indice // len(NOMES)) % len(SOBRENOMES)]} {indice}"
+
+
+def gerar_cliente(aleatorio, user_id, indice):
+    cidade, estado = aleatorio.choice(CIDADES)
+    return {
+        "user_id": user_id,
+        "nome": nome_cliente(indice),
+        "contato": f"11{9_0000_0000 + indice:09d}",
+        "email": f"cliente{indice}@exemplo.com.br",
+        "endereco": f"Rua {aleatorio.choice(SOBRENOMES)}, {aleatorio.randint(1, 3000)}",
+        "bairro": "Centro",
+        "cidade": cidade,
+        "estado": estado,
+        "cep": f"{aleatorio.randint(1000, 99999):05d}-{aleatorio.randint(0, 999):03d}",
+        "genero": aleatorio.choice(("Masculino", "Feminino")),
+        "data_nascimento": f"{aleatorio.randint(1950, 2005)}-{aleatorio.randint(1, 12):02d}-{aleatorio.randint(1, 28):02d}",
+        "ativo": aleatorio.random() < 0.8,
+    }
+
+
+def gerar_tenant(banco, user_id, vendas, clientes, investimentos=20, pagamentos=6, semente=42):
+    """Popula o banco falso com os dados de um usuário. Retorna um resumo do que foi gerado."""
+    aleatorio = random.Random(semente)
+
+    ids_clientes = [linha["client__c"] for linha in
+                    banco.inserir("clientes", [gerar_cliente(aleatorio, user_id, i) for i in range(clientes)])]
+    banco.inserir("produtos", [{"user_id": user_id, "nome": nome, "preco": preco} for nome, preco in PRODUTOS])
+    banco.inserir("vendedores", [{"user_id": user_id, "nome": nome} for nome in VENDEDORES])
+
+    # Vendas nos últimos três anos, em lotes (e já somadas ao resumo, como faz a aplicação)
+    inicio = date.today() - timedelta(days=3 * 365)
+    for primeira in range(0, vendas, 50_000):
+        lote = []
+        for _ in range(primeira, min(vendas, primeira + 50_000)):
+            produto, preco = aleatorio.choice(PRODUTOS)
+            quantidade = aleatorio.randint(1, 5)
+            cliente = aleatorio.randrange(clientes) if clientes else None
+            lote.append({
+                "user_id": user_id,
+                "cliente_id": ids_clientes[cliente] if clientes else None,
+                "cliente": nome_cliente(cliente) if clientes else None,
+                "vendedor": aleatorio.choice(VENDEDORES),
+                "data_venda": (inicio + timedelta(days=aleatorio.randrange(3 * 365))).isoformat(),
+                "pagamento": aleatorio.choice(PAGAMENTOS),
+                "produtos": [{"nome": produto, "quantidade": quantidade, "desconto": 0, "preco": preco}],
+                "produtos_formatados": f"{produto} - Quantidade: {quantidade} - Desconto: 0% - Preço: R${preco}",
+                "quantidade": quantidade,
+                "valor": round(preco * quantidade, 2),
+            })
+        banco.inserir("vendas", lote, padroes=False)
+        banco.rpc_registrar_vendas_resumo(lote)
+
+    for i in range(investimentos):
+        duracao = aleatorio.randint(pagamentos, pagamentos * 3)
+        valor = round(aleatorio.uniform(100, 3000), 2)
+        investimento = banco.inserir("investimento", {
+            "user_id": user_id,
+            "nome": f"Investimento {i}",
+            "descricao": "Gerado para benchmark",
+            "valor": valor,
+            "duracao": duracao,
+            "tipo_pagamento": aleatorio.choice(("mensal", "mensal", "anual")),
+            "valor_total": round(valor * duracao, 2),
+            "historico_pagamentos": [],
+        })[0]
+        banco.rpc_registrar_pagamentos_investimento(user_id, [
+            {"investimento__c": investimento["investimento__c"],
+             "data": (inicio + timedelta(days=30 * mes)).isoformat(), "valor": valor}
+            for mes in range(pagamentos)
+        ])
+
+    return {"vendas": vendas, "clientes": clientes, "investimentos": investimentos}
@@ -0,0 +1,17 @@
+# Configuração do gunicorn (carregada automaticamente a partir da raiz do projeto)
+
+
+def post_fork(server, worker):
+    # Cada worker cria seus próprios clientes Supabase (e pools de conexão)
+    from services.supabase_client import reiniciar_clientes
+    reiniciar_clientes()
+
+
+def worker_exit(server, worker):
+    # Vendas ainda na fila do buffer são gravadas antes de o worker sair
+    from services.buffer_vendas import buffer_vendas
+    buffer_vendas.encerrar()
+
+    # Tarefas em segundo plano não sobrevivem ao worker: cancela e registra a interrupção
+    from services.tarefas import interromper_tarefas
+    interromper_tarefas()
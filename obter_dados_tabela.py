@@ -1,17 +1,23 @@
-import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
+from werkzeug.local import LocalProxy
 
-load_dotenv()
+from services.cache_dados import cache_dados
+from services.supabase_client import obter_supabase
 
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(url, key)
+supabase = LocalProxy(obter_supabase)
 
-def obter_dados_tabela(nome_tabela, user_id):
-    """Função para obter dados de uma tabela do Supabase"""
-    try:
-        response = supabase.table(nome_tabela).select("*").eq("user_id", user_id).execute()
-        return response.data
-    except Exception as e:
-        return []
\ No newline at end of file
+def obter_dados_tabela(nome_tabela, user_id=None, colunas="*"):
+    """Busca dados da Supabase (com cache por usuário) com tratamento de exceção."""
+    encontrado, dados = cache_dados.obter(nome_tabela, user_id, colunas)
+    if not encontrado:
+        geracao = cache_dados.geracao(nome_tabela, user_id)
+        try:
+            query = supabase.table(nome_tabela).select(colunas)
+            if user_id:
+                query = query.eq("user_id", user_id)
+            dados = query.execute().data or []
+        except Exception as e:
+            print(f"Erro ao buscar {nome_tabela}: {e}")
+            return []
+        cache_dados.guardar(nome_tabela, user_id, colunas, dados, geracao=geracao)
+    # Cópia das linhas para que as rotas possam alterá-las sem afetar o cache
+    return [dict(linha) for linha in dados]
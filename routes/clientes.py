@@ -0,0 +1,373 @@
+from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify
+from werkzeug.local import LocalProxy
+import datetime
+
+from routes.utils import quer_json, resposta_json_condicional
+from services.agregacoes import agregar_graficos_clientes, graficos_de_resumo
+from services.analise_clientes import SEGMENTOS, obter_analise
+from services.busca_clientes import buscar_clientes, obter_indice, registrar_alteracao
+from services.cache_dados import cache_dados
+from services.clientes_em_lote import (MAX_CLIENTES_LOTE, atualizar_clientes, editar_clientes, validar_campos,
+                                       validar_ids)
+from services.consultas_paralelas import buscar_em_paralelo
+from services.dados_colunares import obter_clientes_colunar, obter_vendas_colunar
+from services.filtros import PERIODOS, resolver_periodo
+from services.importacao_clientes import enviar_importacao_csv
+from services.paginacao import buscar_pagina, parametros_listagem, tamanho_pagina_valido
+from services.resumo_vendas import obter_resumo
+from services.supabase_client import obter_supabase
+from services.tarefas import LimiteTarefas
+
+supabase = LocalProxy(obter_supabase)
+
+clientes_bp = Blueprint('clientes', __name__)
+
+@clientes_bp.route("/cadastro_cliente", methods=["GET", "POST"])
+def cadastro_cliente():
+    if 'user_id' not in session:
+        return redirect(url_for('login.login'))
+    if request.method == "POST":
+        opcao_cadastro = request.form.get("opcao_cadastro")
+
+        if opcao_cadastro == "manual":
+            cliente = {
+                "nome": request.form.get("nome"),
+                "contato": request.form.get("contato"),
+                "endereco": request.form.get("endereco"),
+                "email": request.form.get("email"),
+                "user_id": session['user_id']
+            }
+
+            if all(cliente.values()):
+                # Verificar duplicação (clientes parecidos, pelo índice de busca)
+                try:
+                    duplicados = []
+                    if not request.form.get("ignorar_duplicados"):
+                        duplicados = obter_indice(supabase, cliente["user_id"]).duplicados_provaveis(cliente)
+
+                    if duplicados:
+                        nomes = ", ".join(existente["nome"] for existente, _ in duplicados[:3])
+                        flash(f"Cliente possivelmente já cadastrado: {nomes}. "
+                              "Marque \"Cadastrar mesmo assim\" para confirmar.", "danger")
+                    else:
+                        inseridos = supabase.table("clientes").insert(cliente).execute().data or []
+                        registrar_alteracao(cliente["user_id"], inseridos)
+                        flash("Cliente cadastrado com sucesso!", "success")
+                except Exception as e:
+                    flash(f"Erro ao cadastrar cliente: {e}", "danger")
+            else:
+                flash("Por favor, preencha todos os campos.", "danger")
+
+        elif opcao_cadastro == "csv":
+            file = request.files.get("csv_file")
+            if file and file.filename.endswith(".csv"):
+                # A importação roda em segundo plano; a página acompanha o progresso por /api/tarefas/<id>
+                try:
+                    tarefa = enviar_importacao_csv(session['user_id'], file)
+                    flash("Importação iniciada! Acompanhe o progresso abaixo.", "info")
+                    return redirect(url_for('clientes.cadastro_cliente', tarefa=tarefa.id))
+                except LimiteTarefas as e:
+                    flash(str(e), "danger")
+                except Exception as e:
+                    flash(f"Erro ao processar o CSV: {e}", "danger")
+            else:
+                flash("Por favor, envie um arquivo CSV válido.", "danger")
+
+    return render_template("clientes.html", tarefa_id=request.args.get("tarefa"))
+
+@clientes_bp.route("/edit_cliente", methods=["POST"])
+def edit_cliente():
+    if 'user_id' not in session:
+        if quer_json():
+            return jsonify({"error": "Usuário não autenticado"}), 401
+        return redirect(url_for('login.login'))
+    campos, erro = validar_campos({
+        "nome": request.form.get("nome"),
+        "contato": request.form.get("contato"),
+        "email": request.form.get("email"),
+        "ativo": request.form.get("ativo") == "on",  # Checkbox retorna "on" se marcado
+        "genero": request.form.get("genero"),
+    })
+    return responder_edicao(session['user_id'], request.form.get("client_id"), campos, erro,
+                            lambda: redirect(url_for("clientes.clientes")))
+
+
+def responder_edicao(user_id, cliente_id, campos, erro, resposta_html):
+    """Edição de um cliente: uma única escrita.
+
+    Pedidos do JavaScript da página recebem só a linha alterada (patch) em JSON;
+    formulários comuns recebem a mensagem flash e o retorno de `resposta_html()`.
+    """
+    patch = []
+    status = 400
+    if erro is None and not cliente_id:
+        erro = "Cliente não informado"
+    if erro is None:
+        try:
+            patch = atualizar_clientes(supabase, user_id, [cliente_id], campos)
+            if not patch:
+                erro, status = "Cliente não encontrado", 404
+        except Exception as e:
+            erro, status = f"Erro ao atualizar cliente: {e}", 500
+
+    if quer_json():
+        if erro:
+            return jsonify({"error": erro}), status
+        return jsonify({"message": "Cliente atualizado com sucesso!", "patch": patch})
+    if erro:
+        flash(erro, "danger")
+    else:
+        flash("Cliente atualizado com sucesso!", "success")
+    return resposta_html()
+
+
+@clientes_bp.route("/api/clientes/lote", methods=["POST"])
+def api_clientes_lote():
+    """Operações em vários clientes (por `client__c`) de uma vez.
+
+    - ativar / desativar: {"operacao", "clientes": [ids]}
+    - atualizar (mesmos valores para todos): {"operacao", "clientes": [ids], "campos": {...}}
+    - editar (valores por cliente): {"operacao", "edicoes": [{"client__c", campos...}]}
+
+    Responde com as linhas alteradas (patch) e os ids não encontrados.
+    """
+    if 'user_id' not in session:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+    if not request.is_json:
+        return jsonify({"error": "Requisição deve ser JSON"}), 400
+
+    user_id = session['user_id']
+    dados = request.get_json(silent=True) or {}
+    operacao = dados.get("operacao")
+
+    if operacao in ("ativar", "desativar", "atualizar"):
+        ids, erro = validar_ids(dados.get("clientes"))
+        if erro:
+            return jsonify({"error": erro}), 400
+        if operacao == "atualizar":
+            campos, erro = validar_campos(dados.get("campos"))
+            if erro:
+                return jsonify({"error": erro}), 400
+        else:
+            campos = {"ativo": operacao == "ativar"}
+        executar = lambda: atualizar_clientes(supabase, user_id, ids, campos)
+
+    elif operacao == "editar":
+        edicoes = dados.get("edicoes")
+        if not isinstance(edicoes, list) or not edicoes:
+            return jsonify({"error": "Informe a lista de edições"}), 400
+        if len(edicoes) > MAX_CLIENTES_LOTE:
+            return jsonify({"error": f"Máximo de {MAX_CLIENTES_LOTE} clientes por operação"}), 400
+        validas = []
+        for indice, edicao in enumerate(edicoes):
+            if not isinstance(edicao, dict) or not edicao.get("client__c"):
+                return jsonify({"error": f"Edição {indice}: informe client__c"}), 400
+            campos, erro = validar_campos({campo: valor for campo, valor in edicao.items() if campo != "client__c"})
+            if erro:
+                return jsonify({"error": f"Edição {indice}: {erro}"}), 400
+            validas.append({"client__c": str(edicao["client__c"]), **campos})
+        ids = list(dict.fromkeys(edicao["client__c"] for edicao in validas))
+        executar = lambda: editar_clientes(supabase, user_id, validas)
+
+    else:
+        return jsonify({"error": "Operação deve ser ativar, desativar, atualizar ou editar"}), 400
+
+    try:
+        patch = executar()
+    except Exception as e:
+        return jsonify({"error": f"Erro ao atualizar clientes: {e}"}), 500
+
+    encontrados = {str(linha["client__c"]) for linha in patch}
+    return jsonify({
+        "patch": patch,
+        "atualizados": len(encontrados),
+        "nao_encontrados": [cliente_id for cliente_id in ids if cliente_id not in encontrados],
+    })
+
+min_date = datetime.date(1900, 1, 1)
+
+# Colunas exibidas na listagem e ordenações permitidas
+COLUNAS_LISTA_CLIENTES = "client__c,nome,contato,endereco,bairro,cidade,estado,cep,genero,email,data_nascimento,ativo"
+ORDENACOES_CLIENTES = ("id", "nome")
+
+# Campos do modal de edição do gerenciador (nome do input -> coluna)
+CAMPOS_FORMULARIO_EDICAO = {
+    "editNome": "nome", "editContato": "contato", "editEndereco": "endereco", "editEmail": "email",
+    "editBairro": "bairro", "editCidade": "cidade", "editEstado": "estado", "editCep": "cep",
+    "editGenero": "genero", "editDataNascimento": "data_nascimento", "editAtivo": "ativo",
+}
+
+def pagina_clientes(user_id):
+    """Página atual da lista de clientes com os parâmetros da URL.
+
+    Com `q`, a lista é o resultado da busca no índice de clientes (por relevância).
+    """
+    parametros, filtros = parametros_listagem(request.args, ORDENACOES_CLIENTES, "id", "asc", ("ativo",))
+    if filtros.get("ativo") not in (None, "true", "false"):
+        del filtros["ativo"]
+        del parametros["ativo"]
+
+    consulta = request.args.get("q", "").strip()
+    if consulta:
+        parametros["q"] = consulta
+        pagina = buscar_clientes(supabase, user_id, consulta, request.args.get("cursor"),
+                                 parametros["tamanho"], filtros)
+        return pagina, parametros
+
+    pagina = buscar_pagina(
+        supabase, "clientes", user_id, COLUNAS_LISTA_CLIENTES,
+        ordenar_por=parametros["ordem"],
+        descendente=parametros["direcao"] == "desc",
+        cursor=request.args.get("cursor"),
+        tamanho_pagina=parametros["tamanho"],
+        filtros=filtros,
+    )
+    return pagina, parametros
+
+@clientes_bp.route("/clientes", methods=["GET", "POST"])
+def clientes():
+    user_id = session['user_id']
+
+    if request.method == "POST":
+        # Atualizar cliente (modal de edição)
+        campos, erro = validar_campos({
+            coluna: request.form.get(nome) for nome, coluna in CAMPOS_FORMULARIO_EDICAO.items() if nome in request.form
+        })
+        return responder_edicao(user_id, request.form.get("clientid"), campos, erro,
+                                lambda: renderizar_gerenciador(user_id))
+
+    return renderizar_gerenciador(user_id)
+
+
+def renderizar_gerenciador(user_id):
+    # Os gráficos são carregados pela página através de /api/graficos/*
+    pagina, parametros = pagina_clientes(user_id)
+
+    # Passar para o template
+    return render_template(
+        "gerenciador_clientes.html",
+        clientes=pagina["linhas"],
+        proximo_cursor=pagina["proximo_cursor"],
+        parametros=parametros,
+        periodos=PERIODOS,
+        min_date=min_date,
+    )
+
+
+@clientes_bp.route("/api/clientes/busca")
+def api_busca_clientes():
+    """Busca de clientes por nome, email, contato, cidade ou CEP (paginada por `cursor`)."""
+    if 'user_id' not in session:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+    consulta = request.args.get("q", "").strip()
+    if not consulta:
+        return jsonify({"error": "Informe o parâmetro q"}), 400
+
+    def carregar():
+        pagina = buscar_clientes(
+            supabase, session['user_id'], consulta,
+            cursor=request.args.get("cursor"),
+            tamanho_pagina=tamanho_pagina_valido(request.args.get("tamanho")),
+        )
+        return {"clientes": pagina["linhas"], "proximo_cursor": pagina["proximo_cursor"]}
+
+    return resposta_json_condicional(carregar, ("clientes",))
+
+
+# Tabelas cujas escritas mudam os gráficos e a análise de clientes (ETag das respostas)
+TABELAS_GRAFICOS = ("vendas", "clientes")
+
+
+def graficos_clientes(user_id, periodo=None):
+    """Séries dos gráficos do gerenciador de clientes.
+
+    Lidas do resumo de vendas (mensal; diário quando há período, para
+    respeitar as datas exatas); sem resumo, agrega as vendas brutas. O
+    período (ver services/filtros.py) é filtrado no banco. O resultado fica
+    em cache até a próxima escrita em vendas ou clientes.
+    """
+    inicio, fim = (periodo["inicio"], periodo["fim"]) if periodo else (None, None)
+    formato = ("graficos", cache_dados.geracao("clientes", user_id), inicio, fim)
+    encontrado, graficos = cache_dados.obter("vendas", user_id, formato)
+    if encontrado:
+        return graficos
+
+    geracao = cache_dados.geracao("vendas", user_id)
+    granularidade = "dia" if inicio or fim else "mes"
+    dados, _ = buscar_em_paralelo({
+        "clientes": lambda: obter_clientes_colunar(supabase, user_id),
+        "resumo": lambda: obter_resumo(supabase, user_id, granularidade, ("total", "cliente"), inicio, fim),
+    })
+    clientes = dados["clientes"]
+    resumo = dados["resumo"]
+    if resumo:
+        graficos = graficos_de_resumo(resumo, clientes)
+    else:
+        vendas = obter_vendas_colunar(supabase, user_id, ("cliente", "data_venda", "valor"), inicio, fim)
+        graficos = agregar_graficos_clientes(vendas, clientes)
+    cache_dados.guardar("vendas", user_id, formato, graficos, geracao=geracao)
+    return graficos
+
+
+@clientes_bp.route("/api/graficos/vendas_mensais")
+def grafico_vendas_mensais():
+    if 'user_id' not in session:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+    periodo = resolver_periodo(request.args)
+
+    def carregar():
+        graficos = graficos_clientes(session['user_id'], periodo)
+        return {"labels": graficos["vendas_labels"], "values": graficos["vendas_values"]}
+
+    # Períodos relativos ("30d", "ano") mudam com o dia: o ETag usa as datas resolvidas
+    return resposta_json_condicional(carregar, TABELAS_GRAFICOS, periodo["inicio"], periodo["fim"])
+
+
+@clientes_bp.route("/api/graficos/vendas_por_cliente")
+def grafico_vendas_por_cliente():
+    if 'user_id' not in session:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+    periodo = resolver_periodo(request.args)
+
+    def carregar():
+        vendas_vs_clientes = graficos_clientes(session['user_id'], periodo)["vendas_vs_clientes"]
+        return {"labels": list(vendas_vs_clientes.keys()), "values": list(vendas_vs_clientes.values())}
+
+    return resposta_json_condicional(carregar, TABELAS_GRAFICOS, periodo["inicio"], periodo["fim"])
+
+
+@clientes_bp.route("/api/graficos/clientes_ativos")
+def grafico_clientes_ativos():
+    if 'user_id' not in session:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+    periodo = resolver_periodo(request.args)
+
+    def carregar():
+        graficos = graficos_clientes(session['user_id'], periodo)
+        return {"ativos": graficos["active_clients_count"], "inativos": graficos["inactive_clients_count"]}
+
+    return resposta_json_condicional(carregar, TABELAS_GRAFICOS, periodo["inicio"], periodo["fim"])
+
+
+@clientes_bp.route("/api/clientes/analise")
+def analise_clientes():
+    """Segmentos RFM e retenção por coorte (services/analise_clientes.py).
+
+    Com `?segmento=`, devolve também os clientes do segmento, do maior para o menor valor.
+    """
+    if 'user_id' not in session:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+    segmento = request.args.get("segmento")
+    if segmento and segmento not in SEGMENTOS:
+        return jsonify({"error": f"Segmento inválido. Use um de: {', '.join(SEGMENTOS)}"}), 400
+    # A recência muda com o dia
+    hoje = datetime.date.today()
+
+    def carregar():
+        analise = obter_analise(supabase, session['user_id'], hoje)
+        resposta = analise.resumo()
+        if segmento:
+            resposta["clientes"] = analise.clientes_do_segmento(segmento)
+        return resposta
+
+    return resposta_json_condicional(carregar, TABELAS_GRAFICOS, hoje.isoformat())
@@ -0,0 +1,48 @@
+from flask import Blueprint, Response, request, session, redirect, url_for, flash, stream_with_context
+from werkzeug.local import LocalProxy
+
+from services.exportacao import (
+    FORMATOS, ErroExportacao, gerar_csv, gerar_xlsx, iterar_linhas, nome_arquivo, parametros_exportacao,
+)
+from services.supabase_client import obter_supabase
+
+supabase = LocalProxy(obter_supabase)
+
+exportacao_bp = Blueprint('exportacao', __name__)
+
+# Página para onde voltar quando os parâmetros são inválidos
+PAGINAS_ORIGEM = {
+    "clientes": "clientes.clientes",
+    "vendas": "sales.sales",
+    "pagamentos": "investments.investments",
+}
+
+
+@exportacao_bp.route('/exportar/<tipo>')
+def exportar(tipo):
+    """Exporta clientes, vendas ou pagamentos em CSV/XLSX, enviando o arquivo aos poucos.
+
+    Parâmetros: formato (csv ou xlsx), colunas (separadas por vírgula), inicio e fim (AAAA-MM-DD).
+    """
+    if 'user_id' not in session:
+        return redirect(url_for('login.login'))
+
+    try:
+        parametros = parametros_exportacao(tipo, request.args)
+        linhas = iterar_linhas(supabase, session['user_id'], parametros)
+        if parametros["formato"] == "xlsx":
+            conteudo = gerar_xlsx(linhas, parametros["colunas"])
+        else:
+            conteudo = gerar_csv(linhas, parametros["colunas"])
+    except ErroExportacao as e:
+        flash(str(e), "danger")
+        return redirect(url_for(PAGINAS_ORIGEM.get(tipo, "login.index")))
+
+    return Response(
+        stream_with_context(conteudo),
+        mimetype=FORMATOS[parametros["formato"]],
+        headers={
+            "Content-Disposition": f'attachment; filename="{nome_arquivo(parametros)}"',
+            "Cache-Control": "no-store",
+        },
+    )
@@ -0,0 +1,19 @@
+from flask import Blueprint, render_template, request, session, redirect, url_for
+from werkzeug.local import LocalProxy
+
+from services.previsao_financeira import horizonte_valido, obter_previsao
+from services.supabase_client import obter_supabase
+
+supabase = LocalProxy(obter_supabase)
+
+finances_bp = Blueprint('finances', __name__)
+
+# Rota para gerenciador financeiro
+@finances_bp.route('/finances')
+def finances():
+    if 'user_id' not in session:
+        return redirect(url_for('login.login'))
+
+    horizonte = horizonte_valido(request.args.get('horizonte'))
+    previsao = obter_previsao(supabase, session['user_id'], horizonte)
+    return render_template('finances.html', previsao=previsao, horizonte=horizonte)
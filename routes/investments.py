@@ -0,0 +1,281 @@
+from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify
+from werkzeug.local import LocalProxy
+import click
+
+from services.cache_dados import cache_dados
+from services.carteira import obter_carteira
+from services.filtros import STATUS_INVESTIMENTO
+from services.pagamentos_investimento import (
+    MAX_PAGAMENTOS_LOTE, buscar_investimentos, historico_pagamentos, migrar_historico,
+    registrar_pagamento, registrar_pagamentos_em_lote, validar_pagamento,
+)
+from services.paginacao import tamanho_pagina_valido
+from services.supabase_client import obter_supabase
+
+supabase = LocalProxy(obter_supabase)
+
+investments_bp = Blueprint('investments', __name__, cli_group=None)
+
+def status_valido(valor):
+    """Filtro de situação da URL (`status`): "todos", "ativos" ou "encerrados"."""
+    return valor if valor in STATUS_INVESTIMENTO else "todos"
+
+
+def renderizar_investimentos(user_id, **contexto):
+    """Renderiza a tela de investimentos a partir da carteira (em cache) do usuário."""
+    status = status_valido(request.args.get('status'))
+    carteira = obter_carteira(supabase, user_id, status)
+    return render_template(
+        'investments.html',
+        investimentos_df=carteira.ativos,
+        investimento_encerrado=carteira.encerrados,
+        carteira=carteira,
+        status=status,
+        **contexto)
+
+
+@investments_bp.route('/investments', methods=["GET", "POST"])
+def investments():
+    user_id = session['user_id']
+
+    investimento_selecionado = request.args.get('investimento_selecionado')
+    investimento = obter_carteira(supabase, user_id, status_valido(request.args.get('status'))).obter(investimento_selecionado)
+
+    if investimento is not None:
+        # Histórico paginado a partir do livro de pagamentos
+        pagina = historico_pagamentos(
+            supabase, user_id, investimento_selecionado,
+            cursor=request.args.get('pagamentos_cursor'),
+            tamanho_pagina=tamanho_pagina_valido(request.args.get('tamanho')),
+        )
+        pagamentos = pagina["linhas"]
+        if not pagamentos and not request.args.get('pagamentos_cursor'):
+            # Base ainda não migrada: mostra o histórico antigo (já lido na carteira)
+            pagamentos = investimento["historico_pagamentos"]
+
+        return renderizar_investimentos(
+            user_id,
+            investimento=investimento,
+            pagamentos=pagamentos,
+            pagamentos_vazios=not pagamentos,
+            proximo_cursor_pagamentos=pagina["proximo_cursor"],
+        )
+
+    return renderizar_investimentos(user_id)
+
+
+@investments_bp.route('/atualizar_investimento', methods=['POST', 'GET'])
+def atualizar_investimento():
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+
+    if not request.is_json:
+        return jsonify({"error": "Requisição deve ser JSON"}), 400
+
+    # Mesma validação dos itens de /atualizar_investimentos
+    pagamento, erro = validar_pagamento(request.get_json())
+    if erro:
+        return jsonify({"error": erro}), 400
+
+    # Insere no livro de pagamentos e atualiza os contadores (uma chamada ao banco)
+    try:
+        investimento = registrar_pagamento(
+            supabase, user_id, pagamento["investimento__c"], pagamento["data"], pagamento["valor"],
+            sentido=pagamento["sentido"], encerrar=pagamento["encerrar"],
+        )
+    except Exception as e:
+        print(f"Erro ao registrar pagamento: {e}")
+        return jsonify({"error": "Erro ao registrar pagamento"}), status_erro_banco(e)
+
+    if not investimento:
+        return jsonify({"error": "Investimento não encontrado"}), 404
+
+    # Cálculo do restante
+    pagamentos = investimento.get("pagamentos") or 0
+    duracao = investimento.get("duracao") or 0
+    restante = max(0, (duracao - pagamentos) * (investimento.get("valor") or 0))
+
+    # Mensagem de retorno
+    if investimento["encerrado"]:
+        message = "Investimento encerrado com sucesso!"
+    else:
+        message = f"Pagamento adicionado com sucesso! Restante a pagar: R$ {restante:.2f}"
+
+    return jsonify({"message": message}), 200
+
+
+@investments_bp.route('/atualizar_investimentos', methods=['POST'])
+def atualizar_investimentos():
+    """Registra vários pagamentos de uma vez (mesmos campos de /atualizar_investimento).
+
+    Aceita {"pagamentos": [...]} ou a lista direto. Todos os itens são validados
+    antes de gravar; os válidos são aplicados numa única chamada ao banco e a
+    resposta traz um resultado por item, na ordem recebida.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+
+    if not request.is_json:
+        return jsonify({"error": "Requisição deve ser JSON"}), 400
+
+    data = request.get_json()
+    itens = data.get('pagamentos') if isinstance(data, dict) else data
+    if not isinstance(itens, list) or not itens:
+        return jsonify({"error": "Envie uma lista de pagamentos"}), 400
+    if len(itens) > MAX_PAGAMENTOS_LOTE:
+        return jsonify({"error": f"Máximo de {MAX_PAGAMENTOS_LOTE} pagamentos por requisição"}), 400
+
+    # Validação de todos os itens antes de qualquer gravação
+    resultados = []
+    validos = []
+    for indice, item in enumerate(itens):
+        pagamento, erro = validar_pagamento(item)
+        resultados.append({
+            "indice": indice,
+            "investment_id": item.get('investment_id') if isinstance(item, dict) else None,
+            "error": erro,
+        })
+        if pagamento:
+            validos.append((indice, pagamento))
+
+    # Apenas os investimentos citados, numa única consulta
+    try:
+        existentes = buscar_investimentos(supabase, user_id, [pagamento["investimento__c"] for _, pagamento in validos])
+    except Exception as e:
+        print(f"Erro ao buscar investimentos: {e}")
+        return jsonify({"error": "Erro ao buscar investimentos"}), 500
+
+    for indice, pagamento in validos:
+        if pagamento["investimento__c"] not in existentes:
+            resultados[indice]["error"] = "Investimento não encontrado"
+    validos = [(indice, pagamento) for indice, pagamento in validos if pagamento["investimento__c"] in existentes]
+
+    try:
+        atualizados = registrar_pagamentos_em_lote(supabase, user_id, [pagamento for _, pagamento in validos])
+    except Exception as e:
+        # Nada foi gravado (uma única chamada): o erro vale para cada item válido
+        print(f"Erro ao registrar pagamentos em lote: {e}")
+        for indice, _ in validos:
+            resultados[indice]["error"] = "Erro ao registrar pagamento"
+        return resposta_lote(resultados, status_erro_banco(e))
+
+    # Restante após cada pagamento, como se tivessem sido registrados um a um
+    pendentes = {}
+    for _, pagamento in validos:
+        pendentes[pagamento["investimento__c"]] = pendentes.get(pagamento["investimento__c"], 0) + 1
+    for indice, pagamento in validos:
+        investimento = atualizados.get(pagamento["investimento__c"])
+        if not investimento:
+            resultados[indice]["error"] = "Investimento não encontrado"
+            continue
+        pendentes[pagamento["investimento__c"]] -= 1
+        pagamentos = (investimento.get("pagamentos") or 0) - pendentes[pagamento["investimento__c"]]
+        duracao = investimento.get("duracao") or 0
+        resultados[indice]["restante"] = max(0, (duracao - pagamentos) * (investimento.get("valor") or 0))
+
+    return resposta_lote(resultados)
+
+
+def resposta_lote(resultados, status=200):
+    """Resposta de /atualizar_investimentos: um resultado por item, na ordem recebida."""
+    for resultado in resultados:
+        resultado["status"] = "erro" if resultado["error"] else "ok"
+    registrados = sum(1 for resultado in resultados if resultado["status"] == "ok")
+
+    return jsonify({
+        "message": f"{registrados} de {len(resultados)} pagamentos registrados.",
+        "registrados": registrados,
+        "erros": len(resultados) - registrados,
+        "resultados": resultados,
+    }), status
+
+
+def status_erro_banco(erro):
+    """Status HTTP de um erro ao gravar: 409 se o banco recusou a operação (erro do PostgREST, com
+    código), 503 se não foi possível falar com ele."""
+    return 409 if getattr(erro, "code", None) else 503
+
+
+@investments_bp.route('/cadastrar_investimento', methods=['POST', 'GET'])
+def cadastrar_investimento():
+    user_id = session.get('user_id')
+
+    if request.method == "POST":
+        nome = request.form.get("nome")
+        descricao = request.form.get("descricao")
+        valor = float(request.form.get("valor"))
+        tipo = request.form.get("pagamento")
+        duracao = int(request.form.get("duracao"))
+
+        valor_total = duracao * valor
+
+        investimento = {
+            "user_id": user_id,
+            "nome": nome,
+            "descricao": descricao,
+            "valor": valor,
+            "tipo_pagamento": tipo,
+            "duracao": duracao,
+            "valor_total": valor_total,
+            "status": True,
+            "pagamentos": 0,
+            "encerrado": False,
+            "historico_pagamentos": []
+        }
+
+        try:
+            supabase.table("investimento").insert(investimento).execute()
+            cache_dados.invalidar("investimento", user_id)
+            flash("Venda cadastrada com sucesso!", "success")
+        except Exception as e:
+            flash(f"Erro ao cadastrar venda: {e}", "fail")
+
+        return renderizar_investimentos(user_id, investimento=investimento)
+
+@investments_bp.route('/deletar_investimento', methods=['POST', 'GET'])
+def deletar_investimento():
+    user_id = session.get('user_id')
+    if not user_id:
+        return redirect(url_for('login.login'))  # Redireciona para login se o usuário não estiver autenticado.
+
+    if request.method == "POST":
+        investimento_id = request.form.get('investimento_id')
+
+        if not investimento_id:
+            return "ID do investimento não fornecido.", 400  # Retorna erro se o ID for inválido.
+        
+        # Atualiza o status do investimento para encerrado
+        supabase.table("investimento").delete().eq("investimento__c", investimento_id).execute()
+        cache_dados.invalidar("investimento", user_id)
+
+        return renderizar_investimentos(user_id)
+
+@investments_bp.route('/encerrar_investimento', methods=['POST', 'GET'])
+def encerrar_investimento():
+    user_id = session.get('user_id')
+    if not user_id:
+        return redirect(url_for('login.login'))  # Redireciona para login se o usuário não estiver autenticado.
+
+    if request.method == "POST":
+        investimento_id = request.form.get('investimento_id')
+
+        if not investimento_id:
+            return "ID do investimento não fornecido.", 400  # Retorna erro se o ID for inválido.
+
+        # Atualiza o status do investimento para encerrado
+        supabase.table("investimento").update({"encerrado": True}).eq("investimento__c", investimento_id).execute()
+        cache_dados.invalidar("investimento", user_id)
+        return renderizar_investimentos(user_id)
+
+    return renderizar_investimentos(user_id)
+
+
+@investments_bp.cli.command("migrar-pagamentos")
+@click.option("--user-id", "user_ids", multiple=True, help="Usuário a migrar (pode repetir). Sem opção, migra todos.")
+def migrar_pagamentos_comando(user_ids):
+    """Copia o JSON de historico_pagamentos para o livro investimento_pagamentos."""
+    for user_id in user_ids or (None,):
+        migrados = migrar_historico(supabase, user_id)
+        click.echo(f"{user_id or 'todos'}: {migrados} investimentos migrados")
@@ -1,23 +1,11 @@
 from flask import Flask, render_template, request, session, redirect, url_for, flash, Blueprint
-from supabase import create_client
-from dotenv import load_dotenv
-from supabase import create_client
-import pandas as pd
-import datetime
-import os
-import re
+from werkzeug.local import LocalProxy
 
-# Initial setup
-load_dotenv()
+from services.supabase_client import obter_supabase_auth
+from services.validacao import is_valid_email
 
-# Supabase setup
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Variáveis de ambiente SUPABASE_URL e SUPABASE_KEY não configuradas.")
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Cliente Supabase compartilhado usado para autenticação
+supabase = LocalProxy(obter_supabase_auth)
 
 login_bp = Blueprint('login', __name__)
 
@@ -40,4 +28,40 @@ def login():
 def dashboard():
     if 'user_id' not in session:
         return redirect(url_for('login.login'))
-    return render_template('dashboard.html', user_id=session['user_id'])
\ No newline at end of file
+    return render_template('dashboard.html', user_id=session['user_id'])
+
+# Rota inicial
+@login_bp.route('/')
+def index():
+    if 'user_id' in session:
+        return render_template('dashboard.html', user_id=session['user_id'])
+    return render_template('login.html')
+
+@login_bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        email = request.form['email']
+        password = request.form['password']
+        print(f"Tentando registrar: {email}")  # Log para debug
+        if not is_valid_email(email):
+            flash("Email inválido. Certifique-se de incluir um domínio válido.", "error")
+        else:
+            try:
+                response = supabase.auth.sign_up({"email": email, "password": password})
+                print(f"Resposta Supabase: {response}")  # Log para debug
+                if response.user:
+                    flash("Usuário registrado com sucesso! Confirme o email recebido.", "success")
+                    return redirect(url_for('login.login'))
+                else:
+                    flash("Erro ao registrar usuário.", "error")
+            except Exception as e:
+                print(f"Erro Supabase: {e}")  # Log para debug
+                flash(f"Erro ao registrar usuário: {e}", "error")
+    return render_template('login.html')
+
+# Rota para logout
+@login_bp.route('/logout')
+def logout():
+    session.clear()
+    flash("Logout realizado com sucesso.", "success")
+    return redirect(url_for('login.index'))
@@ -0,0 +1,34 @@
+from flask import Blueprint, current_app, request, session, jsonify
+import hmac
+import os
+
+from services.cache_dados import cache_dados
+from services.metricas import metricas
+
+monitoramento_bp = Blueprint('monitoramento', __name__)
+
+# Se definido, /metrics exige o cabeçalho "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Estatísticas do cache de dados (para dimensionamento)
+@monitoramento_bp.route('/cache_stats')
+def cache_stats():
+    if 'user_id' not in session:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+    return jsonify(cache_dados.estatisticas())
+
+
+# Métricas do processo no formato do Prometheus (cada worker do gunicorn expõe as suas)
+@monitoramento_bp.route('/metrics')
+def metrics():
+    if METRICS_TOKEN and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        return jsonify({"error": "Não autorizado"}), 401
+
+    estatisticas = cache_dados.estatisticas()
+    extras = [
+        ("app_cache_hits_total", "counter", "Consultas atendidas pelo cache de dados.", {}, estatisticas["hits"]),
+        ("app_cache_misses_total", "counter", "Consultas que não estavam no cache de dados.", {}, estatisticas["misses"]),
+        ("app_cache_entradas", "gauge", "Entradas no cache de dados.", {}, estatisticas["entradas"]),
+        ("app_cache_bytes", "gauge", "Memória estimada do cache de dados.", {}, estatisticas["bytes_estimados"]),
+    ]
+    return current_app.response_class(metricas.exportar(extras), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,254 @@
+from flask import Blueprint, render_template, request, session, redirect, url_for, flash
+from werkzeug.local import LocalProxy
+import click
+import uuid
+
+from obter_dados_tabela import obter_dados_tabela
+from services.buffer_vendas import BUFFER_ATIVO, buffer_vendas, vendas_gravadas
+from services.catalogo_produtos import obter_catalogo
+from services.consultas_paralelas import buscar_em_paralelo
+from services.dados_colunares import clientes_colunar_em_cache, obter_clientes_colunar
+from services.filtros import PERIODOS, parametros_periodo, resolver_periodo
+from services.paginacao import buscar_pagina, buscar_todas, parametros_listagem
+from services.resumo_vendas import gravar_vendas, reconstruir_resumo
+from services.supabase_client import obter_supabase
+
+supabase = LocalProxy(obter_supabase)
+
+sales_bp = Blueprint('sales', __name__, cli_group=None)
+
+# Colunas exibidas na listagem e ordenações permitidas
+COLUNAS_LISTA_VENDAS = "cliente,vendedor,data_venda,pagamento,valor,produtos_formatados"
+ORDENACOES_VENDAS = ("data_venda", "valor", "id")
+# Vendas ainda na fila do buffer guardadas na sessão de quem as cadastrou (o cookie tem ~4 KB)
+MAX_VENDAS_PENDENTES_SESSAO = 10
+
+def calcular_valor_total(preco, desconto, quantidade):
+    """Calcula o valor total do produto."""
+    return round((preco - (preco * (desconto / 100))) * quantidade, 2)
+
+def formatar_produtos(produtos_json):
+    if produtos_json is None:
+        return ""  # Retorna uma string vazia caso o valor seja None
+
+    produtos_formatados = []
+    for produto in produtos_json:
+        if all(key in produto for key in ['nome', 'quantidade', 'desconto', 'preco']):
+            produtos_formatados.append(f"{produto['nome']} - Quantidade: {produto['quantidade']} - Desconto: {produto['desconto']}% - Preço: R${produto['preco']}")
+    
+    return ", ".join(produtos_formatados)
+
+def itens_do_pedido(form, catalogo):
+    """Lê os itens do formulário (listas paralelas produto/quantidade/desconto) e calcula os valores.
+
+    Retorna (itens no formato de `formatar_produtos`, None) ou (None, mensagem de erro).
+    """
+    nomes = form.getlist("produto")
+    quantidades = form.getlist("quantidade")
+    descontos = form.getlist("desconto")
+
+    itens = []
+    for indice, nome in enumerate(nomes):
+        if not nome:
+            continue
+        produto = catalogo.obter(nome)
+        if produto is None or produto.get("preco") is None:
+            return None, f"Produto não encontrado: {nome}"
+        try:
+            quantidade = int(quantidades[indice] if indice < len(quantidades) else 0)
+            desconto = float((descontos[indice] if indice < len(descontos) else "") or 0)
+        except ValueError:
+            return None, f"Quantidade ou desconto inválido para {nome}"
+        if quantidade <= 0:
+            return None, f"Quantidade deve ser maior que zero para {nome}"
+        if not 0 <= desconto <= 100:
+            return None, f"Desconto deve estar entre 0 e 100% para {nome}"
+
+        preco = float(produto["preco"])
+        itens.append({
+            "nome": produto["nome"],
+            "quantidade": quantidade,
+            "desconto": int(desconto) if desconto.is_integer() else desconto,
+            "preco": preco,
+            "valor": calcular_valor_total(preco, desconto, quantidade),
+        })
+
+    if not itens:
+        return None, "Informe ao menos um produto"
+    return itens, None
+
+def cliente_do_pedido(user_id, form):
+    """Cliente da venda pelo `cliente_id` do formulário (ou, em formulários antigos, pelo nome).
+
+    Usa os clientes em colunas se já estiverem em cache; senão, busca só o cliente
+    informado (uma consulta com limit), sem carregar a tabela de clientes a cada venda.
+    Retorna ((cliente_id, nome), None) ou (None, mensagem de erro); um nome que não
+    é de exatamente um cliente é gravado sem `cliente_id`.
+    """
+    cliente_id = form.get("cliente_id")
+    nome = form.get("cliente")
+    clientes = clientes_colunar_em_cache(user_id)
+    if clientes is not None:
+        if cliente_id:
+            posicao = clientes.posicoes("client__c").get(cliente_id, -1)
+            if posicao < 0:
+                return None, "Cliente não encontrado"
+            return (cliente_id, clientes.valor("nome", posicao)), None
+        posicao = clientes.posicoes("nome").get(nome, -1)
+        return (clientes.valor("client__c", posicao) if posicao >= 0 else None, nome), None
+
+    try:
+        if cliente_id:
+            try:
+                uuid.UUID(cliente_id)
+            except ValueError:
+                return None, "Cliente não encontrado"
+            linhas = supabase.table("clientes").select("client__c,nome") \
+                .eq("user_id", user_id).eq("client__c", cliente_id).limit(1).execute().data or []
+            if not linhas:
+                return None, "Cliente não encontrado"
+            return (cliente_id, linhas[0]["nome"]), None
+        if not nome:
+            return (None, nome), None
+        # Dois resultados bastam para saber se o nome é de um único cliente
+        linhas = supabase.table("clientes").select("client__c") \
+            .eq("user_id", user_id).eq("nome", nome).limit(2).execute().data or []
+    except Exception as e:
+        print(f"Erro ao buscar cliente da venda: {e}")
+        return None, "Não foi possível verificar o cliente"
+    return (linhas[0]["client__c"] if len(linhas) == 1 else None, nome), None
+
+@sales_bp.route('/sales', methods=['GET', 'POST'])
+def sales():
+    if 'user_id' not in session:
+        return redirect(url_for('login.login'))
+
+    user_id = session['user_id']
+
+    # Inserção de uma nova venda: só precisa do catálogo (em cache) e do cliente, sem as consultas da listagem
+    if request.method == "POST":
+        itens, erro = itens_do_pedido(request.form, obter_catalogo(supabase, user_id))
+        if not erro:
+            cliente, erro = cliente_do_pedido(user_id, request.form)
+        if erro:
+            flash(f"Erro: {erro}.", "fail")
+            return redirect(url_for('sales.sales'))
+
+        venda = {
+            "user_id": user_id,
+            "produtos": itens,
+            # Resumo calculado uma vez na gravação (ver sql/004_vendas_produtos_formatados.sql)
+            "produtos_formatados": formatar_produtos(itens),
+            # O id liga a venda ao cliente (sql/008_vendas_cliente_id.sql); o nome continua na venda
+            "cliente_id": cliente[0],
+            "cliente": cliente[1],
+            "vendedor": request.form.get("vendedor"),
+            "data_venda": request.form.get("data_venda"),
+            "pagamento": request.form.get("pagamento"),
+            "quantidade": sum(item["quantidade"] for item in itens),
+            "valor": round(sum(item["valor"] for item in itens), 2),
+        }
+
+        # Identifica a venda na gravação (sql/006_vendas_id_envio.sql): repetir não duplica
+        venda["id_envio"] = str(uuid.uuid4())
+        if BUFFER_ATIVO:
+            # Gravação agrupada (services/buffer_vendas.py): a venda é gravada em lote logo em seguida
+            buffer_vendas.adicionar(venda)
+            pendente = {coluna: venda[coluna] for coluna in COLUNAS_LISTA_VENDAS.split(",") + ["id_envio"]}
+            session["vendas_pendentes"] = (session.get("vendas_pendentes", []) + [pendente])[-MAX_VENDAS_PENDENTES_SESSAO:]
+            flash("Venda cadastrada com sucesso!", "success")
+            return redirect(url_for('sales.sales'))
+
+        # Venda e resumo numa única transação (a mesma gravação do buffer)
+        try:
+            gravar_vendas(supabase, [venda])
+            flash("Venda cadastrada com sucesso!", "success")
+        except Exception as e:
+            flash(f"Erro ao cadastrar venda: {e}", "fail")
+
+        return redirect(url_for('sales.sales'))  # Redirecionamento após POST
+
+    parametros, filtros = parametros_listagem(request.args, ORDENACOES_VENDAS, "data_venda", "desc", ("cliente", "vendedor", "pagamento"))
+    # Período da listagem (últimos 30 dias, este ano, personalizado), filtrado no banco
+    periodo = resolver_periodo(request.args)
+    parametros.update(parametros_periodo(periodo))
+    cursor = request.args.get("cursor")
+    # Antes da listagem: grava as vendas deste usuário na fila do processo, para a recém-cadastrada já vir do banco
+    pendentes = vendas_pendentes(user_id)
+
+    # Consultas independentes, executadas em paralelo
+    dados, _ = buscar_em_paralelo({
+        # Em colunas: o template cria cada linha só ao renderizá-la
+        "clientes": lambda: obter_clientes_colunar(supabase, user_id),
+        "catalogo": lambda: obter_catalogo(supabase, user_id),
+        "vendedores": lambda: obter_dados_tabela("vendedores", user_id, "nome"),
+        # Página atual da tabela de vendas
+        "vendas": lambda: buscar_pagina(
+            supabase, "vendas", user_id, COLUNAS_LISTA_VENDAS,
+            ordenar_por=parametros["ordem"],
+            descendente=parametros["direcao"] == "desc",
+            cursor=cursor,
+            tamanho_pagina=parametros["tamanho"],
+            filtros=filtros,
+            intervalo=("data_venda", periodo["inicio"], periodo["fim"]),
+        ),
+    })
+    pagina = dados["vendas"] or {"linhas": [], "proximo_cursor": None}
+    catalogo = dados["catalogo"]
+    if pendentes and not cursor and not filtros and periodo["periodo"] == "tudo":
+        pagina["linhas"] = [{**venda, "pendente": True} for venda in reversed(pendentes)] + pagina["linhas"]
+
+    return render_template(
+        'sales.html',
+        clientes_df=dados["clientes"],
+        vendas=pagina["linhas"],
+        proximo_cursor=pagina["proximo_cursor"],
+        parametros=parametros,
+        periodo=periodo,
+        periodos=PERIODOS,
+        vendedores=dados["vendedores"],
+        produtos=[{"nome": produto["nome"], "preco": produto["preco"]} for produto in catalogo.produtos] if catalogo else [],
+    )
+
+
+def vendas_pendentes(user_id):
+    """Vendas cadastradas nesta sessão que ainda não estão no banco (read-your-writes com o buffer).
+
+    Pode ser outro worker que as tem na fila; assim que aparecem no banco saem da sessão.
+    """
+    pendentes = session.get("vendas_pendentes")
+    if not pendentes:
+        return []
+    try:
+        gravadas = vendas_gravadas(supabase, user_id, [venda["id_envio"] for venda in pendentes])
+    except Exception as e:
+        print(f"Erro ao verificar vendas pendentes: {e}")
+        gravadas = set()
+    pendentes = [venda for venda in pendentes if venda["id_envio"] not in gravadas]
+    if pendentes:
+        session["vendas_pendentes"] = pendentes
+    else:
+        session.pop("vendas_pendentes")
+    return pendentes
+
+
+@sales_bp.cli.command("reenviar-vendas")
+def reenviar_vendas_comando():
+    """Reenvia as vendas que o buffer não conseguiu gravar (guardadas em SALES_BUFFER_SPILL_DIR)."""
+    reenviadas, restantes = buffer_vendas.reenviar_falhas()
+    click.echo(f"{reenviadas} vendas reenviadas" + (f"; {restantes} arquivos ainda com erro" if restantes else ""))
+
+
+@sales_bp.cli.command("reconstruir-resumo")
+@click.option("--user-id", "user_ids", multiple=True, help="Usuário a reconstruir (pode repetir).")
+@click.option("--todos", is_flag=True, help="Reconstrói o resumo de todos os usuários com vendas.")
+def reconstruir_resumo_comando(user_ids, todos):
+    """Recalcula do zero o resumo (vendas_resumo) a partir da tabela de vendas."""
+    if todos:
+        linhas = buscar_todas(lambda: supabase.table("vendas").select("user_id").order("id"))
+        user_ids = sorted({linha["user_id"] for linha in linhas})
+    if not user_ids:
+        raise click.UsageError("Informe --user-id ou --todos.")
+    for user_id in user_ids:
+        total = reconstruir_resumo(supabase, user_id)
+        click.echo(f"{user_id}: {total} linhas de resumo")
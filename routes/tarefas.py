@@ -0,0 +1,64 @@
+from flask import Blueprint, request, session, jsonify, url_for
+
+from services.importacao_clientes import enviar_importacao_csv
+from services.resumo_vendas import tarefa_reconstruir_resumo
+from services.tarefas import LimiteTarefas, cancelar_tarefa, enviar_tarefa, listar_tarefas, obter_tarefa
+
+tarefas_bp = Blueprint('tarefas', __name__)
+
+TIPOS_TAREFA = ("importar_clientes_csv", "reconstruir_resumo_vendas")
+
+
+def _publica(tarefa):
+    return {campo: valor for campo, valor in tarefa.items() if campo != "user_id"}
+
+
+# Envio (responde 202 na hora; o progresso é consultado em /api/tarefas/<id>) e lista das tarefas recentes
+@tarefas_bp.route('/api/tarefas', methods=['GET', 'POST'])
+def api_tarefas():
+    if 'user_id' not in session:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+    user_id = session['user_id']
+
+    if request.method == 'GET':
+        return jsonify({"tarefas": [_publica(tarefa) for tarefa in listar_tarefas(user_id)]})
+
+    tipo = request.form.get("tipo") or (request.get_json(silent=True) or {}).get("tipo")
+    try:
+        if tipo == "importar_clientes_csv":
+            arquivo = request.files.get("csv_file")
+            if not arquivo or not arquivo.filename.endswith(".csv"):
+                return jsonify({"error": "Envie um arquivo CSV em csv_file"}), 400
+            tarefa = enviar_importacao_csv(user_id, arquivo)
+        elif tipo == "reconstruir_resumo_vendas":
+            tarefa = enviar_tarefa(user_id, tipo, tarefa_reconstruir_resumo)
+        else:
+            return jsonify({"error": f"Tipo de tarefa deve ser um de: {', '.join(TIPOS_TAREFA)}"}), 400
+    except LimiteTarefas as e:
+        return jsonify({"error": str(e)}), 429
+
+    resposta = jsonify(_publica(tarefa.como_dict()))
+    resposta.status_code = 202
+    resposta.headers["Location"] = url_for('tarefas.api_tarefa', tarefa_id=tarefa.id)
+    return resposta
+
+
+# Progresso: status, linhas processadas (de `total`, estimado), erros e resultado parcial
+@tarefas_bp.route('/api/tarefas/<tarefa_id>')
+def api_tarefa(tarefa_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+    tarefa = obter_tarefa(session['user_id'], tarefa_id)
+    if tarefa is None:
+        return jsonify({"error": "Tarefa não encontrada"}), 404
+    return jsonify(_publica(tarefa))
+
+
+@tarefas_bp.route('/api/tarefas/<tarefa_id>/cancelar', methods=['POST'])
+def api_cancelar_tarefa(tarefa_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Usuário não autenticado"}), 401
+    tarefa = cancelar_tarefa(session['user_id'], tarefa_id)
+    if tarefa is None:
+        return jsonify({"error": "Tarefa não encontrada"}), 404
+    return jsonify(_publica(tarefa))
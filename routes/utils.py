@@ -0,0 +1,49 @@
+from flask import current_app, request, session
+import hashlib
+import json
+import time
+
+from services.cache_dados import CACHE_TTL_SEGUNDOS, cache_dados
+
+
+def quer_json():
+    """Pedido feito pelo JavaScript da página (fetch com `Accept: application/json`)."""
+    return request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json"
+
+
+def _etag_versoes(tabelas, extras):
+    """ETag das versões dos dados (ou None sem versões compartilhadas, ver services/cache_dados.py).
+
+    Combina as versões de `tabelas` do usuário, a rota com os parâmetros da URL,
+    `extras` e o período atual do TTL do cache: alterações que não passam pela
+    aplicação (ou cuja versão não pôde ser publicada) aparecem, como no cache,
+    em até CACHE_TTL_SEGUNDOS.
+    """
+    user_id = session.get("user_id")
+    versoes = cache_dados.versoes_globais(tabelas, user_id)
+    if versoes is None:
+        return None
+    chave = (user_id, versoes, request.path, sorted(request.args.items(multi=True)), extras,
+             int(time.time() // CACHE_TTL_SEGUNDOS))
+    return hashlib.sha256(repr(chave).encode("utf-8")).hexdigest()[:32]
+
+
+def resposta_json_condicional(carregar, tabelas, *extras):
+    """Resposta JSON com ETag derivado das versões dos dados, verificado antes de carregá-los.
+
+    Se o navegador enviar `If-None-Match` com o ETag atual, responde 304 sem
+    chamar `carregar`. O ETag é fraco (identifica os dados, não os bytes, que a
+    compressão muda). Sem versões compartilhadas, é o hash do conteúdo.
+    """
+    etag = _etag_versoes(tabelas, extras)
+    if etag and request.if_none_match.contains_weak(etag):
+        resposta = current_app.response_class(status=304)
+    else:
+        corpo = json.dumps(carregar(), ensure_ascii=False, sort_keys=True)
+        resposta = current_app.response_class(corpo, mimetype="application/json")
+    resposta.headers["Cache-Control"] = "private, no-cache"
+    if etag:
+        resposta.set_etag(etag, weak=True)
+        return resposta
+    resposta.set_etag(hashlib.sha256(corpo.encode("utf-8")).hexdigest()[:32])
+    return resposta.make_conditional(request)
@@ -0,0 +1,45 @@
+"""Subclasses do cliente Supabase com pool HTTP configurável (ver supabase_client)."""
+from httpx import Limits
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient as SessaoPostgrest
+from supabase._sync.client import SyncClient
+
+from services import supabase_client
+from services.metricas import ganchos_httpx
+
+
+class _PostgrestComPool(SyncPostgrestClient):
+    """Cliente PostgREST cuja sessão HTTP usa o pool de conexões configurado."""
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return SessaoPostgrest(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+            follow_redirects=True,
+            http2=supabase_client.SUPABASE_HTTP2,
+            limits=Limits(
+                max_connections=supabase_client.SUPABASE_POOL_SIZE,
+                max_keepalive_connections=supabase_client.SUPABASE_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=supabase_client.SUPABASE_KEEPALIVE_EXPIRY,
+            ),
+            # Contagem das chamadas por requisição (ver services/metricas.py)
+            event_hooks=ganchos_httpx(),
+        )
+
+
+class ClienteSupabase(SyncClient):
+    """Cliente Supabase que cria o PostgREST com `_PostgrestComPool`."""
+
+    @staticmethod
+    def _init_postgrest_client(rest_url, headers, schema, timeout=supabase_client.SUPABASE_TIMEOUT, verify=True, proxy=None):
+        return _PostgrestComPool(
+            rest_url,
+            headers=headers,
+            schema=schema,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+        )
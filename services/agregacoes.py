@@ -0,0 +1,72 @@
+from services.metricas import medir_etapa
+
+# numpy/pandas são importados dentro das funções, para não pesar na inicialização da aplicação
+
+
+def _montar_series(meses, receitas, vendas_por_cliente, clientes):
+    """Converte os agregados de vendas nas séries usadas pelos gráficos.
+
+    `vendas_por_cliente` é um dict nome -> número de vendas; `clientes` é a
+    tabela colunar (services/dados_colunares.py) com `nome` e `ativo`.
+    """
+    import pandas as pd
+
+    # Vendas x Clientes: contagem por nome, incluindo clientes sem vendas
+    nomes = pd.unique(clientes.coluna("nome"))
+    vendas_vs_clientes = {nome: int(vendas_por_cliente.get(nome, 0)) for nome in nomes}
+
+    # Clientes ativos/inativos
+    ativos = int(clientes.coluna("ativo").sum())
+    inativos = len(clientes) - ativos
+
+    return {
+        "vendas_labels": list(meses),
+        "vendas_values": [round(float(valor), 2) for valor in receitas],
+        "vendas_vs_clientes": vendas_vs_clientes,
+        "active_clients_count": ativos,
+        "inactive_clients_count": inativos,
+    }
+
+
+@medir_etapa("numpy")
+def agregar_graficos_clientes(vendas, clientes):
+    """Monta todas as séries dos gráficos do gerenciador de clientes.
+
+    Trabalha direto sobre as colunas (services/dados_colunares.py): o total
+    mensal é uma soma ponderada por mês e a contagem por cliente um
+    `bincount` dos códigos. Espera vendas com `cliente`, `data_venda` e
+    `valor`, e clientes com `nome` e `ativo`.
+    """
+    import numpy as np
+
+    datas = vendas.coluna("data_venda")
+    validas = ~np.isnat(datas)
+    valores = np.nan_to_num(vendas.coluna("valor")[validas])
+    meses, posicoes = np.unique(datas[validas].astype("datetime64[M]"), return_inverse=True)
+    receitas = np.bincount(posicoes.ravel(), weights=valores, minlength=len(meses))
+
+    codigos = vendas.codigos("cliente")
+    categorias = vendas.categorias("cliente")
+    contagens = np.bincount(codigos[codigos >= 0], minlength=len(categorias))
+    vendas_por_cliente = dict(zip(categorias.tolist(), contagens.tolist()))
+    return _montar_series(np.datetime_as_string(meses, unit="M").tolist(), receitas, vendas_por_cliente, clientes)
+
+
+@medir_etapa("pandas")
+def graficos_de_resumo(resumo_mensal, clientes):
+    """Monta as mesmas séries de `agregar_graficos_clientes` a partir do resumo mensal.
+
+    `resumo_mensal` são linhas de `vendas_resumo` com as dimensões "total" e
+    "cliente" (granularidade "mes", ou "dia" para um período: os dias são
+    somados por mês).
+    """
+    import pandas as pd
+
+    resumo_df = pd.DataFrame(resumo_mensal, columns=["periodo", "dimensao", "chave", "receita", "num_vendas"])
+
+    totais = resumo_df[resumo_df["dimensao"] == "total"]
+    vendas_por_mes = pd.to_numeric(totais["receita"]).groupby(totais["periodo"].str.slice(0, 7)).sum().sort_index()
+
+    por_cliente = resumo_df[resumo_df["dimensao"] == "cliente"]
+    vendas_por_cliente = por_cliente["num_vendas"].groupby(por_cliente["chave"]).sum()
+    return _montar_series(vendas_por_mes.index.tolist(), vendas_por_mes.tolist(), vendas_por_cliente.to_dict(), clientes)
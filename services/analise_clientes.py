@@ -0,0 +1,239 @@
+"""Análise de clientes: segmentação RFM e retenção por coorte mensal.
+
+As vendas são ligadas aos clientes pelo `cliente_id` (sql/008_vendas_cliente_id.sql);
+vendas antigas, sem id, pelo nome, quando ele é de um único cliente. Tudo é
+calculado com agrupamentos vetorizados sobre as colunas de
+services/dados_colunares.py, sem montar uma linha Python por venda:
+
+- RFM: recência (dias desde a última compra), frequência (número de vendas) e
+  valor monetário de cada cliente, com notas de 1 a 5 por quintil e um segmento;
+- coortes: clientes agrupados pelo mês da primeira compra e a fração deles que
+  comprou em cada um dos meses seguintes.
+
+O resultado fica em cache até a próxima escrita em vendas ou clientes (ou a virada do dia).
+"""
+import os
+from datetime import date
+
+from services.cache_dados import cache_dados
+from services.consultas_paralelas import buscar_em_paralelo
+from services.dados_colunares import obter_clientes_colunar, obter_vendas_colunar
+from services.metricas import medir_etapa
+
+# Coortes exibidas: as dos últimos N meses (incluindo o atual)
+MESES_COORTE = int(os.getenv("ANALYTICS_COHORT_MONTHS", 12))
+# Clientes devolvidos por segmento em /api/clientes/analise?segmento=...
+MAX_CLIENTES_SEGMENTO = int(os.getenv("ANALYTICS_SEGMENT_LIMIT", 200))
+
+COLUNAS_VENDAS_ANALISE = ("cliente_id", "cliente", "data_venda", "valor")
+
+# Segmentos na ordem em que as regras de `_segmentos` são testadas (a primeira que vale define o segmento)
+SEGMENTOS = {
+    "campeoes": "Campeões",
+    "novos": "Novos",
+    "leais": "Leais",
+    "em_risco": "Em risco",
+    "hibernando": "Hibernando",
+    "atencao": "Precisam de atenção",
+}
+
+
+def _notas(valores, maior_melhor=True):
+    """Nota de 1 a 5 por quintil (empates recebem a mesma nota)."""
+    import numpy as np
+    import pandas as pd
+
+    percentis = pd.Series(valores if maior_melhor else -valores).rank(pct=True).to_numpy()
+    return np.clip(np.ceil(percentis * 5), 1, 5).astype(np.int8)
+
+
+def _segmentos(recencia, frequencia, monetario):
+    """Código do segmento (posição em SEGMENTOS) a partir das notas R, F e M."""
+    import numpy as np
+
+    frequencia_valor = (frequencia + monetario) / 2
+    condicoes = [
+        (recencia >= 4) & (frequencia_valor >= 4),  # campeões
+        (recencia >= 4) & (frequencia <= 2),  # novos
+        (recencia >= 3) & (frequencia_valor >= 3),  # leais
+        (recencia <= 2) & (frequencia_valor >= 3),  # em risco
+        recencia <= 2,  # hibernando
+    ]
+    return np.select(condicoes, list(range(len(condicoes))), default=len(condicoes)).astype(np.int8)
+
+
+def ligar_vendas_clientes(vendas, clientes):
+    """Posição do cliente (em `clientes`) de cada venda, -1 quando não há cliente correspondente.
+
+    Usa o `cliente_id` e, nas vendas sem id, o nome (se for de um único cliente).
+    A busca é feita uma vez por valor distinto, e não por venda.
+    """
+    import numpy as np
+
+    def posicao_por_codigo(coluna, posicoes, chave):
+        # Uma posição por categoria, mais um -1 no fim para o código -1 (vazio)
+        categorias = vendas.categorias(coluna)
+        mapa = np.fromiter((posicoes.get(chave(valor), -1) for valor in categorias), dtype=np.int32,
+                           count=len(categorias))
+        return np.append(mapa, np.int32(-1))[vendas.codigos(coluna)]
+
+    por_id = posicao_por_codigo("cliente_id", clientes.posicoes("client__c"), str)
+    por_nome = posicao_por_codigo("cliente", clientes.posicoes("nome"), lambda valor: valor)
+    return np.where(vendas.codigos("cliente_id") >= 0, por_id, por_nome)
+
+
+class AnaliseClientes:
+    """RFM de cada cliente com compras e a matriz de retenção das coortes (somente leitura, fica em cache)."""
+
+    def __init__(self, clientes, posicoes, metricas, segmentos, coortes, vendas_sem_cliente, hoje):
+        self.clientes = clientes  # tabela colunar dos clientes (compartilhada com o cache de `clientes`)
+        self.posicoes = posicoes  # posição em `clientes` de cada cliente com compras
+        self.metricas = metricas  # DataFrame alinhado a `posicoes`: recencia, frequencia, monetario e notas
+        self.segmentos = segmentos  # código do segmento (posição em SEGMENTOS) de cada cliente com compras
+        self.coortes = coortes
+        self.vendas_sem_cliente = vendas_sem_cliente
+        self.hoje = hoje
+
+    def resumo(self):
+        """Totais por segmento e coortes, no formato do JSON de /api/clientes/analise."""
+        import numpy as np
+
+        quantidade = len(SEGMENTOS)
+        clientes = np.bincount(self.segmentos, minlength=quantidade)
+        receita = np.bincount(self.segmentos, weights=self.metricas["monetario"].to_numpy(), minlength=quantidade)
+        recencia = np.bincount(self.segmentos, weights=self.metricas["recencia"].to_numpy(), minlength=quantidade)
+        segmentos = []
+        for codigo, (chave, nome) in enumerate(SEGMENTOS.items()):
+            total = int(clientes[codigo])
+            segmentos.append({
+                "segmento": chave,
+                "nome": nome,
+                "clientes": total,
+                "receita": round(float(receita[codigo]), 2),
+                "recencia_media": round(float(recencia[codigo]) / total, 1) if total else None,
+            })
+        return {
+            "data_referencia": self.hoje.isoformat(),
+            "clientes_com_compras": len(self.posicoes),
+            "clientes_sem_compras": len(self.clientes) - len(self.posicoes),
+            "vendas_sem_cliente": self.vendas_sem_cliente,
+            "segmentos": segmentos,
+            "coortes": self.coortes,
+        }
+
+    def clientes_do_segmento(self, segmento, limite=MAX_CLIENTES_SEGMENTO):
+        """Clientes de um segmento (chave de SEGMENTOS), do maior para o menor valor monetário."""
+        import numpy as np
+
+        codigo = list(SEGMENTOS).index(segmento)
+        linhas = np.flatnonzero(self.segmentos == codigo)
+        monetario = self.metricas["monetario"].to_numpy()
+        linhas = linhas[np.argsort(-monetario[linhas], kind="stable")][:limite]
+        resultado = []
+        for linha, metricas in zip(linhas.tolist(), self.metricas.iloc[linhas].itertuples(index=False)):
+            posicao = int(self.posicoes[linha])
+            resultado.append({
+                "client__c": self.clientes.valor("client__c", posicao),
+                "nome": self.clientes.valor("nome", posicao),
+                "recencia": int(metricas.recencia),
+                "frequencia": int(metricas.frequencia),
+                "monetario": round(float(metricas.monetario), 2),
+                "rfm": f"{metricas.nota_r}{metricas.nota_f}{metricas.nota_m}",
+            })
+        return resultado
+
+    def __sizeof__(self):
+        # Limite de memória do cache: só o que é desta análise (a tabela de clientes já conta no próprio cache)
+        return (object.__sizeof__(self) + self.posicoes.nbytes + self.segmentos.nbytes
+                + int(self.metricas.memory_usage(index=True).sum()) + 200 * len(self.coortes))
+
+
+def _matriz_coortes(cliente, mes_venda, primeiro_mes, mes_atual, meses=MESES_COORTE):
+    """Coortes dos últimos `meses` meses: tamanho e % dos clientes que compraram em cada mês seguinte.
+
+    `cliente` e `mes_venda` (meses desde 1970) são por venda; `primeiro_mes`, por cliente.
+    """
+    import numpy as np
+
+    mes_inicial = mes_atual - meses + 1
+    coorte = primeiro_mes[cliente]
+    deslocamento = mes_venda - coorte
+    dentro = (coorte >= mes_inicial) & (deslocamento >= 0) & (deslocamento < meses)
+    # Cada cliente conta uma vez por mês: pares (cliente, deslocamento) distintos
+    pares = np.unique(cliente[dentro].astype(np.int64) * meses + deslocamento[dentro])
+    linha = primeiro_mes[pares // meses] - mes_inicial
+    contagem = np.bincount(linha * meses + pares % meses, minlength=meses * meses).reshape(meses, meses)
+
+    coortes = []
+    for indice in range(meses):
+        tamanho = int(contagem[indice, 0])
+        if not tamanho:
+            continue
+        decorridos = meses - indice  # meses da coorte até o atual, inclusive
+        coortes.append({
+            "coorte": str(np.datetime64(int(mes_inicial + indice), "M")),
+            "clientes": tamanho,
+            "retencao": [round(100 * int(valor) / tamanho, 1) for valor in contagem[indice, :decorridos]],
+        })
+    return coortes
+
+
+@medir_etapa("pandas")
+def calcular_analise(vendas, clientes, hoje=None):
+    """RFM e coortes a partir das tabelas colunares de vendas (COLUNAS_VENDAS_ANALISE) e de clientes."""
+    import numpy as np
+    import pandas as pd
+
+    hoje = hoje or date.today()
+    cliente = ligar_vendas_clientes(vendas, clientes)
+    datas = vendas.coluna("data_venda")
+    validas = (cliente >= 0) & ~np.isnat(datas)
+    vendas_sem_cliente = int(np.count_nonzero(cliente < 0))
+
+    cliente = cliente[validas]
+    datas = datas[validas]
+    valores = np.nan_to_num(vendas.coluna("valor")[validas])
+    dias = datas.astype(np.int64)
+    hoje_dias = np.datetime64(hoje, "D").astype(np.int64)
+
+    agrupado = pd.DataFrame({"cliente": cliente, "dia": dias, "valor": valores}).groupby("cliente").agg(
+        primeiro=("dia", "min"), ultimo=("dia", "max"), frequencia=("dia", "size"), monetario=("valor", "sum"))
+    posicoes = agrupado.index.to_numpy(dtype=np.int64)
+    metricas = pd.DataFrame({
+        "recencia": np.maximum(hoje_dias - agrupado["ultimo"].to_numpy(), 0),
+        "frequencia": agrupado["frequencia"].to_numpy(),
+        "monetario": agrupado["monetario"].to_numpy(),
+    })
+    metricas["nota_r"] = _notas(metricas["recencia"].to_numpy(), maior_melhor=False)
+    metricas["nota_f"] = _notas(metricas["frequencia"].to_numpy())
+    metricas["nota_m"] = _notas(metricas["monetario"].to_numpy())
+    segmentos = _segmentos(metricas["nota_r"].to_numpy(), metricas["nota_f"].to_numpy(),
+                           metricas["nota_m"].to_numpy())
+
+    def meses(valores_dias):
+        return valores_dias.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+    # Mês da primeira compra indexado pela posição do cliente (os sem compras nunca são consultados)
+    primeiro_mes = np.zeros(len(clientes), dtype=np.int64)
+    primeiro_mes[posicoes] = meses(agrupado["primeiro"].to_numpy())
+    coortes = _matriz_coortes(cliente, meses(dias), primeiro_mes, meses(np.array([hoje_dias]))[0])
+    return AnaliseClientes(clientes, posicoes, metricas, segmentos, coortes, vendas_sem_cliente, hoje)
+
+
+def obter_analise(supabase, user_id, hoje=None):
+    """Análise dos clientes do usuário, em cache até a próxima escrita em vendas ou clientes."""
+    hoje = hoje or date.today()
+    # A recência muda com o dia, por isso a data faz parte da chave
+    formato = ("analise", cache_dados.geracao("clientes", user_id), hoje.isoformat())
+    encontrado, analise = cache_dados.obter("vendas", user_id, formato)
+    if encontrado:
+        return analise
+
+    geracao = cache_dados.geracao("vendas", user_id)
+    dados, _ = buscar_em_paralelo({
+        "vendas": lambda: obter_vendas_colunar(supabase, user_id, COLUNAS_VENDAS_ANALISE),
+        "clientes": lambda: obter_clientes_colunar(supabase, user_id),
+    })
+    analise = calcular_analise(dados["vendas"], dados["clientes"], hoje)
+    cache_dados.guardar("vendas", user_id, formato, analise, geracao=geracao)
+    return analise
@@ -0,0 +1,209 @@
+"""Gravação agrupada de vendas (opcional, SALES_WRITE_BUFFER=true).
+
+Em vez de um insert por POST, as vendas validadas entram numa fila do
+processo e uma thread as grava em inserts de várias linhas, a cada
+SALES_BUFFER_MAX_ITEMS vendas ou SALES_BUFFER_MAX_DELAY_MS milissegundos.
+
+Cada venda leva um `id_envio` (sql/006_vendas_id_envio.sql), e a gravação
+ignora ids já existentes, então repetir um lote não duplica vendas; o resumo
+é somado na mesma transação (sql/010_gravar_vendas_lote.sql). Lotes
+que falham depois de SALES_BUFFER_RETRIES tentativas vão para um arquivo
+em SALES_BUFFER_SPILL_DIR (gravado com fsync) e são reenviados
+periodicamente ou por `flask reenviar-vendas`. A fila é descarregada no
+encerramento do processo (atexit e worker_exit do gunicorn).
+
+O ganho de latência é do POST: a listagem que vem em seguida (GET /sales)
+grava na hora as vendas daquele usuário ainda na fila, para exibi-las do
+banco (ver `vendas_gravadas`).
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+
+from services.resumo_vendas import gravar_vendas
+from services.supabase_client import obter_supabase
+
+BUFFER_ATIVO = os.getenv("SALES_WRITE_BUFFER", "false").lower() in ("1", "true", "sim")
+# Grava quando a fila chega a tantas vendas...
+MAX_VENDAS_LOTE = int(os.getenv("SALES_BUFFER_MAX_ITEMS", 50))
+# ...ou quando a venda mais antiga espera há tanto tempo
+ATRASO_MAXIMO_MS = float(os.getenv("SALES_BUFFER_MAX_DELAY_MS", 20))
+TENTATIVAS_GRAVACAO = int(os.getenv("SALES_BUFFER_RETRIES", 3))
+# Intervalo entre reenvios automáticos dos lotes que falharam
+INTERVALO_REENVIO_SEGUNDOS = float(os.getenv("SALES_BUFFER_RETRY_SECONDS", 60))
+# Use um diretório persistente (volume) em produção
+DIRETORIO_FALHAS = os.getenv("SALES_BUFFER_SPILL_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance", "vendas_pendentes")
+
+
+class BufferVendas:
+    """Fila de vendas do processo, gravada em lotes por uma thread (ver o docstring do módulo)."""
+
+    def __init__(self, max_itens=MAX_VENDAS_LOTE, atraso_ms=ATRASO_MAXIMO_MS, diretorio_falhas=DIRETORIO_FALHAS):
+        self.max_itens = max_itens
+        self.atraso = atraso_ms / 1000
+        self.diretorio_falhas = diretorio_falhas
+        self._pendentes = []  # (instante em que entrou, venda)
+        self._cond = threading.Condition()
+        self._escrita = threading.Lock()  # um lote gravando por vez (e `descarregar` espera o que está em andamento)
+        self._thread = None
+        self._pid = None
+        self._proximo_reenvio = 0.0
+        self.gravadas = 0
+        self.falhas = 0
+
+    def adicionar(self, venda):
+        """Coloca a venda (já com `id_envio`) na fila. Retorna sem esperar a gravação."""
+        with self._cond:
+            self._iniciar()
+            self._pendentes.append((time.monotonic(), venda))
+            # A primeira venda da fila inicia a contagem do prazo; a fila cheia antecipa a gravação
+            if len(self._pendentes) == 1 or len(self._pendentes) >= self.max_itens:
+                self._cond.notify()
+
+    def _iniciar(self):
+        # Thread do processo atual (recriada após um fork; a fila do pai não é herdada)
+        if self._pid != os.getpid():
+            self._pendentes.clear()
+            self._pid = os.getpid()
+            if glob.glob(os.path.join(self.diretorio_falhas, "*")):
+                # Sobras de uma execução anterior
+                self._proximo_reenvio = time.monotonic()
+            self._thread = threading.Thread(target=self._laco, name="buffer-vendas", daemon=True)
+            self._thread.start()
+
+    def _reenvio_vencido(self):
+        return bool(self._proximo_reenvio) and time.monotonic() >= self._proximo_reenvio
+
+    def _laco(self):
+        while True:
+            with self._cond:
+                while not self._pendentes and not self._reenvio_vencido():
+                    espera = max(self._proximo_reenvio - time.monotonic(), 0) if self._proximo_reenvio else None
+                    self._cond.wait(espera)
+                prazo = self._pendentes[0][0] + self.atraso if self._pendentes else 0
+                while self._pendentes and len(self._pendentes) < self.max_itens and time.monotonic() < prazo:
+                    self._cond.wait(prazo - time.monotonic())
+            self.descarregar()
+            if self._reenvio_vencido():
+                self._proximo_reenvio = 0.0
+                self.reenviar_falhas()
+
+    def pendentes(self):
+        with self._cond:
+            return len(self._pendentes)
+
+    def descarregar(self, user_id=None):
+        """Grava agora o que está na fila, ou só as vendas de `user_id` (e espera o lote que já estava sendo gravado)."""
+        with self._escrita:
+            while True:
+                with self._cond:
+                    lote, restantes = [], []
+                    for pendente in self._pendentes:
+                        if len(lote) < self.max_itens and user_id in (None, pendente[1]["user_id"]):
+                            lote.append(pendente[1])
+                        else:
+                            restantes.append(pendente)
+                    self._pendentes[:] = restantes
+                if not lote:
+                    return
+                self._gravar_com_tentativas(lote)
+
+    def _gravar_com_tentativas(self, lote):
+        for tentativa in range(TENTATIVAS_GRAVACAO):
+            try:
+                gravar_vendas(obter_supabase(), lote)
+                self.gravadas += len(lote)
+                return
+            except Exception as e:
+                print(f"Erro ao gravar lote de {len(lote)} vendas (tentativa {tentativa + 1}): {e}")
+                if tentativa + 1 < TENTATIVAS_GRAVACAO:
+                    time.sleep(0.1 * 2 ** tentativa)
+        self._guardar_falha(lote)
+
+    def _guardar_falha(self, lote):
+        """Grava o lote em disco para reenvio; só se perde se nem o disco estiver disponível."""
+        self.falhas += len(lote)
+        try:
+            os.makedirs(self.diretorio_falhas, exist_ok=True)
+            # Um arquivo por lote, que só aparece com o nome final depois de completo
+            caminho = os.path.join(self.diretorio_falhas, f"vendas-{os.getpid()}-{time.time_ns()}.jsonl")
+            with open(caminho + ".tmp", "w", encoding="utf-8") as arquivo:
+                for venda in lote:
+                    arquivo.write(json.dumps(venda, ensure_ascii=False, default=str) + "\n")
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+            os.replace(caminho + ".tmp", caminho)
+            print(f"{len(lote)} vendas guardadas em {caminho} para reenvio")
+        except OSError as e:
+            print(f"Erro ao guardar vendas não gravadas ({e}): {json.dumps(lote, ensure_ascii=False, default=str)}")
+        self._proximo_reenvio = time.monotonic() + INTERVALO_REENVIO_SEGUNDOS
+
+    def reenviar_falhas(self):
+        """Reenvia os lotes guardados em disco. Retorna (vendas reenviadas, arquivos que ainda falham)."""
+        reenviadas, restantes = 0, 0
+        for reservado in glob.glob(os.path.join(self.diretorio_falhas, "*.enviando")):
+            # Reservado por um processo que terminou no meio do reenvio: volta para a fila
+            caminho, pid, _ = reservado.rsplit(".", 2)
+            if not _processo_ativo(int(pid)):
+                os.replace(reservado, caminho)
+
+        for caminho in glob.glob(os.path.join(self.diretorio_falhas, "*.jsonl")):
+            # Renomear "reserva" o arquivo: outro processo reenviando ao mesmo tempo não o encontra
+            reservado = f"{caminho}.{os.getpid()}.enviando"
+            try:
+                os.rename(caminho, reservado)
+            except OSError:
+                continue
+            try:
+                with open(reservado, encoding="utf-8") as arquivo:
+                    vendas = [json.loads(linha) for linha in arquivo if linha.strip()]
+                for inicio in range(0, len(vendas), self.max_itens):
+                    gravar_vendas(obter_supabase(), vendas[inicio:inicio + self.max_itens])
+                os.remove(reservado)
+                reenviadas += len(vendas)
+            except Exception as e:
+                # Lotes já reenviados são ignorados na próxima vez (id_envio)
+                print(f"Erro ao reenviar {caminho}: {e}")
+                os.rename(reservado, caminho)
+                restantes += 1
+        if restantes:
+            self._proximo_reenvio = time.monotonic() + INTERVALO_REENVIO_SEGUNDOS
+        return reenviadas, restantes
+
+    def encerrar(self):
+        """Descarrega a fila (chamado no encerramento do processo)."""
+        if self._pid == os.getpid():
+            self.descarregar()
+
+
+def _processo_ativo(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+buffer_vendas = BufferVendas()
+atexit.register(buffer_vendas.encerrar)
+
+
+def vendas_gravadas(supabase, user_id, ids_envio):
+    """Quais dos `id_envio` já estão na tabela de vendas.
+
+    Antes, grava as vendas do usuário que estão na fila deste processo: quem
+    abre a listagem logo após cadastrar paga essa gravação, mas não a das
+    vendas dos outros usuários, que seguem no lote da thread.
+    """
+    buffer_vendas.descarregar(user_id)
+    linhas = supabase.table("vendas").select("id_envio") \
+        .eq("user_id", user_id).in_("id_envio", list(ids_envio)).execute().data or []
+    return {linha["id_envio"] for linha in linhas}
@@ -0,0 +1,377 @@
+import bisect
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from services.cache_dados import cache_dados
+from services.paginacao import TAMANHO_PAGINA_PADRAO, buscar_todas
+
+# Configuração do índice (pode ser ajustada por variável de ambiente)
+INDICE_TTL_SEGUNDOS = float(os.getenv("CLIENT_INDEX_TTL_SECONDS", 300))
+INDICE_MAX_USUARIOS = int(os.getenv("CLIENT_INDEX_MAX_USERS", 64))
+
+# Colunas guardadas no índice (as mesmas da listagem do gerenciador de clientes)
+COLUNAS_INDICE = "id,client__c,nome,contato,endereco,bairro,cidade,estado,cep,genero,email,data_nascimento,ativo"
+
+# Pontuação de cada termo da consulta, conforme o tipo de casamento
+PONTOS_EXATO = 3
+PONTOS_PREFIXO = 2
+PONTOS_APROXIMADO = 1
+
+PALAVRA = re.compile(r"[a-z0-9]+")
+SO_TELEFONE = re.compile(r"[\d\s()+.\-/]+")
+
+
+def normalizar_texto(valor):
+    """Minúsculas, sem acentos e sem espaços nas pontas."""
+    texto = unicodedata.normalize("NFKD", str(valor or ""))
+    texto = "".join(caractere for caractere in texto if not unicodedata.combining(caractere))
+    return texto.casefold().strip()
+
+
+def normalizar_telefone(valor):
+    """Só os dígitos do telefone, sem o código do país (55) nem zeros de discagem."""
+    digitos = re.sub(r"\D", "", str(valor or "")).lstrip("0")
+    if len(digitos) in (12, 13) and digitos.startswith("55"):
+        digitos = digitos[2:]
+    return digitos
+
+
+def palavras(valor):
+    return PALAVRA.findall(normalizar_texto(valor))
+
+
+def distancia_edicao(a, b, limite):
+    """Distância de edição entre a e b (troca de letras vizinhas conta como um erro).
+
+    Devolve limite + 1 assim que a distância passar do limite.
+    """
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    antepenultima = None
+    anterior = list(range(len(b) + 1))
+    for i, caractere_a in enumerate(a, 1):
+        atual = [i]
+        for j, caractere_b in enumerate(b, 1):
+            custo = min(
+                anterior[j] + 1,
+                atual[j - 1] + 1,
+                anterior[j - 1] + (caractere_a != caractere_b),
+            )
+            if antepenultima and i > 1 and j > 1 and caractere_a == b[j - 2] and a[i - 2] == caractere_b:
+                custo = min(custo, antepenultima[j - 2] + 1)
+            atual.append(custo)
+        if min(atual) > limite:
+            return limite + 1
+        antepenultima, anterior = anterior, atual
+    return anterior[-1]
+
+
+def tolerancia(termo):
+    """Erros de digitação aceitos para um termo, pelo seu tamanho (números só casam exatos)."""
+    if len(termo) < 4 or any(caractere.isdigit() for caractere in termo):
+        return 0
+    return 1 if len(termo) <= 7 else 2
+
+
+def _trigramas(token):
+    token = f"  {token} "
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def tokens_cliente(cliente):
+    """Termos indexados de um cliente (nome, email, contato, cidade e cep normalizados)."""
+    tokens = set(palavras(cliente.get("nome"))) | set(palavras(cliente.get("cidade")))
+
+    email = normalizar_texto(cliente.get("email"))
+    if email:
+        tokens.add(email)
+        tokens.update(palavras(email))
+
+    telefone = normalizar_telefone(cliente.get("contato"))
+    if len(telefone) >= 4:
+        tokens.add(telefone)
+        if len(telefone) in (10, 11):
+            tokens.add(telefone[2:])  # sem o DDD
+    tokens.update(palavra for palavra in palavras(cliente.get("contato")) if not palavra.isdigit())
+
+    # CEP sem zeros à esquerda, como os termos numéricos da consulta (ver termos_consulta)
+    cep = re.sub(r"\D", "", str(cliente.get("cep") or "")).lstrip("0")
+    if cep:
+        tokens.add(cep)
+    return tokens
+
+
+def termos_consulta(consulta):
+    """Termos de uma consulta; telefones formatados viram um único termo só com dígitos."""
+    consulta = str(consulta or "").strip()
+    if SO_TELEFONE.fullmatch(consulta) and len(re.sub(r"\D", "", consulta)) >= 4:
+        return [normalizar_telefone(consulta)]
+    return palavras(consulta)
+
+
+class IndiceClientes:
+    """Índice invertido em memória dos clientes de um usuário.
+
+    Casa termos exatos, por prefixo e com erros de digitação (via trigramas e
+    distância de edição). Atualizado incrementalmente a cada cadastro ou edição.
+    """
+
+    def __init__(self, clientes=()):
+        self._clientes = {}  # client__c -> linha
+        self._tokens_por_cliente = {}  # client__c -> {tokens}
+        self._nomes = {}  # client__c -> nome normalizado (desempate da ordenação)
+        self._por_endereco = {}  # endereço normalizado -> {client__c} (detecção de duplicados)
+        self._clientes_por_token = {}  # token -> {client__c}
+        self._vocabulario = []  # tokens em ordem, para busca por prefixo
+        self._trigramas = {}  # trigrama -> {tokens}
+        self._lock = threading.RLock()
+        self.geracao = None
+        self.criado_em = time.monotonic()
+        with self._lock:
+            # Carga inicial: o vocabulário é ordenado uma vez só no final
+            for cliente in clientes:
+                self._incluir(cliente, ordenar=False)
+            self._vocabulario = sorted(self._clientes_por_token)
+
+    def __len__(self):
+        return len(self._clientes)
+
+    def adicionar(self, cliente):
+        """Inclui o cliente, ou atualiza os campos informados se ele já estiver no índice."""
+        with self._lock:
+            self._incluir(cliente, ordenar=True)
+
+    def _incluir(self, cliente, ordenar):
+        chave = cliente.get("client__c")
+        if chave is None:
+            return
+        linha = {**self._clientes.get(chave, {}), **cliente}
+        self._remover_tokens(chave)
+        self._clientes[chave] = linha
+        self._nomes[chave] = normalizar_texto(linha.get("nome"))
+        endereco = " ".join(palavras(linha.get("endereco")))
+        if endereco:
+            self._por_endereco.setdefault(endereco, set()).add(chave)
+        tokens = tokens_cliente(linha)
+        self._tokens_por_cliente[chave] = tokens
+        for token in tokens:
+            ids = self._clientes_por_token.get(token)
+            if ids is None:
+                ids = self._clientes_por_token[token] = set()
+                if ordenar:
+                    bisect.insort(self._vocabulario, token)
+                if tolerancia(token):
+                    for trigrama in _trigramas(token):
+                        self._trigramas.setdefault(trigrama, set()).add(token)
+            ids.add(chave)
+
+    def remover(self, chave):
+        with self._lock:
+            self._remover_tokens(chave)
+            self._clientes.pop(chave, None)
+            self._nomes.pop(chave, None)
+
+    def _remover_tokens(self, chave):
+        if chave in self._clientes:
+            endereco = " ".join(palavras(self._clientes[chave].get("endereco")))
+            ids = self._por_endereco.get(endereco)
+            if ids is not None:
+                ids.discard(chave)
+                if not ids:
+                    del self._por_endereco[endereco]
+        for token in self._tokens_por_cliente.pop(chave, ()):
+            ids = self._clientes_por_token[token]
+            ids.discard(chave)
+            if not ids:
+                del self._clientes_por_token[token]
+                posicao = bisect.bisect_left(self._vocabulario, token)
+                if posicao < len(self._vocabulario) and self._vocabulario[posicao] == token:
+                    del self._vocabulario[posicao]
+                for trigrama in (_trigramas(token) if tolerancia(token) else ()):
+                    tokens = self._trigramas[trigrama]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigramas[trigrama]
+
+    def _casar_termo(self, termo):
+        """{client__c: pontos} dos clientes que casam com um termo da consulta."""
+        pontos = {}
+
+        def marcar(token, valor):
+            for chave in self._clientes_por_token.get(token, ()):
+                if pontos.get(chave, 0) < valor:
+                    pontos[chave] = valor
+
+        # Prefixo (inclui o termo exato)
+        posicao = bisect.bisect_left(self._vocabulario, termo)
+        while posicao < len(self._vocabulario) and self._vocabulario[posicao].startswith(termo):
+            token = self._vocabulario[posicao]
+            marcar(token, PONTOS_EXATO if token == termo else PONTOS_PREFIXO)
+            posicao += 1
+
+        # Aproximado: tokens com trigramas em comum e poucos erros (no token todo ou no seu início)
+        limite = tolerancia(termo)
+        if limite:
+            # Cada erro muda no máximo 3 trigramas (mais 1 pelo fim do termo no casamento por prefixo)
+            trigramas_termo = _trigramas(termo)
+            minimo = max(1, len(trigramas_termo) - 3 * limite - 1)
+            comuns = {}
+            for trigrama in trigramas_termo:
+                for token in self._trigramas.get(trigrama, ()):
+                    comuns[token] = comuns.get(token, 0) + 1
+            for token, quantidade in comuns.items():
+                if quantidade < minimo or token.startswith(termo):
+                    continue
+                if (distancia_edicao(termo, token, limite) <= limite
+                        or distancia_edicao(termo, token[:len(termo)], limite) <= limite):
+                    marcar(token, PONTOS_APROXIMADO)
+        return pontos
+
+    def buscar(self, consulta, inicio=0, limite=None, filtros=None):
+        """Clientes que casam com todos os termos, dos mais relevantes para os menos.
+
+        `filtros` ({coluna: valor}) compara o texto dos valores, como na URL ("true").
+        `inicio` e `limite` recortam o resultado (só as linhas devolvidas são copiadas).
+        """
+        termos = termos_consulta(consulta)
+        if not termos:
+            return []
+        with self._lock:
+            resultado = None
+            for termo in termos:
+                pontos = self._casar_termo(termo)
+                if resultado is None:
+                    resultado = pontos
+                else:
+                    resultado = {chave: resultado[chave] + valor for chave, valor in pontos.items() if chave in resultado}
+                if not resultado:
+                    return []
+            for coluna, valor in (filtros or {}).items():
+                resultado = {
+                    chave: pontos for chave, pontos in resultado.items()
+                    if str(self._clientes[chave].get(coluna)).lower() == str(valor).lower()
+                }
+            ordenados = sorted(
+                resultado.items(),
+                key=lambda item: (-item[1], self._nomes[item[0]], str(item[0])),
+            )
+            fim = None if limite is None else inicio + limite
+            return [dict(self._clientes[chave]) for chave, _ in ordenados[inicio:fim]]
+
+    def duplicados_provaveis(self, cliente):
+        """Clientes já indexados que provavelmente são a mesma pessoa.
+
+        Conta como duplicado um nome parecido com o mesmo email, telefone ou
+        endereço, ou então o mesmo email e telefone juntos. Retorna [(cliente, motivos)].
+        """
+        nome = " ".join(palavras(cliente.get("nome")))
+        email = normalizar_texto(cliente.get("email"))
+        telefone = normalizar_telefone(cliente.get("contato"))
+        endereco = " ".join(palavras(cliente.get("endereco")))
+
+        with self._lock:
+            candidatos = set()
+            if email:
+                candidatos.update(self._clientes_por_token.get(email, ()))
+            if len(telefone) >= 8:
+                candidatos.update(self._clientes_por_token.get(telefone, ()))
+            if endereco:
+                candidatos.update(self._por_endereco.get(endereco, ()))
+
+            duplicados = []
+            for chave in candidatos:
+                existente = self._clientes[chave]
+                motivos = []
+                if email and normalizar_texto(existente.get("email")) == email:
+                    motivos.append("email")
+                if len(telefone) >= 8 and normalizar_telefone(existente.get("contato")) == telefone:
+                    motivos.append("contato")
+                if endereco and " ".join(palavras(existente.get("endereco"))) == endereco:
+                    motivos.append("endereco")
+
+                nome_existente = " ".join(palavras(existente.get("nome")))
+                nome_parecido = bool(nome) and distancia_edicao(nome, nome_existente, tolerancia(nome)) <= tolerancia(nome)
+                if (nome_parecido and motivos) or {"email", "contato"} <= set(motivos):
+                    duplicados.append((dict(existente), (["nome"] if nome_parecido else []) + motivos))
+            return duplicados
+
+
+_indices = OrderedDict()  # user_id -> IndiceClientes
+_lock = threading.Lock()
+
+
+def obter_indice(supabase, user_id):
+    """Índice de clientes do usuário, montado no primeiro uso e mantido por `registrar_alteracao`.
+
+    É refeito quando os clientes mudam por outro caminho (geração do cache
+    diferente) ou após CLIENT_INDEX_TTL_SECONDS, para pegar escritas de outros processos.
+    """
+    # Fora da trava: a geração pode consultar as versões compartilhadas no banco
+    geracao = cache_dados.geracao("clientes", user_id)
+    with _lock:
+        indice = _indices.get(user_id)
+        if (indice is not None
+                and indice.geracao == geracao
+                and time.monotonic() - indice.criado_em < INDICE_TTL_SEGUNDOS):
+            _indices.move_to_end(user_id)
+            return indice
+
+    clientes = buscar_todas(lambda: supabase.table("clientes")
+                            .select(COLUNAS_INDICE)
+                            .eq("user_id", user_id)
+                            .order("id"))
+    indice = IndiceClientes(clientes)
+    indice.geracao = geracao
+
+    with _lock:
+        _indices[user_id] = indice
+        _indices.move_to_end(user_id)
+        while len(_indices) > INDICE_MAX_USUARIOS:
+            _indices.popitem(last=False)
+    return indice
+
+
+def registrar_alteracao(user_id, clientes=()):
+    """Invalida o cache de clientes do usuário e aplica as linhas gravadas ao índice.
+
+    `clientes` são linhas inseridas ou editadas (com `client__c`; numa edição
+    bastam os campos alterados). Deve ser chamada após toda escrita em clientes.
+    """
+    # Fora da trava: invalidar publica a nova versão no banco; dentro dela, só o índice em memória
+    antes = cache_dados.geracao("clientes", user_id)
+    cache_dados.invalidar("clientes", user_id)
+    depois = cache_dados.geracao("clientes", user_id)
+    with _lock:
+        indice = _indices.get(user_id)
+        if indice is None:
+            return
+        if indice.geracao != antes or depois != antes + 1:
+            # O índice já estava desatualizado (ou outra escrita veio junto): será refeito no próximo uso
+            del _indices[user_id]
+            return
+        for cliente in clientes:
+            indice.adicionar(cliente)
+        indice.geracao = depois
+
+
+def buscar_clientes(supabase, user_id, consulta, cursor=None, tamanho_pagina=TAMANHO_PAGINA_PADRAO, filtros=None):
+    """Uma página do resultado da busca. O cursor é a posição do próximo resultado."""
+    try:
+        inicio = max(0, int(cursor or 0))
+    except ValueError:
+        inicio = 0
+    try:
+        # Uma linha a mais indica se há próxima página
+        linhas = obter_indice(supabase, user_id).buscar(consulta, inicio, tamanho_pagina + 1, filtros)
+    except Exception as e:
+        print(f"Erro ao buscar clientes: {e}")
+        return {"linhas": [], "proximo_cursor": None}
+    proximo_cursor = None
+    if len(linhas) > tamanho_pagina:
+        linhas = linhas[:tamanho_pagina]
+        proximo_cursor = str(inicio + tamanho_pagina)
+    return {"linhas": linhas, "proximo_cursor": proximo_cursor}
@@ -0,0 +1,270 @@
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Configuração padrão do cache (pode ser ajustada por variável de ambiente)
+CACHE_TTL_SEGUNDOS = float(os.getenv("CACHE_TTL_SECONDS", 60))
+CACHE_MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRIES", 512))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Versões dos dados compartilhadas entre os processos (sql/009_cache_versoes.sql): uma escrita
+# feita num worker do gunicorn invalida o cache dos demais já na requisição seguinte
+CACHE_VERSOES_COMPARTILHADAS = os.getenv("CACHE_SHARED_VERSIONS", "true").lower() in ("1", "true", "sim")
+# Após um erro ao ler ou gravar as versões, espera esse tempo antes de tentar de novo
+CACHE_VERSOES_PAUSA_ERRO_SEGUNDOS = float(os.getenv("CACHE_SHARED_VERSIONS_RETRY_SECONDS", 30))
+
+
+def estimar_tamanho(valor):
+    """Estimativa barata (em bytes) do espaço ocupado por um valor em cache.
+
+    Para listas de registros mede só a primeira linha e multiplica pelo total.
+    """
+    if isinstance(valor, list):
+        if not valor:
+            return sys.getsizeof(valor)
+        primeira = valor[0]
+        if isinstance(primeira, dict):
+            tamanho_linha = sys.getsizeof(primeira) + sum(
+                sys.getsizeof(chave) + sys.getsizeof(item) for chave, item in primeira.items()
+            )
+        else:
+            tamanho_linha = sys.getsizeof(primeira)
+        return sys.getsizeof(valor) + tamanho_linha * len(valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(estimar_tamanho(item) for item in valor.values())
+    return sys.getsizeof(valor)
+
+
+# Usuário da requisição atual cujas versões ainda não foram sincronizadas (lista com 0 ou 1 user_id)
+_sincronizacao_pendente = contextvars.ContextVar("sincronizacao_pendente_cache", default=None)
+
+
+class VersoesSupabase:
+    """Versões dos dados na tabela `cache_versoes` do Supabase (sql/009_cache_versoes.sql)."""
+
+    def publicar(self, tabelas, user_id):
+        """Incrementa as versões das tabelas do usuário (uma chamada). Retorna {tabela: nova versão}."""
+        from services.supabase_client import obter_supabase
+
+        linhas = obter_supabase().rpc("incrementar_versoes_cache", {"p_user_id": user_id, "p_tabelas": list(tabelas)}) \
+            .execute().data or []
+        return {linha["tabela"]: linha["versao"] for linha in linhas}
+
+    def ler(self, user_id):
+        """{tabela: versão} de todas as tabelas do usuário (uma consulta pela chave primária)."""
+        from services.supabase_client import obter_supabase
+
+        linhas = obter_supabase().table("cache_versoes").select("tabela,versao").eq("user_id", user_id) \
+            .execute().data or []
+        return {linha["tabela"]: linha["versao"] for linha in linhas}
+
+
+class CacheDados:
+    """Cache em memória com TTL, despejo LRU e limite de memória.
+
+    As entradas são identificadas por (tabela, user_id, formato da consulta) e
+    podem ser invalidadas de uma só vez por (tabela, user_id) após escritas.
+    Com `versoes` (ver VersoesSupabase), cada invalidação é publicada para os
+    outros processos, que a aplicam ao chamar `sincronizar(user_id)`.
+    """
+
+    def __init__(self, ttl=CACHE_TTL_SEGUNDOS, max_entradas=CACHE_MAX_ENTRADAS, max_bytes=CACHE_MAX_BYTES,
+                 versoes=None):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.versoes = versoes
+        self._entradas = OrderedDict()  # chave -> (expira_em, tamanho, valor)
+        self._chaves_por_grupo = {}  # (tabela, user_id) -> {chaves}
+        self._geracoes = {}  # (tabela, user_id) -> contador de invalidações
+        self._versoes_vistas = {}  # (tabela, user_id) -> última versão compartilhada aplicada neste processo
+        self._versoes_pausadas_ate = 0.0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.despejos = 0
+        self.invalidacoes = 0
+
+    def geracao(self, tabela, user_id):
+        """Versão atual dos dados de (tabela, user_id); muda a cada invalidação."""
+        self._sincronizar_se_pendente()
+        with self._lock:
+            return self._geracoes.get((tabela, user_id), 0)
+
+    def versoes_globais(self, tabelas, user_id):
+        """Versões compartilhadas das tabelas do usuário (as mesmas em todos os processos), ou None sem elas.
+
+        `geracao` conta as invalidações deste processo e recomeça a cada reinício;
+        estas servem de validador entre processos (ETags, ver routes/utils.py).
+        """
+        self._sincronizar_se_pendente()
+        if self.versoes is None or not self._versoes_disponiveis():
+            return None
+        with self._lock:
+            return tuple(self._versoes_vistas.get((tabela, user_id), 0) for tabela in tabelas)
+
+    def obter(self, tabela, user_id, formato):
+        """Retorna (encontrado, valor) para a consulta informada."""
+        self._sincronizar_se_pendente()
+        chave = (tabela, user_id, formato)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.misses += 1
+                return False, None
+            expira_em, _, valor = entrada
+            if expira_em < time.monotonic():
+                self._remover(chave)
+                self.misses += 1
+                return False, None
+            self._entradas.move_to_end(chave)
+            self.hits += 1
+            return True, valor
+
+    def guardar(self, tabela, user_id, formato, valor, geracao=None):
+        """Armazena o resultado de uma consulta.
+
+        Se `geracao` for informada e os dados tiverem sido invalidados desde então,
+        o valor (possivelmente desatualizado) é descartado.
+        """
+        chave = (tabela, user_id, formato)
+        tamanho = estimar_tamanho(valor)
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            if geracao is not None and geracao != self._geracoes.get((tabela, user_id), 0):
+                return
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = (time.monotonic() + self.ttl, tamanho, valor)
+            self._chaves_por_grupo.setdefault((tabela, user_id), set()).add(chave)
+            self._bytes += tamanho
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                chave_antiga = next(iter(self._entradas))
+                self._remover(chave_antiga)
+                self.despejos += 1
+
+    def invalidar(self, tabela, user_id):
+        """Remove todas as consultas em cache de (tabela, user_id), neste e (com `versoes`) nos outros processos."""
+        self.invalidar_tabelas((tabela,), user_id)
+
+    def invalidar_tabelas(self, tabelas, user_id):
+        """Como `invalidar`, para várias tabelas escritas juntas (publicadas numa única chamada)."""
+        with self._lock:
+            for tabela in tabelas:
+                self._invalidar_grupo((tabela, user_id))
+        if self.versoes is None or not self._versoes_disponiveis():
+            return
+        try:
+            versoes = self.versoes.publicar(tabelas, user_id)
+        except Exception as e:
+            # Os outros processos veem a escrita só quando as entradas deles expirarem (ttl)
+            self._pausar_versoes(f"Erro ao publicar as versões do cache de {', '.join(tabelas)}: {e}")
+            return
+        with self._lock:
+            for tabela, versao in versoes.items():
+                self._versoes_vistas[(tabela, user_id)] = versao
+
+    def sincronizar(self, user_id):
+        """Aplica as invalidações do usuário publicadas por outros processos.
+
+        Chamado uma vez por requisição, na primeira consulta ao cache (ver `configurar_versoes_cache`).
+        """
+        if self.versoes is None or not self._versoes_disponiveis():
+            return
+        try:
+            versoes = self.versoes.ler(user_id)
+        except Exception as e:
+            self._pausar_versoes(f"Erro ao ler as versões do cache: {e}")
+            return
+        with self._lock:
+            for tabela, versao in versoes.items():
+                grupo = (tabela, user_id)
+                # Versão ainda não vista por este processo (inclusive a primeira): o que está em cache pode ser anterior
+                if self._versoes_vistas.get(grupo) != versao:
+                    self._versoes_vistas[grupo] = versao
+                    self._invalidar_grupo(grupo)
+
+    def _sincronizar_se_pendente(self):
+        # A lista é compartilhada com as threads de `buscar_em_paralelo` (contexto copiado): só uma sincroniza
+        pendente = _sincronizacao_pendente.get()
+        if pendente:
+            try:
+                user_id = pendente.pop()
+            except IndexError:
+                return
+            self.sincronizar(user_id)
+
+    def _versoes_disponiveis(self):
+        return time.monotonic() >= self._versoes_pausadas_ate
+
+    def _pausar_versoes(self, mensagem):
+        print(mensagem)
+        self._versoes_pausadas_ate = time.monotonic() + CACHE_VERSOES_PAUSA_ERRO_SEGUNDOS
+
+    def _invalidar_grupo(self, grupo):
+        # Chamado com `_lock`
+        self._geracoes[grupo] = self._geracoes.get(grupo, 0) + 1
+        for chave in list(self._chaves_por_grupo.get(grupo, ())):
+            self._remover(chave)
+        self.invalidacoes += 1
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._chaves_por_grupo.clear()
+            self._versoes_vistas.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / consultas, 4) if consultas else 0.0,
+                "despejos": self.despejos,
+                "invalidacoes": self.invalidacoes,
+                "entradas": len(self._entradas),
+                "bytes_estimados": self._bytes,
+                "max_entradas": self.max_entradas,
+                "max_bytes": self.max_bytes,
+                "ttl_segundos": self.ttl,
+            }
+
+    def _remover(self, chave):
+        _, tamanho, _ = self._entradas.pop(chave)
+        self._bytes -= tamanho
+        grupo = self._chaves_por_grupo.get(chave[:2])
+        if grupo is not None:
+            grupo.discard(chave)
+            if not grupo:
+                del self._chaves_por_grupo[chave[:2]]
+
+
+# Instância compartilhada pelo processo
+cache_dados = CacheDados(versoes=VersoesSupabase() if CACHE_VERSOES_COMPARTILHADAS else None)
+
+
+def configurar_versoes_cache(app):
+    """Sincroniza as versões do cache do usuário uma vez por requisição (ver `CacheDados.sincronizar`).
+
+    A consulta às versões só é feita se a requisição usar o cache, na primeira consulta a ele:
+    rotas que não leem dados em cache (ex.: o progresso das tarefas) não pagam a chamada.
+    """
+    from flask import g, request, session
+
+    @app.before_request
+    def marcar_sincronizacao():
+        user_id = session.get("user_id")
+        if user_id and request.endpoint != "static":
+            g.token_sincronizacao_cache = _sincronizacao_pendente.set([user_id])
+
+    @app.teardown_request
+    def encerrar_sincronizacao(erro=None):
+        token = g.pop("token_sincronizacao_cache", None)
+        if token is not None:
+            _sincronizacao_pendente.reset(token)
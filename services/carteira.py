@@ -0,0 +1,81 @@
+import json
+
+from services.cache_dados import cache_dados, estimar_tamanho
+from services.filtros import STATUS_INVESTIMENTO, aplicar_filtros
+
+
+def _historico_legado(investimento):
+    """Pagamentos gravados no JSON antigo historico_pagamentos (antes do livro de pagamentos)."""
+    historico = investimento.get("historico_pagamentos") or []
+    if isinstance(historico, str):
+        try:
+            historico = json.loads(historico)
+        except ValueError:
+            return []
+    return historico if isinstance(historico, list) else []
+
+
+def _com_valores_derivados(investimento):
+    """Cópia do investimento com os valores pago e restante já calculados."""
+    investimento = dict(investimento)
+    historico = _historico_legado(investimento)
+    investimento["historico_pagamentos"] = historico
+
+    pagamentos = investimento.get("pagamentos") or 0
+    duracao = investimento.get("duracao") or 0
+    valor = investimento.get("valor") or 0
+
+    # total_pago vem do livro de pagamentos; sem ele (base não migrada), soma o JSON antigo
+    total_pago = investimento.get("total_pago")
+    if total_pago is None:
+        total_pago = sum(float(pagamento.get("valor") or 0) for pagamento in historico if isinstance(pagamento, dict))
+    investimento["total_pago"] = round(float(total_pago), 2)
+    investimento["restante"] = round(max(0, (duracao - pagamentos) * valor), 2)
+    return investimento
+
+
+class Carteira:
+    """Investimentos de um usuário, já separados e indexados para as telas.
+
+    Montada uma vez por versão dos dados (ver `obter_carteira`) e compartilhada
+    entre requisições: as rotas só leem, não alteram as listas.
+    """
+
+    def __init__(self, investimentos):
+        self.investimentos = [_com_valores_derivados(investimento) for investimento in investimentos]
+        self.por_id = {str(investimento["investimento__c"]): investimento for investimento in self.investimentos}
+        self.ativos = [investimento for investimento in self.investimentos if not investimento.get("encerrado")]
+        self.encerrados = [investimento for investimento in self.investimentos if investimento.get("encerrado")]
+        self.total_pago = round(sum(investimento["total_pago"] for investimento in self.investimentos), 2)
+        self.total_restante = round(sum(investimento["restante"] for investimento in self.ativos), 2)
+
+    def obter(self, investimento_id):
+        """Investimento pelo `investimento__c` (ou None)."""
+        if investimento_id is None:
+            return None
+        return self.por_id.get(str(investimento_id))
+
+    def __sizeof__(self):
+        # Usado pelo limite de memória do cache
+        return object.__sizeof__(self) + estimar_tamanho(self.investimentos)
+
+
+def obter_carteira(supabase, user_id, status="todos"):
+    """Carteira do usuário, em cache até a próxima escrita em `investimento`.
+
+    `status` ("todos", "ativos" ou "encerrados", ver services/filtros.py) é filtrado no banco.
+    """
+    formato = ("carteira", status)
+    encontrado, carteira = cache_dados.obter("investimento", user_id, formato)
+    if not encontrado:
+        geracao = cache_dados.geracao("investimento", user_id)
+        filtro = STATUS_INVESTIMENTO[status]
+        try:
+            query = supabase.table("investimento").select("*").eq("user_id", user_id)
+            investimentos = aplicar_filtros(query, [filtro] if filtro else []).execute().data or []
+        except Exception as e:
+            print(f"Erro ao buscar investimento: {e}")
+            return Carteira([])
+        carteira = Carteira(investimentos)
+        cache_dados.guardar("investimento", user_id, formato, carteira, geracao=geracao)
+    return carteira
@@ -0,0 +1,39 @@
+from services.cache_dados import cache_dados, estimar_tamanho
+
+
+class CatalogoProdutos:
+    """Produtos de um usuário indexados por id e por nome (para resolver preços no cadastro de vendas)."""
+
+    def __init__(self, produtos):
+        self.produtos = [dict(produto) for produto in produtos]
+        self.por_id = {str(produto["id"]): produto for produto in self.produtos if produto.get("id") is not None}
+        self.por_nome = {}
+        for produto in self.produtos:
+            nome = str(produto.get("nome") or "").strip()
+            self.por_nome.setdefault(nome, produto)
+            self.por_nome.setdefault(nome.casefold(), produto)
+
+    def obter(self, chave):
+        """Produto pelo id ou pelo nome (exato ou sem diferenciar maiúsculas), ou None."""
+        chave = str(chave or "").strip()
+        return self.por_id.get(chave) or self.por_nome.get(chave) or self.por_nome.get(chave.casefold())
+
+    def __sizeof__(self):
+        # Usado pelo limite de memória do cache
+        return object.__sizeof__(self) + estimar_tamanho(self.produtos)
+
+
+def obter_catalogo(supabase, user_id):
+    """Catálogo de produtos do usuário, em cache até a próxima escrita em `produtos`."""
+    formato = ("catalogo",)
+    encontrado, catalogo = cache_dados.obter("produtos", user_id, formato)
+    if not encontrado:
+        geracao = cache_dados.geracao("produtos", user_id)
+        try:
+            produtos = supabase.table("produtos").select("id,nome,preco").eq("user_id", user_id).execute().data or []
+        except Exception as e:
+            print(f"Erro ao buscar produtos: {e}")
+            return CatalogoProdutos([])
+        catalogo = CatalogoProdutos(produtos)
+        cache_dados.guardar("produtos", user_id, formato, catalogo, geracao=geracao)
+    return catalogo
@@ -0,0 +1,106 @@
+import os
+from datetime import datetime
+
+from services.busca_clientes import registrar_alteracao
+from services.validacao import is_valid_email
+
+# Campos que podem ser alterados pelo gerenciador de clientes (um a um ou em lote)
+CAMPOS_EDITAVEIS = ("nome", "contato", "endereco", "bairro", "cidade", "estado", "cep", "genero", "email",
+                    "data_nascimento", "ativo")
+
+# Limite de clientes por operação em lote
+MAX_CLIENTES_LOTE = int(os.getenv("CLIENT_BATCH_MAX_ITEMS", 1000))
+
+
+def _booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    return str(valor).strip().lower() in ("true", "on", "1", "sim")
+
+
+def validar_campos(campos):
+    """Normaliza os campos de uma edição. Retorna (campos, None) ou (None, mensagem de erro)."""
+    if not isinstance(campos, dict) or not campos:
+        return None, "Informe os campos a alterar"
+    desconhecidos = [campo for campo in campos if campo not in CAMPOS_EDITAVEIS]
+    if desconhecidos:
+        return None, f"Campos não editáveis: {', '.join(sorted(desconhecidos))}"
+
+    normalizados = {}
+    for campo, valor in campos.items():
+        if campo == "ativo":
+            normalizados[campo] = _booleano(valor)
+        elif campo == "data_nascimento":
+            valor = str(valor or "").strip()
+            if valor:
+                try:
+                    datetime.strptime(valor, "%Y-%m-%d")
+                except ValueError:
+                    return None, "Data de nascimento inválida (use AAAA-MM-DD)"
+            normalizados[campo] = valor or None
+        else:
+            normalizados[campo] = "" if valor is None else str(valor).strip()
+    # Email vazio apaga o campo; preenchido, segue a mesma regra do cadastro
+    if normalizados.get("email") and not is_valid_email(normalizados["email"]):
+        return None, "Email inválido"
+    if "nome" in normalizados and not normalizados["nome"]:
+        return None, "O nome não pode ficar vazio"
+    return normalizados, None
+
+
+def validar_ids(ids):
+    """Lista de `client__c` sem repetições. Retorna (ids, None) ou (None, mensagem de erro)."""
+    if not isinstance(ids, list) or not ids:
+        return None, "Informe a lista de clientes"
+    ids = list(dict.fromkeys(str(cliente_id) for cliente_id in ids if cliente_id not in (None, "")))
+    if not ids:
+        return None, "Informe a lista de clientes"
+    if len(ids) > MAX_CLIENTES_LOTE:
+        return None, f"Máximo de {MAX_CLIENTES_LOTE} clientes por operação"
+    return ids, None
+
+
+def _patch(linha):
+    """Só o que a página precisa para atualizar a linha no lugar."""
+    return {campo: linha.get(campo) for campo in ("client__c",) + CAMPOS_EDITAVEIS}
+
+
+def _gravar(supabase, user_id, ids, campos):
+    """Uma atualização filtrada (sem invalidar o cache). Retorna as linhas alteradas."""
+    return supabase.table("clientes") \
+        .update(campos) \
+        .eq("user_id", user_id) \
+        .in_("client__c", ids) \
+        .execute().data or []
+
+
+def atualizar_clientes(supabase, user_id, ids, campos):
+    """Aplica os mesmos valores a vários clientes numa única atualização filtrada.
+
+    Retorna as linhas alteradas (só os campos editáveis), que servem de patch para a página.
+    """
+    linhas = _gravar(supabase, user_id, ids, campos)
+    registrar_alteracao(user_id, linhas)
+    return [_patch(linha) for linha in linhas]
+
+
+def editar_clientes(supabase, user_id, edicoes):
+    """Edições com valores diferentes por cliente ([{"client__c", campos...}], já validadas).
+
+    Clientes com exatamente as mesmas alterações são atualizados juntos: uma escrita por grupo,
+    e o cache e o índice de busca são atualizados uma vez, no fim.
+    """
+    grupos = {}
+    for edicao in edicoes:
+        campos = {campo: valor for campo, valor in edicao.items() if campo != "client__c"}
+        chave = tuple(sorted(campos.items(), key=lambda item: item[0]))
+        grupos.setdefault(chave, []).append(str(edicao["client__c"]))
+
+    linhas = []
+    try:
+        for campos, ids in grupos.items():
+            linhas.extend(_gravar(supabase, user_id, ids, dict(campos)))
+    finally:
+        # Inclusive se um grupo falhar: os anteriores já foram gravados
+        registrar_alteracao(user_id, linhas)
+    return [_patch(linha) for linha in linhas]
@@ -0,0 +1,55 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Número máximo de consultas simultâneas por processo
+MAX_CONSULTAS_PARALELAS = int(os.getenv("SUPABASE_MAX_PARALLEL_QUERIES", 8))
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def _obter_executor():
+    """Pool de threads do processo atual (recriado após um fork)."""
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=MAX_CONSULTAS_PARALELAS, thread_name_prefix="consulta")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _executar(nome, consulta):
+    inicio = time.perf_counter()
+    try:
+        resultado = consulta()
+    except Exception as e:
+        print(f"Erro ao buscar {nome}: {e}")
+        resultado = []
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+
+def buscar_em_paralelo(consultas):
+    """Executa consultas independentes ao mesmo tempo.
+
+    `consultas` é um dict {nome: função sem argumentos}. Retorna dois dicts:
+    os resultados por nome e o tempo de cada consulta em milissegundos.
+    Assim como em `obter_dados_tabela`, uma consulta com erro devolve [].
+    """
+    if len(consultas) <= 1:
+        execucoes = {nome: _executar(nome, consulta) for nome, consulta in consultas.items()}
+    else:
+        executor = _obter_executor()
+        # Cada consulta roda com o contexto da requisição (as métricas contam as chamadas feitas nas threads)
+        futuros = {
+            nome: executor.submit(contextvars.copy_context().run, _executar, nome, consulta)
+            for nome, consulta in consultas.items()
+        }
+        execucoes = {nome: futuro.result() for nome, futuro in futuros.items()}
+
+    resultados = {nome: resultado for nome, (resultado, _) in execucoes.items()}
+    tempos = {nome: round(tempo, 2) for nome, (_, tempo) in execucoes.items()}
+    return resultados, tempos
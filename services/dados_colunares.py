@@ -0,0 +1,249 @@
+"""Vendas e clientes de um usuário em colunas (arrays numpy) em vez de listas de dicts.
+
+Cada coluna é um array tipado: `valor` em float64, `quantidade` em int32,
+`data_venda` em datetime64[D] e `ativo` em bool; `cliente`, `vendedor` e
+`pagamento` são codificados em dicionário (códigos int32 + a lista de
+valores distintos, -1 para vazio). As agregações usam os arrays
+diretamente, e as linhas (`LinhaColunar`) só são criadas ao serem lidas,
+por exemplo pelo template que as renderiza.
+"""
+from collections.abc import Mapping
+
+from services.cache_dados import cache_dados
+from services.filtros import aplicar_filtros, montar_filtros
+from services.paginacao import iterar_lotes
+
+# numpy/pandas são importados dentro das funções, para não pesar na inicialização da aplicação
+
+# coluna -> tipo ("real", "inteiro", "inteiro64", "data", "booleano", "categoria", "texto" ou "chave",
+# um texto sempre convertido para str, para comparar ids vindos do banco e de formulários)
+TIPOS_VENDAS = {
+    "id": "inteiro64",
+    "cliente_id": "categoria",
+    "cliente": "categoria",
+    "vendedor": "categoria",
+    "pagamento": "categoria",
+    "data_venda": "data",
+    "valor": "real",
+    "quantidade": "inteiro",
+}
+TIPOS_CLIENTES = {"client__c": "chave", "nome": "texto", "ativo": "booleano"}
+
+
+def _converter_lote(valores, tipo, categorias):
+    """Array numpy de uma coluna de um lote. `categorias` (valor -> código) é compartilhado entre lotes."""
+    import numpy as np
+    import pandas as pd
+
+    if tipo == "categoria":
+        # -1 para vazio; os códigos seguem a ordem em que os valores aparecem
+        return np.fromiter(
+            (-1 if valor is None else categorias.setdefault(valor, len(categorias)) for valor in valores),
+            dtype=np.int32, count=len(valores))
+    if tipo in ("texto", "chave"):
+        array = np.empty(len(valores), dtype=object)
+        array[:] = valores if tipo == "texto" else [None if valor is None else str(valor) for valor in valores]
+        return array
+    if tipo == "booleano":
+        return np.fromiter((bool(valor) for valor in valores), dtype=bool, count=len(valores))
+    if tipo == "data":
+        datas = pd.to_datetime(pd.Series(valores, dtype=object), errors="coerce", format="ISO8601")
+        return datas.to_numpy(dtype="datetime64[D]")
+    numeros = pd.to_numeric(pd.Series(valores, dtype=object), errors="coerce")
+    if tipo == "real":
+        return numeros.to_numpy(dtype=np.float64, na_value=np.nan)
+    return numeros.fillna(0).to_numpy(dtype=np.int64 if tipo == "inteiro64" else np.int32)
+
+
+class LinhaColunar(Mapping):
+    """Visão de uma linha da tabela, lida das colunas só quando acessada (compatível com `linha['campo']`)."""
+
+    __slots__ = ("_tabela", "_indice")
+
+    def __init__(self, tabela, indice):
+        self._tabela = tabela
+        self._indice = indice
+
+    def __getitem__(self, campo):
+        return self._tabela.valor(campo, self._indice)
+
+    def __iter__(self):
+        return iter(self._tabela.tipos)
+
+    def __len__(self):
+        return len(self._tabela.tipos)
+
+    def __repr__(self):
+        return f"LinhaColunar({dict(self)!r})"
+
+
+class TabelaColunar:
+    """Colunas tipadas de uma tabela (somente leitura, pode ser compartilhada pelo cache)."""
+
+    def __init__(self, tipos, colunas, categorias=None):
+        self.tipos = dict(tipos)
+        self._colunas = colunas  # nome -> array (códigos, para as categorias)
+        self._categorias = categorias or {}  # nome -> array com os valores distintos
+        self._tamanho = len(next(iter(colunas.values()))) if colunas else 0
+        self._posicoes = {}  # coluna -> {valor: posição}, montado na primeira consulta
+        for array in colunas.values():
+            array.flags.writeable = False
+
+    @classmethod
+    def de_lotes(cls, lotes, tipos):
+        """Monta a tabela a partir de lotes de linhas (dicts), convertendo um lote por vez."""
+        import numpy as np
+
+        partes = {nome: [] for nome in tipos}
+        codigos = {nome: {} for nome, tipo in tipos.items() if tipo == "categoria"}
+        for lote in lotes:
+            for nome, tipo in tipos.items():
+                partes[nome].append(_converter_lote([linha.get(nome) for linha in lote], tipo, codigos.get(nome)))
+
+        colunas = {}
+        for nome, tipo in tipos.items():
+            if partes[nome]:
+                colunas[nome] = np.concatenate(partes[nome])
+            else:
+                colunas[nome] = _converter_lote([], tipo, codigos.get(nome))
+        categorias = {}
+        for nome, valores in codigos.items():
+            categorias[nome] = np.empty(len(valores), dtype=object)
+            categorias[nome][:] = list(valores)
+        return cls(tipos, colunas, categorias)
+
+    @classmethod
+    def de_linhas(cls, linhas, tipos):
+        return cls.de_lotes([linhas], tipos)
+
+    def __len__(self):
+        return self._tamanho
+
+    def __bool__(self):
+        return self._tamanho > 0
+
+    def __iter__(self):
+        return (LinhaColunar(self, indice) for indice in range(self._tamanho))
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [LinhaColunar(self, i) for i in range(*indice.indices(self._tamanho))]
+        if indice < 0:
+            indice += self._tamanho
+        if not 0 <= indice < self._tamanho:
+            raise IndexError(indice)
+        return LinhaColunar(self, indice)
+
+    def coluna(self, nome):
+        """Array da coluna; para categorias, os valores já decodificados (array de objetos)."""
+        if self.tipos[nome] == "categoria":
+            import numpy as np
+
+            # O código -1 (vazio) aponta para o None acrescentado no fim
+            return np.append(self._categorias[nome], None)[self._colunas[nome]]
+        return self._colunas[nome]
+
+    def codigos(self, nome):
+        """Códigos int32 de uma coluna categórica (-1 para vazio); ver `categorias`."""
+        return self._colunas[nome]
+
+    def categorias(self, nome):
+        """Valores distintos de uma coluna categórica, na posição do respectivo código."""
+        return self._categorias[nome]
+
+    def posicoes(self, nome):
+        """{valor: posição da linha} de uma coluna; valores repetidos apontam para -1 (ambíguos)."""
+        posicoes = self._posicoes.get(nome)
+        if posicoes is None:
+            posicoes = {}
+            for indice, valor in enumerate(self.coluna(nome).tolist()):
+                if valor is not None:
+                    posicoes[valor] = -1 if valor in posicoes else indice
+            self._posicoes[nome] = posicoes
+        return posicoes
+
+    def valor(self, nome, indice):
+        """Valor de uma célula convertido para o tipo Python (como viria do Supabase)."""
+        tipo = self.tipos[nome]
+        bruto = self._colunas[nome][indice]
+        if tipo in ("texto", "chave"):
+            return bruto
+        if tipo == "categoria":
+            return None if bruto < 0 else self._categorias[nome][bruto]
+        if tipo == "booleano":
+            return bool(bruto)
+        if tipo == "data":
+            # NaT é o único valor diferente de si mesmo
+            return str(bruto) if bruto == bruto else None
+        if tipo == "real":
+            return float(bruto) if bruto == bruto else None
+        return int(bruto)
+
+    def para_dataframe(self):
+        """DataFrame com as colunas (as categóricas como `category`, sem copiar os valores distintos)."""
+        import pandas as pd
+
+        dados = {}
+        for nome, tipo in self.tipos.items():
+            if tipo == "categoria":
+                dados[nome] = pd.Categorical.from_codes(self._colunas[nome], categories=self._categorias[nome])
+            else:
+                dados[nome] = self._colunas[nome]
+        return pd.DataFrame(dados)
+
+    def __sizeof__(self):
+        # Usado pelo limite de memória do cache: arrays mais os textos (objetos) que eles referenciam
+        import sys
+
+        tamanho = object.__sizeof__(self)
+        for array in list(self._colunas.values()) + list(self._categorias.values()):
+            tamanho += array.nbytes
+            if array.dtype == object:
+                tamanho += sum(sys.getsizeof(valor) for valor in array)
+        return tamanho
+
+
+def carregar_tabela_colunar(supabase, tabela, user_id, tipos, filtros=()):
+    """Lê as linhas do usuário em lotes, convertendo cada lote em colunas ao chegar.
+
+    `filtros` (ver services/filtros.py) são aplicados no banco.
+    """
+    def consulta():
+        query = supabase.table(tabela).select(",".join(tipos)).eq("user_id", user_id)
+        return aplicar_filtros(query, filtros).order("id")
+
+    return TabelaColunar.de_lotes(iterar_lotes(consulta), tipos)
+
+
+def _obter_colunar(supabase, tabela, user_id, tipos, filtros=()):
+    formato = ("colunar", tuple(tipos), filtros)
+    encontrado, dados = cache_dados.obter(tabela, user_id, formato)
+    if not encontrado:
+        geracao = cache_dados.geracao(tabela, user_id)
+        try:
+            dados = carregar_tabela_colunar(supabase, tabela, user_id, tipos, filtros)
+        except Exception as e:
+            print(f"Erro ao buscar {tabela}: {e}")
+            return TabelaColunar.de_linhas([], tipos)
+        cache_dados.guardar(tabela, user_id, formato, dados, geracao=geracao)
+    return dados
+
+
+def obter_vendas_colunar(supabase, user_id, colunas=tuple(TIPOS_VENDAS), inicio=None, fim=None):
+    """Vendas do usuário em colunas (em cache até a próxima escrita em `vendas`).
+
+    `inicio`/`fim` (datas ISO) limitam `data_venda` no banco.
+    """
+    return _obter_colunar(supabase, "vendas", user_id, {coluna: TIPOS_VENDAS[coluna] for coluna in colunas},
+                          montar_filtros(intervalo=("data_venda", inicio, fim)))
+
+
+def obter_clientes_colunar(supabase, user_id, colunas=tuple(TIPOS_CLIENTES)):
+    """Clientes do usuário em colunas (em cache até a próxima escrita em `clientes`)."""
+    return _obter_colunar(supabase, "clientes", user_id, {coluna: TIPOS_CLIENTES[coluna] for coluna in colunas})
+
+
+def clientes_colunar_em_cache(user_id, colunas=tuple(TIPOS_CLIENTES)):
+    """Clientes do usuário em colunas, se já estiverem em cache (sem consultar o banco); senão None."""
+    encontrado, dados = cache_dados.obter("clientes", user_id, ("colunar", tuple(colunas), ()))
+    return dados if encontrado else None
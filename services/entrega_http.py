@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import os
+import threading
+
+from flask import request
+from werkzeug.security import safe_join
+
+# Brotli é opcional (pacote `brotli`); sem ele, só gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Respostas menores que isso não compensam a compressão
+COMPRESSAO_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+COMPRESSAO_NIVEL_GZIP = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSAO_QUALIDADE_BROTLI = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 5))
+# Arquivos estáticos são comprimidos uma vez (nível máximo) e guardados até mudarem
+COMPRESSAO_ESTATICOS_MAX_BYTES = int(os.getenv("COMPRESSION_STATIC_MAX_BYTES", 16 * 1024 * 1024))
+
+# Validade dos arquivos estáticos pedidos com o hash do conteúdo na URL (?v=...)
+ESTATICOS_MAX_AGE = int(os.getenv("STATIC_MAX_AGE_SECONDS", 365 * 24 * 60 * 60))
+
+TIPOS_COMPRIMIVEIS = {
+    "text/html", "text/css", "text/plain", "text/csv", "text/javascript", "application/javascript",
+    "application/json", "application/xml", "image/svg+xml",
+}
+
+_lock = threading.Lock()
+_hashes = {}  # caminho -> (mtime, hash do conteúdo)
+_estaticos_comprimidos = {}  # (caminho, mtime, codificação) -> bytes
+_bytes_comprimidos = 0
+
+
+def hash_estatico(pasta, filename):
+    """Hash curto do conteúdo de um arquivo estático (recalculado só quando o arquivo muda)."""
+    caminho = safe_join(pasta, filename)
+    if caminho is None:
+        return None
+    try:
+        mtime = os.stat(caminho).st_mtime_ns
+    except OSError:
+        return None
+    encontrado = _hashes.get(caminho)
+    if encontrado and encontrado[0] == mtime:
+        return encontrado[1]
+    with open(caminho, "rb") as arquivo:
+        valor = hashlib.sha256(arquivo.read()).hexdigest()[:12]
+    with _lock:
+        _hashes[caminho] = (mtime, valor)
+    return valor
+
+
+def escolher_codificacao(accept_encodings):
+    """"br" ou "gzip", conforme o navegador aceita (e o brotli está instalado), ou None."""
+    if brotli is not None and accept_encodings["br"]:
+        return "br"
+    if accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+
+def comprimir(dados, codificacao, maximo=False):
+    if codificacao == "br":
+        return brotli.compress(dados, quality=11 if maximo else COMPRESSAO_QUALIDADE_BROTLI)
+    return gzip.compress(dados, compresslevel=9 if maximo else COMPRESSAO_NIVEL_GZIP, mtime=0)
+
+
+def _estatico_comprimido(caminho, codificacao):
+    """Conteúdo comprimido de um arquivo estático, guardado em memória por versão do arquivo."""
+    global _bytes_comprimidos
+    mtime = os.stat(caminho).st_mtime_ns
+    chave = (caminho, mtime, codificacao)
+    dados = _estaticos_comprimidos.get(chave)
+    if dados is None:
+        with open(caminho, "rb") as arquivo:
+            dados = comprimir(arquivo.read(), codificacao, maximo=True)
+        with _lock:
+            # Versões antigas do arquivo não serão mais pedidas
+            for antiga in [c for c in _estaticos_comprimidos if c[0] == caminho and c[1] != mtime]:
+                _bytes_comprimidos -= len(_estaticos_comprimidos.pop(antiga))
+            if _bytes_comprimidos + len(dados) <= COMPRESSAO_ESTATICOS_MAX_BYTES:
+                _estaticos_comprimidos[chave] = dados
+                _bytes_comprimidos += len(dados)
+    return dados
+
+
+def _corpo_comprimivel(response):
+    if response.status_code != 200 or request.method == "HEAD":
+        return False
+    if "Content-Encoding" in response.headers or response.mimetype not in TIPOS_COMPRIMIVEIS:
+        return False
+    return response.content_length is None or response.content_length >= COMPRESSAO_MIN_BYTES
+
+
+def configurar_entrega_http(app):
+    """Registra na aplicação a compressão das respostas e as URLs versionadas dos estáticos.
+
+    - `url_for('static', ...)` ganha `?v=<hash do conteúdo>`; pedidos com o hash
+      atual recebem Cache-Control imutável de longa duração.
+    - Respostas de texto (HTML, JSON, CSS, JS) acima de COMPRESSION_MIN_BYTES são
+      comprimidas com brotli ou gzip. Respostas em streaming (exportações) não
+      são tocadas, para continuarem saindo aos poucos.
+    """
+
+    @app.url_defaults
+    def versionar_estaticos(endpoint, values):
+        if endpoint == "static" and "filename" in values and "v" not in values:
+            versao = hash_estatico(app.static_folder, values["filename"])
+            if versao:
+                values["v"] = versao
+
+    @app.after_request
+    def entregar(response):
+        estatico = request.endpoint == "static"
+        if estatico and response.status_code in (200, 304):
+            filename = (request.view_args or {}).get("filename", "")
+            versao = request.args.get("v")
+            if versao and versao == hash_estatico(app.static_folder, filename):
+                response.cache_control.no_cache = None
+                response.cache_control.public = True
+                response.cache_control.max_age = ESTATICOS_MAX_AGE
+                response.cache_control.immutable = True
+
+        if not _corpo_comprimivel(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        codificacao = escolher_codificacao(request.accept_encodings)
+        if codificacao is None:
+            return response
+
+        if estatico:
+            caminho = safe_join(app.static_folder, request.view_args["filename"])
+            # Faixas de bytes (Range) referem-se ao arquivo original
+            if caminho is None or "Content-Range" in response.headers:
+                return response
+            dados = _estatico_comprimido(caminho, codificacao)
+            response.close()
+            response.direct_passthrough = False
+        elif response.is_streamed:
+            return response
+        else:
+            corpo = response.get_data()
+            if len(corpo) < COMPRESSAO_MIN_BYTES:
+                return response
+            dados = comprimir(corpo, codificacao)
+            if len(dados) >= len(corpo):
+                return response
+
+        response.set_data(dados)
+        response.headers["Content-Encoding"] = codificacao
+        # O ETag identifica o conteúdo, não a codificação: passa a ser fraco
+        etag, _ = response.get_etag()
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
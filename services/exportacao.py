@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime
+
+from services.filtros import aplicar_filtros, montar_filtros
+
+# Linhas buscadas por requisição ao Supabase durante a exportação
+TAMANHO_LOTE_EXPORTACAO = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+# O que pode ser exportado: tabela, colunas permitidas (na ordem padrão) e coluna de data
+EXPORTACOES = {
+    "clientes": {
+        "tabela": "clientes",
+        "colunas": ("client__c", "nome", "contato", "endereco", "bairro", "cidade", "estado", "cep",
+                    "genero", "email", "data_nascimento", "ativo"),
+        "coluna_data": None,
+    },
+    "vendas": {
+        "tabela": "vendas",
+        "colunas": ("data_venda", "cliente", "vendedor", "produtos", "produtos_formatados", "quantidade", "pagamento",
+                    "valor"),
+        "coluna_data": "data_venda",
+    },
+    "pagamentos": {
+        "tabela": "investimento_pagamentos",
+        "colunas": ("investimento__c", "data", "valor", "origem", "criado_em"),
+        "coluna_data": "data",
+    },
+}
+
+# Tipo MIME de cada formato (o Flask acrescenta "; charset=utf-8" aos tipos text/*)
+FORMATOS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class ErroExportacao(ValueError):
+    """Parâmetros de exportação inválidos (a mensagem é mostrada ao usuário)."""
+
+
+def _data_valida(valor, nome):
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise ErroExportacao(f"Data de {nome} inválida (use AAAA-MM-DD).")
+
+
+def parametros_exportacao(tipo, args):
+    """Valida os parâmetros da URL (formato, colunas, inicio e fim) de uma exportação."""
+    if tipo not in EXPORTACOES:
+        raise ErroExportacao("Exportação desconhecida.")
+    config = EXPORTACOES[tipo]
+
+    formato = args.get("formato", "csv").lower()
+    if formato not in FORMATOS:
+        raise ErroExportacao("Formato deve ser csv ou xlsx.")
+
+    colunas = config["colunas"]
+    if args.get("colunas"):
+        colunas = tuple(coluna.strip() for coluna in args["colunas"].split(",") if coluna.strip())
+        invalidas = [coluna for coluna in colunas if coluna not in config["colunas"]]
+        if invalidas or not colunas:
+            raise ErroExportacao(f"Colunas inválidas: {', '.join(invalidas) or '(nenhuma)'}.")
+
+    inicio = _data_valida(args.get("inicio"), "início")
+    fim = _data_valida(args.get("fim"), "fim")
+    if (inicio or fim) and not config["coluna_data"]:
+        raise ErroExportacao(f"A exportação de {tipo} não aceita período.")
+
+    return {"tipo": tipo, "formato": formato, "colunas": colunas, "inicio": inicio, "fim": fim}
+
+
+def iterar_linhas(supabase, user_id, parametros, tamanho_lote=TAMANHO_LOTE_EXPORTACAO):
+    """Gera as linhas da exportação buscando um lote por vez (paginação por id).
+
+    Só um lote fica em memória, qualquer que seja o total de linhas.
+    """
+    config = EXPORTACOES[parametros["tipo"]]
+    campos = ",".join(dict.fromkeys(("id",) + tuple(parametros["colunas"])))
+    filtros = montar_filtros(intervalo=(config["coluna_data"], parametros["inicio"], parametros["fim"]))
+    ultimo_id = None
+    while True:
+        query = aplicar_filtros(supabase.table(config["tabela"]).select(campos).eq("user_id", user_id), filtros)
+        if ultimo_id is not None:
+            query = query.gt("id", ultimo_id)
+        lote = query.order("id").limit(tamanho_lote).execute().data or []
+        yield from lote
+        if len(lote) < tamanho_lote:
+            return
+        ultimo_id = lote[-1]["id"]
+
+
+def _valor_celula(valor):
+    """Valor de uma célula exportada: listas e objetos (colunas jsonb, como `produtos`) viram JSON."""
+    if isinstance(valor, (list, dict)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+def gerar_csv(linhas, colunas, linhas_por_bloco=500):
+    """Gera o CSV em blocos de texto (com BOM, para o Excel reconhecer o UTF-8)."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write("\ufeff")
+    escritor.writerow(colunas)
+    for numero, linha in enumerate(linhas, 1):
+        escritor.writerow(["" if linha.get(coluna) is None else _valor_celula(linha.get(coluna))
+                           for coluna in colunas])
+        if numero % linhas_por_bloco == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _valor_planilha(valor):
+    """Datas ISO viram datas de verdade na planilha; listas e objetos, JSON; o resto vai como está."""
+    valor = _valor_celula(valor)
+    if isinstance(valor, str) and len(valor) == 10 and valor[4:5] == "-" and valor[7:8] == "-":
+        try:
+            return date.fromisoformat(valor)
+        except ValueError:
+            pass
+    return valor
+
+
+def gerar_xlsx(linhas, colunas, tamanho_bloco=64 * 1024):
+    """Gera a planilha XLSX em blocos de bytes.
+
+    Usa o modo write_only do openpyxl (dependência opcional), que grava as
+    linhas num arquivo temporário em vez de guardá-las em memória. O arquivo
+    é enviado depois de fechado, porque o XLSX é um zip.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ErroExportacao("Exportação em XLSX indisponível: instale o pacote openpyxl.")
+
+    def gerar():
+        planilha = Workbook(write_only=True)
+        aba = planilha.create_sheet()
+        aba.append(list(colunas))
+        for linha in linhas:
+            aba.append([_valor_planilha(linha.get(coluna)) for coluna in colunas])
+
+        with tempfile.TemporaryFile() as arquivo:
+            planilha.save(arquivo)
+            arquivo.seek(0)
+            while True:
+                bloco = arquivo.read(tamanho_bloco)
+                if not bloco:
+                    return
+                yield bloco
+
+    return gerar()
+
+
+def nome_arquivo(parametros):
+    partes = [parametros["tipo"]]
+    if parametros["inicio"] or parametros["fim"]:
+        partes.append(f"{parametros['inicio'] or 'inicio'}_a_{parametros['fim'] or 'hoje'}")
+    return "_".join(partes) + "." + parametros["formato"]
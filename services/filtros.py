@@ -0,0 +1,115 @@
+"""Filtros das consultas aplicados no Supabase (eq/gte/lte/in_), em vez de em Python depois de buscar tudo.
+
+Os filtros são tuplas (coluna, operador, valor), ordenadas: a mesma tupla
+monta a consulta e serve de chave de cache. Os índices que esses predicados
+usam estão em sql/007_indices_filtros.sql.
+"""
+from datetime import date, datetime, timedelta
+
+# Seletor de período das páginas (parâmetro `periodo`; o personalizado usa `inicio` e `fim`)
+PERIODOS = {
+    "tudo": "Todo o período",
+    "30d": "Últimos 30 dias",
+    "ano": "Este ano",
+    "personalizado": "Personalizado",
+}
+
+# Filtro de situação dos investimentos (parâmetro `status`)
+STATUS_INVESTIMENTO = {
+    "todos": None,
+    "ativos": ("encerrado", "falso_ou_nulo", None),
+    "encerrados": ("encerrado", "eq", True),
+}
+
+# Valores aceitos num mesmo filtro (viram um `in_` na URL do PostgREST, que tem tamanho limitado)
+MAX_VALORES_FILTRO = 50
+
+
+def _data(valor):
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def resolver_periodo(args, padrao="tudo", hoje=None):
+    """Lê o seletor de período dos parâmetros da URL (`args`).
+
+    Retorna {"periodo", "inicio", "fim"}, com as datas em ISO ou None (sem limite).
+    Período desconhecido ou personalizado sem datas válidas vira o padrão.
+    """
+    hoje = hoje or date.today()
+    periodo = args.get("periodo")
+    if periodo not in PERIODOS:
+        periodo = padrao
+    inicio = fim = None
+    if periodo == "30d":
+        inicio, fim = hoje - timedelta(days=29), hoje
+    elif periodo == "ano":
+        inicio, fim = date(hoje.year, 1, 1), date(hoje.year, 12, 31)
+    elif periodo == "personalizado":
+        inicio, fim = _data(args.get("inicio")), _data(args.get("fim"))
+        if inicio and fim and inicio > fim:
+            inicio, fim = fim, inicio
+        if not (inicio or fim):
+            return resolver_periodo({}, padrao, hoje)
+    return {
+        "periodo": periodo,
+        "inicio": inicio.isoformat() if inicio else None,
+        "fim": fim.isoformat() if fim else None,
+    }
+
+
+def parametros_periodo(periodo):
+    """Parâmetros de URL que reproduzem o período (para links de paginação e afins)."""
+    if periodo["periodo"] != "personalizado":
+        return {"periodo": periodo["periodo"]}
+    return {chave: valor for chave, valor in periodo.items() if valor}
+
+
+def valores_da_url(args, campo):
+    """Valores de um filtro (`?vendedor=A&vendedor=B`), sem vazios nem repetições."""
+    valores = args.getlist(campo) if hasattr(args, "getlist") else [args.get(campo)]
+    return list(dict.fromkeys(valor for valor in valores if valor))[:MAX_VALORES_FILTRO]
+
+
+def montar_filtros(valores=None, intervalo=None):
+    """Tupla de filtros a partir de {coluna: valor ou lista de valores} e (coluna, inicio, fim).
+
+    Um valor vira `eq`, vários viram `in_`; as datas do intervalo viram `gte`/`lte`.
+    """
+    filtros = []
+    for coluna, valor in (valores or {}).items():
+        if isinstance(valor, (list, tuple, set)):
+            valor = sorted(set(valor))
+            if len(valor) != 1:
+                filtros.append((coluna, "in", tuple(valor)))
+                continue
+            valor = valor[0]
+        filtros.append((coluna, "eq", valor))
+    if intervalo:
+        coluna, inicio, fim = intervalo
+        if inicio:
+            filtros.append((coluna, "gte", inicio))
+        if fim:
+            filtros.append((coluna, "lte", fim))
+    return tuple(sorted(filtros, key=lambda filtro: (filtro[0], filtro[1])))
+
+
+def aplicar_filtros(query, filtros):
+    """Aplica à consulta do Supabase os filtros de `montar_filtros` (ou de STATUS_INVESTIMENTO)."""
+    for coluna, operador, valor in filtros:
+        if operador == "eq":
+            query = query.eq(coluna, valor)
+        elif operador == "in":
+            query = query.in_(coluna, list(valor))
+        elif operador == "gte":
+            query = query.gte(coluna, valor)
+        elif operador == "lte":
+            query = query.lte(coluna, valor)
+        elif operador == "falso_ou_nulo":
+            # `not coluna`: inclui linhas antigas sem o valor preenchido
+            query = query.or_(f"{coluna}.is.null,{coluna}.is.false")
+        else:
+            raise ValueError(f"Operador de filtro desconhecido: {operador}")
+    return query
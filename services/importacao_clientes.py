@@ -0,0 +1,131 @@
+import os
+
+from services.busca_clientes import IndiceClientes, obter_indice, registrar_alteracao
+from services.metricas import medir_etapa
+from services.supabase_client import obter_supabase
+from services.tarefas import enviar_tarefa, salvar_arquivo
+
+# pandas é importado dentro das funções, para não pesar na inicialização da aplicação
+
+# Tamanhos padrão da importação (podem ser ajustados por variável de ambiente)
+TAMANHO_LOTE_IMPORTACAO = int(os.getenv("CSV_IMPORT_BATCH_SIZE", 500))
+TAMANHO_CHUNK_CSV = int(os.getenv("CSV_IMPORT_CHUNK_SIZE", 5000))
+
+CAMPOS_OBRIGATORIOS = ("nome", "contato", "email")
+# Linhas inválidas descritas no resumo (as demais só entram na contagem)
+MAX_ERROS_IMPORTACAO = 50
+
+
+def _normalizar_valor(valor):
+    """Converte o valor lido do CSV em string limpa (ou vazia)."""
+    if valor is None:
+        return ""
+    return str(valor).strip()
+
+
+def importar_clientes_csv(supabase, arquivo, user_id,
+                          tamanho_lote=TAMANHO_LOTE_IMPORTACAO,
+                          tamanho_chunk=TAMANHO_CHUNK_CSV,
+                          ao_progredir=None):
+    """Importa clientes de um CSV em blocos, inserindo em lotes.
+
+    Linhas parecidas com um cliente já cadastrado (ou com outra linha do próprio
+    arquivo) contam como duplicadas, pelo índice de busca de clientes.
+    Retorna um resumo com a quantidade de linhas inseridas, duplicadas e inválidas
+    (e a descrição das primeiras linhas inválidas, em "erros").
+    `ao_progredir(resumo, processadas)` é chamada a cada `tamanho_lote` linhas processadas.
+    """
+    import pandas as pd
+
+    resumo = {"inseridos": 0, "duplicados": 0, "invalidos": 0, "erros": []}
+    processadas = 0
+    indice = obter_indice(supabase, user_id)
+    do_arquivo = IndiceClientes()
+    lote = []
+
+    def enviar_lote():
+        if lote:
+            inseridos = supabase.table("clientes").insert(lote).execute().data or []
+            registrar_alteracao(user_id, inseridos)
+            resumo["inseridos"] += len(lote)
+            lote.clear()
+
+    leitor = pd.read_csv(arquivo, chunksize=tamanho_chunk, dtype=str, keep_default_na=False)
+    while True:
+        # Só a leitura do CSV conta como etapa "pandas" (os lotes enviados ao banco são medidos à parte)
+        with medir_etapa("pandas"):
+            chunk = next(leitor, None)
+            linhas = chunk.to_dict(orient="records") if chunk is not None else None
+        if linhas is None:
+            break
+        for linha in linhas:
+            if ao_progredir and processadas and processadas % tamanho_lote == 0:
+                ao_progredir(resumo, processadas)
+            processadas += 1
+            cliente = {
+                "nome": _normalizar_valor(linha.get("nome")),
+                "contato": _normalizar_valor(linha.get("contato")),
+                "endereco": _normalizar_valor(linha.get("endereco")),
+                "email": _normalizar_valor(linha.get("email")),
+                "user_id": user_id
+            }
+
+            # Validar campos e evitar duplicados (no banco e dentro do próprio arquivo)
+            if not all(cliente[campo] for campo in CAMPOS_OBRIGATORIOS):
+                resumo["invalidos"] += 1
+                if len(resumo["erros"]) < MAX_ERROS_IMPORTACAO:
+                    faltando = ", ".join(campo for campo in CAMPOS_OBRIGATORIOS if not cliente[campo])
+                    # +1 pelo cabeçalho
+                    resumo["erros"].append(f"Linha {processadas + 1}: faltando {faltando}")
+                continue
+
+            if indice.duplicados_provaveis(cliente) or do_arquivo.duplicados_provaveis(cliente):
+                resumo["duplicados"] += 1
+                continue
+
+            do_arquivo.adicionar({**cliente, "client__c": len(do_arquivo)})
+            lote.append(cliente)
+            if len(lote) >= tamanho_lote:
+                enviar_lote()
+
+    enviar_lote()
+    return resumo
+
+
+def _contar_linhas(caminho):
+    """Linhas de dados do arquivo (sem o cabeçalho), para estimar o progresso."""
+    linhas, ultimo = 0, b""
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+            linhas += bloco.count(b"\n")
+            ultimo = bloco[-1:]
+    if ultimo not in (b"", b"\n"):
+        linhas += 1  # última linha sem quebra
+    return max(linhas - 1, 0)
+
+
+def tarefa_importar_clientes_csv(tarefa, caminho):
+    """Tarefa em segundo plano (services/tarefas.py): importa o CSV salvo em `caminho`."""
+    tarefa.progredir(total=_contar_linhas(caminho))
+
+    def ao_progredir(resumo, processadas):
+        tarefa.progredir(processadas=processadas, erros=resumo["erros"],
+                         resultado={campo: resumo[campo] for campo in ("inseridos", "duplicados", "invalidos")})
+
+    try:
+        with open(caminho, "rb") as arquivo:
+            resumo = importar_clientes_csv(obter_supabase(), arquivo, tarefa.user_id, ao_progredir=ao_progredir)
+    finally:
+        # Lotes já enviados continuam cadastrados mesmo se a importação parar no meio
+        registrar_alteracao(tarefa.user_id)
+    tarefa.erros = resumo["erros"]
+    # A contagem de linhas do arquivo é só uma estimativa (campos com quebra de linha, linhas em branco)
+    tarefa.processadas = tarefa.total = resumo["inseridos"] + resumo["duplicados"] + resumo["invalidos"]
+    return {campo: resumo[campo] for campo in ("inseridos", "duplicados", "invalidos")}
+
+
+def enviar_importacao_csv(user_id, arquivo):
+    """Salva o CSV enviado e coloca a importação na fila de tarefas. Retorna a tarefa."""
+    caminho = salvar_arquivo(arquivo, ".csv")
+    return enviar_tarefa(user_id, "importar_clientes_csv", tarefa_importar_clientes_csv, arquivo=caminho,
+                         caminho=caminho)
@@ -0,0 +1,258 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Chamadas ao Supabase acima disso numa única requisição geram um aviso no log
+ORCAMENTO_CHAMADAS = int(os.getenv("SUPABASE_CALL_BUDGET", 25))
+# Requisições mais lentas que isso (em ms) são registradas no log com o detalhamento; 0 desliga
+REQUISICAO_LENTA_MS = float(os.getenv("SLOW_REQUEST_LOG_MS", 0))
+
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CHAMADAS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+# Medição da requisição em andamento (compartilhada com as threads de consultas_paralelas)
+_medicao_atual = ContextVar("medicao_requisicao", default=None)
+
+
+class MedicaoRequisicao:
+    """Chamadas ao banco e etapas (render, pandas...) de uma requisição."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.status = None
+        self.chamadas = 0
+        self.tempo_banco = 0.0
+        self.por_destino = {}  # "GET vendas" -> [chamadas, segundos]
+        self.etapas = {}  # etapa -> segundos
+        self._lock = threading.Lock()
+
+    def registrar_chamada(self, destino, duracao):
+        with self._lock:
+            self.chamadas += 1
+            self.tempo_banco += duracao
+            total = self.por_destino.setdefault(destino, [0, 0.0])
+            total[0] += 1
+            total[1] += duracao
+
+    def registrar_etapa(self, etapa, duracao):
+        with self._lock:
+            self.etapas[etapa] = self.etapas.get(etapa, 0.0) + duracao
+
+    def detalhamento(self):
+        """Texto curto com as chamadas por destino e as etapas, para o log."""
+        chamadas = ", ".join(
+            f"{destino} x{quantidade} ({segundos * 1000:.0f} ms)"
+            for destino, (quantidade, segundos) in sorted(self.por_destino.items(), key=lambda item: -item[1][1])
+        )
+        etapas = ", ".join(f"{etapa} {segundos * 1000:.0f} ms" for etapa, segundos in self.etapas.items())
+        return f"banco: {chamadas or 'nenhuma chamada'}" + (f"; {etapas}" if etapas else "")
+
+
+class RegistroMetricas:
+    """Contadores e histogramas do processo, no formato de exposição do Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = {}  # (nome, rótulos) -> valor
+        self._histogramas = {}  # (nome, rótulos) -> [contagens por bucket, soma, total]
+        self._buckets = {}  # nome -> limites
+        self._ajuda = {}  # nome -> (tipo, descrição)
+
+    def contador(self, nome, descricao):
+        self._ajuda[nome] = ("counter", descricao)
+
+    def histograma(self, nome, descricao, buckets):
+        self._ajuda[nome] = ("histogram", descricao)
+        self._buckets[nome] = buckets
+
+    def somar(self, nome, rotulos, valor=1):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, rotulos, valor):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        buckets = self._buckets[nome]
+        with self._lock:
+            serie = self._histogramas.get(chave)
+            if serie is None:
+                serie = self._histogramas[chave] = [[0] * len(buckets), 0.0, 0]
+            for posicao, limite in enumerate(buckets):
+                if valor <= limite:
+                    serie[0][posicao] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def limpar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def exportar(self, extras=()):
+        """Texto no formato do Prometheus. `extras`: (nome, tipo, descrição, rótulos, valor) calculados na hora."""
+        with self._lock:
+            contadores = dict(self._contadores)
+            histogramas = {chave: (list(serie[0]), serie[1], serie[2]) for chave, serie in self._histogramas.items()}
+
+        linhas = []
+        for nome, (tipo, descricao) in sorted(self._ajuda.items()):
+            linhas.append(f"# HELP {nome} {descricao}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            if tipo == "counter":
+                for (serie, rotulos), valor in sorted(contadores.items()):
+                    if serie == nome:
+                        linhas.append(f"{nome}{_rotulos(rotulos)} {_numero(valor)}")
+            else:
+                for (serie, rotulos), (contagens, soma, total) in sorted(histogramas.items()):
+                    if serie != nome:
+                        continue
+                    for limite, contagem in zip(self._buckets[nome], contagens):
+                        linhas.append(f"{nome}_bucket{_rotulos(rotulos + (('le', _numero(limite)),))} {contagem}")
+                    linhas.append(f"{nome}_bucket{_rotulos(rotulos + (('le', '+Inf'),))} {total}")
+                    linhas.append(f"{nome}_sum{_rotulos(rotulos)} {_numero(soma)}")
+                    linhas.append(f"{nome}_count{_rotulos(rotulos)} {total}")
+        for nome, tipo, descricao, rotulos, valor in extras:
+            linhas.append(f"# HELP {nome} {descricao}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            linhas.append(f"{nome}{_rotulos(tuple(sorted(rotulos.items())))} {_numero(valor)}")
+        return "\n".join(linhas) + "\n"
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos) + "}"
+
+
+metricas = RegistroMetricas()
+metricas.contador("app_requisicoes_total", "Requisições atendidas, por rota, método e status.")
+metricas.histograma("app_requisicao_duracao_segundos", "Duração das requisições, por rota e método.", BUCKETS_DURACAO)
+metricas.histograma("app_supabase_chamadas_por_requisicao", "Chamadas ao Supabase em cada requisição, por rota.",
+                    BUCKETS_CHAMADAS)
+metricas.contador("app_supabase_chamadas_total", "Chamadas ao Supabase, por rota.")
+metricas.contador("app_supabase_duracao_segundos_total", "Tempo gasto em chamadas ao Supabase, por rota.")
+metricas.contador("app_etapa_duracao_segundos_total", "Tempo gasto por etapa (render, pandas, numpy), por rota.")
+metricas.contador("app_requisicoes_acima_orcamento_total",
+                  "Requisições que passaram de SUPABASE_CALL_BUDGET chamadas ao Supabase, por rota.")
+
+
+@contextmanager
+def medir_etapa(etapa):
+    """Soma o tempo do bloco (ou da função, se usado como decorador) à etapa da requisição atual."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicao = _medicao_atual.get()
+        if medicao is not None:
+            medicao.registrar_etapa(etapa, time.perf_counter() - inicio)
+
+
+def _destino(url):
+    """"vendas" ou "rpc/nome_da_funcao" a partir da URL do PostgREST."""
+    caminho = url.path
+    return caminho.split("/rest/v1/", 1)[-1].strip("/") or caminho
+
+
+def _ao_enviar(request):
+    request.extensions["metricas_inicio"] = time.perf_counter()
+
+
+def _ao_receber(response):
+    medicao = _medicao_atual.get()
+    inicio = response.request.extensions.get("metricas_inicio")
+    if medicao is not None and inicio is not None:
+        medicao.registrar_chamada(f"{response.request.method} {_destino(response.request.url)}",
+                                  time.perf_counter() - inicio)
+
+
+def ganchos_httpx():
+    """event_hooks do httpx que contam as chamadas ao Supabase na requisição atual (até a resposta chegar)."""
+    return {"request": [_ao_enviar], "response": [_ao_receber]}
+
+
+def _rota_atual():
+    from flask import request
+
+    return request.url_rule.rule if request.url_rule else "sem_rota"
+
+
+def configurar_metricas(app):
+    """Registra na aplicação a medição de cada requisição (ver `metricas`)."""
+    from flask import before_render_template, g, request, template_rendered
+
+    @app.before_request
+    def iniciar_medicao():
+        g.medicao = MedicaoRequisicao()
+        g.token_medicao = _medicao_atual.set(g.medicao)
+
+    @app.after_request
+    def guardar_status(response):
+        medicao = g.get("medicao")
+        if medicao is not None:
+            medicao.status = response.status_code
+            if response.is_streamed:
+                # Em streaming (exportações) as chamadas continuam depois do teardown: a medição
+                # termina quando o servidor fecha a resposta
+                g.pop("medicao")
+                g.pop("token_medicao", None)
+                rota, metodo = _rota_atual(), request.method
+
+                def encerrar_streaming():
+                    _medicao_atual.set(None)
+                    registrar_requisicao(medicao, rota, metodo, medicao.status)
+
+                response.call_on_close(encerrar_streaming)
+        return response
+
+    @app.teardown_request
+    def encerrar_medicao(erro=None):
+        medicao = g.pop("medicao", None)
+        token = g.pop("token_medicao", None)
+        if token is not None:
+            _medicao_atual.reset(token)
+        if medicao is not None:
+            registrar_requisicao(medicao, _rota_atual(), request.method, medicao.status or (500 if erro else 200))
+
+    def inicio_render(sender, template, context, **extra):
+        g.inicio_render = time.perf_counter()
+
+    def fim_render(sender, template, context, **extra):
+        inicio = g.pop("inicio_render", None)
+        medicao = g.get("medicao")
+        if inicio is not None and medicao is not None:
+            medicao.registrar_etapa("render", time.perf_counter() - inicio)
+
+    # weak=False: as funções locais não têm outra referência
+    before_render_template.connect(inicio_render, app, weak=False)
+    template_rendered.connect(fim_render, app, weak=False)
+
+
+def registrar_requisicao(medicao, rota, metodo, status):
+    duracao = time.perf_counter() - medicao.inicio
+    metricas.somar("app_requisicoes_total", {"rota": rota, "metodo": metodo, "status": status})
+    metricas.observar("app_requisicao_duracao_segundos", {"rota": rota, "metodo": metodo}, duracao)
+    metricas.observar("app_supabase_chamadas_por_requisicao", {"rota": rota}, medicao.chamadas)
+    if medicao.chamadas:
+        metricas.somar("app_supabase_chamadas_total", {"rota": rota}, medicao.chamadas)
+        metricas.somar("app_supabase_duracao_segundos_total", {"rota": rota}, medicao.tempo_banco)
+    for etapa, segundos in medicao.etapas.items():
+        metricas.somar("app_etapa_duracao_segundos_total", {"rota": rota, "etapa": etapa}, segundos)
+
+    if medicao.chamadas > ORCAMENTO_CHAMADAS:
+        metricas.somar("app_requisicoes_acima_orcamento_total", {"rota": rota})
+        print(f"Aviso: {metodo} {rota} fez {medicao.chamadas} chamadas ao Supabase "
+              f"(orçamento {ORCAMENTO_CHAMADAS}). {medicao.detalhamento()}")
+    if REQUISICAO_LENTA_MS and duracao * 1000 >= REQUISICAO_LENTA_MS:
+        print(f"Requisição lenta: {metodo} {rota} -> {status} em {duracao * 1000:.0f} ms, "
+              f"{medicao.chamadas} chamadas ao Supabase. {medicao.detalhamento()}")
@@ -0,0 +1,129 @@
+import os
+import uuid
+from datetime import datetime
+
+from services.cache_dados import cache_dados
+from services.paginacao import TAMANHO_PAGINA_PADRAO, buscar_pagina
+
+# Ver sql/002_investimento_pagamentos.sql e sql/003_pagamentos_em_lote.sql
+TABELA_PAGAMENTOS = "investimento_pagamentos"
+COLUNAS_PAGAMENTO = "data,valor"
+
+# Limite de itens por chamada do registro em lote
+MAX_PAGAMENTOS_LOTE = int(os.getenv("INVESTMENT_BATCH_MAX_ITEMS", 1000))
+
+
+def registrar_pagamento(supabase, user_id, investimento_id, data, valor, sentido=True, encerrar=False):
+    """Registra um pagamento no livro e atualiza os contadores do investimento.
+
+    Uma única chamada ao banco. Retorna o investimento atualizado, ou None se
+    ele não existir (ou não for do usuário).
+    """
+    linhas = supabase.rpc("registrar_pagamento_investimento", {
+        "p_user_id": user_id,
+        "p_investimento": investimento_id,
+        "p_data": data,
+        "p_valor": valor,
+        "p_sentido": sentido,
+        "p_encerrar": encerrar,
+    }).execute().data or []
+    cache_dados.invalidar_tabelas(("investimento", TABELA_PAGAMENTOS), user_id)
+    return linhas[0] if linhas else None
+
+
+def validar_pagamento(item):
+    """Valida um item do lote. Retorna (pagamento normalizado, None) ou (None, mensagem de erro)."""
+    if not isinstance(item, dict):
+        return None, "Item deve ser um objeto"
+
+    investment_id = item.get("investment_id")
+    pagamento_data = item.get("data_pagamento")
+    pagamento_valor = item.get("valor_pagamento")
+    if not investment_id or not pagamento_data or not pagamento_valor:
+        return None, "Dados insuficientes"
+
+    # investimento__c é uuid: um id malformado faria o banco recusar o lote inteiro
+    try:
+        investment_id = str(uuid.UUID(str(investment_id)))
+    except ValueError:
+        return None, "ID do investimento inválido"
+
+    try:
+        datetime.strptime(str(pagamento_data), "%Y-%m-%d")
+    except ValueError:
+        return None, "Data do pagamento inválida"
+
+    try:
+        pagamento_valor = float(pagamento_valor)
+    except (TypeError, ValueError):
+        return None, "Valor do pagamento inválido"
+
+    # Booleanos de verdade (a página manda true/false): bool("false") seria True
+    sentido = item.get("sentido", True)
+    if not isinstance(sentido, bool):
+        return None, "Sentido do pagamento inválido"
+    encerrar = item.get("encerrar", False)
+    if not isinstance(encerrar, bool):
+        return None, "Encerramento do investimento inválido"
+
+    return {
+        "investimento__c": str(investment_id),
+        "data": str(pagamento_data),
+        "valor": pagamento_valor,
+        "sentido": sentido,
+        "encerrar": encerrar,
+    }, None
+
+
+def buscar_investimentos(supabase, user_id, investimento_ids, colunas="investimento__c"):
+    """Busca numa única consulta apenas os investimentos informados. Retorna {investimento__c: linha}."""
+    if not investimento_ids:
+        return {}
+    linhas = supabase.table("investimento") \
+        .select(colunas) \
+        .eq("user_id", user_id) \
+        .in_("investimento__c", sorted(set(investimento_ids))) \
+        .execute().data or []
+    return {str(linha["investimento__c"]): linha for linha in linhas}
+
+
+def registrar_pagamentos_em_lote(supabase, user_id, pagamentos):
+    """Registra vários pagamentos já validados numa única chamada ao banco.
+
+    Retorna {investimento__c: investimento atualizado}.
+    """
+    if not pagamentos:
+        return {}
+    linhas = supabase.rpc("registrar_pagamentos_investimento", {
+        "p_user_id": user_id,
+        "p_pagamentos": pagamentos,
+    }).execute().data or []
+    cache_dados.invalidar_tabelas(("investimento", TABELA_PAGAMENTOS), user_id)
+    return {str(linha["investimento__c"]): linha for linha in linhas}
+
+
+def historico_pagamentos(supabase, user_id, investimento_id, cursor=None, tamanho_pagina=TAMANHO_PAGINA_PADRAO):
+    """Uma página do histórico de pagamentos do investimento, em ordem de data."""
+    return buscar_pagina(
+        supabase, TABELA_PAGAMENTOS, user_id, COLUNAS_PAGAMENTO,
+        ordenar_por="data",
+        cursor=cursor,
+        tamanho_pagina=tamanho_pagina,
+        filtros={"investimento__c": investimento_id},
+    )
+
+
+def buscar_ultimos_pagamentos(supabase, user_id):
+    """Data ("YYYY-MM-DD") do último pagamento de cada investimento do usuário, por `investimento__c`."""
+    linhas = supabase.rpc("ultimos_pagamentos_investimentos", {"p_user_id": user_id}).execute().data or []
+    return {str(linha["investimento__c"]): str(linha["data"]) for linha in linhas}
+
+
+def migrar_historico(supabase, user_id=None):
+    """Copia o JSON antigo de historico_pagamentos para o livro. Retorna os investimentos migrados."""
+    migrados = supabase.rpc("migrar_historico_pagamentos", {"p_user_id": user_id}).execute().data or 0
+    if user_id:
+        cache_dados.invalidar_tabelas(("investimento", TABELA_PAGAMENTOS), user_id)
+    else:
+        cache_dados.limpar()
+    return migrados
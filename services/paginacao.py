@@ -0,0 +1,148 @@
+import base64
+import json
+import os
+
+from services.cache_dados import cache_dados
+from services.filtros import aplicar_filtros, montar_filtros, valores_da_url
+
+# Tamanho de página das listagens (pode ser ajustado por variável de ambiente)
+TAMANHO_PAGINA_PADRAO = int(os.getenv("PAGE_SIZE", 50))
+TAMANHO_PAGINA_MAXIMO = 500
+
+# Quantidade máxima de linhas que o Supabase devolve por requisição
+TAMANHO_LOTE_SUPABASE = 1000
+
+
+def tamanho_pagina_valido(valor):
+    """Converte o parâmetro da URL em um tamanho de página dentro dos limites."""
+    try:
+        tamanho = int(valor)
+    except (TypeError, ValueError):
+        return TAMANHO_PAGINA_PADRAO
+    return max(1, min(tamanho, TAMANHO_PAGINA_MAXIMO))
+
+
+def parametros_listagem(args, ordenacoes, ordem_padrao, direcao_padrao, filtros_permitidos):
+    """Lê ordenação, filtros e tamanho de página dos parâmetros da URL (`args`)."""
+    ordem = args.get("ordem")
+    if ordem not in ordenacoes:
+        ordem = ordem_padrao
+    direcao = args.get("direcao")
+    if direcao not in ("asc", "desc"):
+        direcao = direcao_padrao
+    parametros = {"ordem": ordem, "direcao": direcao, "tamanho": tamanho_pagina_valido(args.get("tamanho"))}
+    filtros = {}
+    for campo in filtros_permitidos:
+        # Um valor (eq) ou vários, repetindo o parâmetro (in_)
+        valores = valores_da_url(args, campo)
+        if valores:
+            valor = valores[0] if len(valores) == 1 else valores
+            filtros[campo] = valor
+            parametros[campo] = valor
+    return parametros, filtros
+
+
+def codificar_cursor(linha, ordenar_por):
+    """Gera o cursor opaco (base64) a partir da última linha da página."""
+    bruto = json.dumps([linha.get(ordenar_por), linha.get("id")], default=str)
+    return base64.urlsafe_b64encode(bruto.encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """Retorna (valor_ordem, id) do cursor, ou None se for inválido."""
+    if not cursor:
+        return None
+    try:
+        valor, id_linha = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return valor, id_linha
+    except (ValueError, TypeError):
+        return None
+
+
+def iterar_lotes(montar_consulta, tamanho_lote=TAMANHO_LOTE_SUPABASE):
+    """Gera as linhas de uma consulta lote a lote (listas de até `tamanho_lote` linhas).
+
+    `montar_consulta` deve devolver uma consulta nova (já ordenada) a cada chamada.
+    """
+    inicio = 0
+    while True:
+        lote = montar_consulta().range(inicio, inicio + tamanho_lote - 1).execute().data or []
+        if lote:
+            yield lote
+        if len(lote) < tamanho_lote:
+            return
+        inicio += tamanho_lote
+
+
+def buscar_todas(montar_consulta, tamanho_lote=TAMANHO_LOTE_SUPABASE):
+    """Busca todas as linhas de uma consulta, em lotes de `tamanho_lote` (ver `iterar_lotes`)."""
+    linhas = []
+    for lote in iterar_lotes(montar_consulta, tamanho_lote):
+        linhas.extend(lote)
+    return linhas
+
+
+def _valor_postgrest(valor):
+    """Escapa um valor para uso dentro de um filtro `or` do PostgREST."""
+    texto = str(valor).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{texto}"'
+
+
+def _consultar_pagina(supabase, tabela, user_id, colunas, ordenar_por, descendente, cursor, tamanho_pagina, filtros):
+    campos = [coluna.strip() for coluna in colunas.split(",")]
+    for obrigatoria in ("id", ordenar_por):
+        if obrigatoria not in campos:
+            campos.append(obrigatoria)
+
+    query = aplicar_filtros(supabase.table(tabela).select(",".join(campos)).eq("user_id", user_id), filtros)
+
+    posicao = decodificar_cursor(cursor)
+    if posicao:
+        valor, id_linha = posicao
+        operador = "lt" if descendente else "gt"
+        if ordenar_por == "id":
+            query = query.filter("id", operador, id_linha)
+        else:
+            valor = _valor_postgrest(valor)
+            query = query.or_(
+                f"{ordenar_por}.{operador}.{valor},"
+                f"and({ordenar_por}.eq.{valor},id.{operador}.{id_linha})"
+            )
+
+    query = query.order(ordenar_por, desc=descendente)
+    if ordenar_por != "id":
+        query = query.order("id", desc=descendente)
+
+    linhas = query.limit(tamanho_pagina + 1).execute().data or []
+    proximo_cursor = None
+    if len(linhas) > tamanho_pagina:
+        linhas = linhas[:tamanho_pagina]
+        proximo_cursor = codificar_cursor(linhas[-1], ordenar_por)
+    return {"linhas": linhas, "proximo_cursor": proximo_cursor}
+
+
+def buscar_pagina(supabase, tabela, user_id, colunas, ordenar_por="id", descendente=False,
+                  cursor=None, tamanho_pagina=TAMANHO_PAGINA_PADRAO, filtros=None, intervalo=None):
+    """Busca uma página de registros do usuário com paginação por cursor (keyset).
+
+    A ordenação é sempre desempatada pelo `id`, e o cursor guarda o par
+    (valor da coluna de ordenação, id) da última linha entregue. `filtros`
+    ({coluna: valor ou lista}) e `intervalo` ((coluna, inicio, fim)) são
+    aplicados no banco (ver services/filtros.py).
+    Retorna {"linhas": [...], "proximo_cursor": str | None}.
+    """
+    filtros = montar_filtros(filtros, intervalo)
+    formato = ("pagina", colunas, ordenar_por, descendente, cursor, tamanho_pagina, filtros)
+
+    encontrado, pagina = cache_dados.obter(tabela, user_id, formato)
+    if not encontrado:
+        geracao = cache_dados.geracao(tabela, user_id)
+        try:
+            pagina = _consultar_pagina(supabase, tabela, user_id, colunas, ordenar_por,
+                                       descendente, cursor, tamanho_pagina, filtros)
+        except Exception as e:
+            print(f"Erro ao buscar página de {tabela}: {e}")
+            return {"linhas": [], "proximo_cursor": None}
+        cache_dados.guardar(tabela, user_id, formato, pagina, geracao=geracao)
+
+    return {"linhas": [dict(linha) for linha in pagina["linhas"]], "proximo_cursor": pagina["proximo_cursor"]}
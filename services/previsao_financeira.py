@@ -0,0 +1,188 @@
+import os
+from datetime import date
+
+from services.cache_dados import cache_dados
+from services.carteira import obter_carteira
+from services.metricas import medir_etapa
+from services.pagamentos_investimento import buscar_ultimos_pagamentos
+from services.resumo_vendas import obter_resumo
+
+# numpy é importado dentro das funções, para não pesar na inicialização da aplicação
+
+HORIZONTE_PADRAO = int(os.getenv("FORECAST_HORIZON_MONTHS", 12))
+HORIZONTE_MAXIMO = 60
+# Meses de vendas usados para estimar a tendência
+JANELA_TENDENCIA = int(os.getenv("FORECAST_TREND_MONTHS", 6))
+
+# Meses entre duas parcelas, por tipo de pagamento do investimento
+MESES_POR_TIPO = {"mensal": 1, "anual": 12}
+
+
+def horizonte_valido(valor):
+    """Converte o parâmetro da URL em um horizonte (em meses) dentro dos limites."""
+    try:
+        horizonte = int(valor)
+    except (TypeError, ValueError):
+        return HORIZONTE_PADRAO
+    return max(1, min(horizonte, HORIZONTE_MAXIMO))
+
+
+def _meses_seguintes(inicio, quantidade):
+    """Rótulos "YYYY-MM" dos `quantidade` meses a partir do mês seguinte a `inicio`."""
+    indice = inicio.year * 12 + inicio.month  # mês seguinte (base 0)
+    return [f"{(indice + i) // 12}-{(indice + i) % 12 + 1:02d}" for i in range(quantidade)]
+
+
+def meses_ate_proxima_parcela(ultimos_pagamentos, inicios, intervalos, hoje):
+    """Meses entre o primeiro mês projetado (o seguinte ao atual) e a próxima parcela de cada investimento.
+
+    A próxima parcela vence `intervalo` meses depois do último pagamento; sem
+    pagamentos, no mês de início do investimento. Datas são textos
+    "YYYY-MM-DD..." (ou None). Parcelas já vencidas entram no primeiro mês.
+    """
+    import numpy as np
+
+    def meses(datas):
+        return np.array([str(data)[:7] if data else "NaT" for data in datas], dtype="datetime64[M]")
+
+    ultimos = meses(ultimos_pagamentos)
+    inicios = meses(inicios)
+    vencimentos = np.where(np.isnat(ultimos), inicios.astype(np.int64),
+                           ultimos.astype(np.int64) + np.asarray(intervalos, dtype=np.int64))
+    primeiro_mes = np.datetime64(hoje, "M").astype(np.int64) + 1
+    sem_data = np.isnat(ultimos) & np.isnat(inicios)
+    return np.where(sem_data, 0, np.maximum(vencimentos - primeiro_mes, 0))
+
+
+def projetar_parcelas(valores, parcelas_restantes, intervalos, horizonte, deslocamentos=None):
+    """Saídas por mês das parcelas restantes de todos os investimentos de uma vez.
+
+    A parcela seguinte de cada investimento cai `deslocamento` meses após o
+    início do horizonte (no primeiro mês, se não informado) e as demais a cada
+    `intervalo` meses, até acabarem as parcelas restantes.
+    """
+    import numpy as np
+
+    valores = np.asarray(valores, dtype=float)
+    parcelas_restantes = np.asarray(parcelas_restantes, dtype=np.int64)
+    intervalos = np.maximum(np.asarray(intervalos, dtype=np.int64), 1)
+    if deslocamentos is None:
+        deslocamentos = np.zeros(len(valores), dtype=np.int64)
+    deslocamentos = np.maximum(np.asarray(deslocamentos, dtype=np.int64), 0)
+
+    # Quantas parcelas de cada investimento cabem no horizonte (nenhuma se a próxima cai depois dele)
+    cabem = np.where(deslocamentos < horizonte, (horizonte - 1 - deslocamentos) // intervalos + 1, 0)
+    quantidade = np.minimum(parcelas_restantes, cabem).clip(min=0)
+    total = int(quantidade.sum())
+    if total == 0:
+        return np.zeros(horizonte)
+
+    # Uma posição por parcela: mês = deslocamento + número da parcela x intervalo do seu investimento
+    dono = np.repeat(np.arange(len(valores)), quantidade)
+    inicio_dono = np.cumsum(quantidade) - quantidade
+    numero_parcela = np.arange(total) - inicio_dono[dono]
+    meses = deslocamentos[dono] + numero_parcela * intervalos[dono]
+    return np.bincount(meses, weights=valores[dono], minlength=horizonte)[:horizonte]
+
+
+def projetar_vendas(receitas_mensais, horizonte, janela=JANELA_TENDENCIA, meses_ate_inicio=1):
+    """Entradas por mês seguindo a tendência linear dos últimos meses de vendas.
+
+    `meses_ate_inicio` é a distância entre o último mês com receita e o primeiro mês projetado.
+    """
+    import numpy as np
+
+    receitas = np.asarray(receitas_mensais, dtype=float)[-janela:]
+    if len(receitas) == 0:
+        return np.zeros(horizonte)
+    if len(receitas) == 1:
+        return np.full(horizonte, receitas[0])
+
+    inclinacao, intercepto = np.polyfit(np.arange(len(receitas)), receitas, 1)
+    futuros = np.arange(horizonte) + len(receitas) - 1 + meses_ate_inicio
+    return np.clip(intercepto + inclinacao * futuros, 0, None)
+
+
+@medir_etapa("numpy")
+def calcular_previsao(investimentos, receitas_mensais, horizonte=HORIZONTE_PADRAO, hoje=None, ultimos_pagamentos=None):
+    """Fluxo de caixa mensal previsto: entradas (vendas) x saídas (parcelas de investimentos).
+
+    `investimentos` são linhas de `investimento` (só os ativos entram na conta),
+    `receitas_mensais` a receita de cada mês fechado, em ordem cronológica, até o
+    mês anterior ao atual, e `ultimos_pagamentos` a data do último pagamento de
+    cada investimento (por `investimento__c`). A projeção começa no mês seguinte ao atual.
+    """
+    import numpy as np
+
+    hoje = hoje or date.today()
+    ultimos_pagamentos = ultimos_pagamentos or {}
+    ativos = [investimento for investimento in investimentos if not investimento.get("encerrado")]
+
+    valores = np.fromiter((investimento.get("valor") or 0 for investimento in ativos), dtype=float, count=len(ativos))
+    restantes = np.fromiter(
+        ((investimento.get("duracao") or 0) - (investimento.get("pagamentos") or 0) for investimento in ativos),
+        dtype=np.int64, count=len(ativos))
+    intervalos = np.fromiter(
+        (MESES_POR_TIPO.get(str(investimento.get("tipo_pagamento") or "").lower(), 1) for investimento in ativos),
+        dtype=np.int64, count=len(ativos))
+    # Início do investimento: `created_at` (coluna padrão das tabelas do Supabase), quando existe
+    deslocamentos = meses_ate_proxima_parcela(
+        [ultimos_pagamentos.get(str(investimento.get("investimento__c"))) for investimento in ativos],
+        [investimento.get("created_at") for investimento in ativos], intervalos, hoje)
+
+    saidas = projetar_parcelas(valores, restantes, intervalos, horizonte, deslocamentos)
+    entradas = projetar_vendas(receitas_mensais, horizonte, meses_ate_inicio=2)
+    saldo = entradas - saidas
+
+    return {
+        "meses": _meses_seguintes(hoje, horizonte),
+        "entradas": np.round(entradas, 2).tolist(),
+        "saidas": np.round(saidas, 2).tolist(),
+        "saldo": np.round(saldo, 2).tolist(),
+        "saldo_acumulado": np.round(np.cumsum(saldo), 2).tolist(),
+        "total_entradas": round(float(entradas.sum()), 2),
+        "total_saidas": round(float(saidas.sum()), 2),
+        "investimentos_ativos": len(ativos),
+    }
+
+
+def _receitas_mensais(resumo_mensal, hoje):
+    """Receita por mês (sem lacunas) até o mês anterior ao atual, a partir do resumo de vendas."""
+    receitas = {}
+    for linha in resumo_mensal:
+        if linha["dimensao"] == "total":
+            mes = str(linha["periodo"])[:7]
+            receitas[mes] = receitas.get(mes, 0) + float(linha["receita"] or 0)
+
+    # O mês atual ainda está incompleto e puxaria a tendência para baixo
+    atual = f"{hoje.year}-{hoje.month:02d}"
+    meses = sorted(mes for mes in receitas if mes < atual)
+    if not meses:
+        return []
+    ano, mes = map(int, meses[0].split("-"))
+    serie = []
+    while f"{ano}-{mes:02d}" < atual:
+        serie.append(receitas.get(f"{ano}-{mes:02d}", 0))
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return serie
+
+
+def obter_previsao(supabase, user_id, horizonte=HORIZONTE_PADRAO):
+    """Previsão do usuário, em cache até mudarem os investimentos ou as vendas."""
+    hoje = date.today()
+    # A chave inclui a versão das vendas (o grupo é o de investimentos) e o mês atual
+    formato = ("previsao", horizonte, cache_dados.geracao("vendas", user_id), hoje.strftime("%Y-%m"))
+    encontrado, previsao = cache_dados.obter("investimento", user_id, formato)
+    if not encontrado:
+        geracao = cache_dados.geracao("investimento", user_id)
+        carteira = obter_carteira(supabase, user_id, "ativos")
+        resumo = obter_resumo(supabase, user_id, granularidade="mes", dimensoes=("total",))
+        try:
+            pagos = buscar_ultimos_pagamentos(supabase, user_id)
+        except Exception as e:
+            # Sem as datas, as próximas parcelas são projetadas a partir do início dos investimentos
+            print(f"Erro ao buscar os últimos pagamentos: {e}")
+            pagos = {}
+        previsao = calcular_previsao(carteira.ativos, _receitas_mensais(resumo, hoje), horizonte, hoje, pagos)
+        cache_dados.guardar("investimento", user_id, formato, previsao, geracao=geracao)
+    return previsao
@@ -0,0 +1,75 @@
+from services.cache_dados import cache_dados
+from services.filtros import aplicar_filtros, montar_filtros
+from services.paginacao import buscar_todas
+from services.supabase_client import obter_supabase
+
+# Ver sql/001_vendas_resumo.sql
+GRANULARIDADES = ("dia", "mes")
+DIMENSOES = ("cliente", "vendedor", "pagamento")
+
+
+def gravar_vendas(supabase, vendas):
+    """Grava as vendas e as soma ao resumo numa única transação (sql/010_gravar_vendas_lote.sql).
+
+    Cada venda leva um `id_envio`; as já gravadas são ignoradas, inclusive no
+    resumo, então repetir a chamada não soma de novo nem deixa de somar.
+    Invalida o cache e retorna as inseridas.
+    """
+    inseridas = supabase.rpc("gravar_vendas_lote", {"p_vendas": vendas}).execute().data or []
+    for user_id in {venda["user_id"] for venda in vendas}:
+        cache_dados.invalidar("vendas", user_id)
+    return inseridas
+
+
+def reconstruir_resumo(supabase, user_id, ao_progredir=None):
+    """Apaga e recalcula o resumo de vendas do usuário. Retorna o número de linhas geradas.
+
+    Feito no banco, numa única transação (reconstruir_vendas_resumo, sql/001_vendas_resumo.sql):
+    vendas gravadas durante a reconstrução não se perdem nem contam duas vezes, e
+    quem lê vê o resumo antigo até o novo estar completo. `ao_progredir(etapa,
+    processadas, total)` é chamada antes de começar e pode interromper levantando
+    uma exceção.
+    """
+    if ao_progredir:
+        ao_progredir("reconstruindo", 0, None)
+    try:
+        linhas = supabase.rpc("reconstruir_vendas_resumo", {"p_user_id": user_id}).execute().data
+    finally:
+        cache_dados.invalidar("vendas", user_id)
+    return linhas or 0
+
+
+def tarefa_reconstruir_resumo(tarefa):
+    """Tarefa em segundo plano (services/tarefas.py): recalcula o resumo de vendas do usuário.
+
+    Pode ser cancelada até a chamada ao banco começar; depois, a transação vai até o fim.
+    """
+    def ao_progredir(etapa, processadas, total):
+        tarefa.progredir(processadas=processadas, total=total, resultado={"etapa": etapa})
+
+    return {"linhas": reconstruir_resumo(obter_supabase(), tarefa.user_id, ao_progredir)}
+
+
+def obter_resumo(supabase, user_id, granularidade="mes", dimensoes=("total",) + DIMENSOES, inicio=None, fim=None):
+    """Linhas do resumo do usuário (em cache junto com os dados de vendas).
+
+    `inicio`/`fim` (datas ISO) limitam o `periodo` no banco.
+    """
+    filtros = montar_filtros({"granularidade": granularidade, "dimensao": list(dimensoes)},
+                             ("periodo", inicio, fim))
+    formato = ("resumo", filtros)
+    encontrado, linhas = cache_dados.obter("vendas", user_id, formato)
+    if not encontrado:
+        geracao = cache_dados.geracao("vendas", user_id)
+        try:
+            linhas = buscar_todas(lambda: aplicar_filtros(supabase.table("vendas_resumo")
+                                                          .select("periodo,dimensao,chave,receita,num_vendas")
+                                                          .eq("user_id", user_id), filtros)
+                                  .order("periodo")
+                                  .order("dimensao")
+                                  .order("chave"))
+        except Exception as e:
+            print(f"Erro ao buscar resumo de vendas: {e}")
+            return []
+        cache_dados.guardar("vendas", user_id, formato, linhas, geracao=geracao)
+    return linhas
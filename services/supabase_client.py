@@ -0,0 +1,72 @@
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Supabase setup
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+# Configuração do pool HTTP (pode ser ajustada por variável de ambiente)
+SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() in ("1", "true", "sim")
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", 20))
+SUPABASE_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_KEEPALIVE_CONNECTIONS", 10))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", 60))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", 10))
+
+
+def criar_cliente():
+    """Cria um cliente Supabase novo com as configurações de conexão."""
+    # Importado aqui para não carregar o pacote supabase na inicialização
+    from supabase import ClientOptions
+    from services._cliente_pool import ClienteSupabase
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise ValueError("Variáveis de ambiente SUPABASE_URL e SUPABASE_KEY não configuradas.")
+    return ClienteSupabase.create(
+        SUPABASE_URL,
+        SUPABASE_KEY,
+        options=ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT),
+    )
+
+
+_clientes = {}
+_clientes_pid = None
+_lock = threading.Lock()
+
+
+def _cliente_do_processo(nome):
+    """Um cliente por nome e por processo (criado no primeiro uso, após o fork)."""
+    global _clientes_pid
+    with _lock:
+        if _clientes_pid != os.getpid():
+            # Processo novo (ex.: worker do gunicorn): não reaproveita conexões do pai
+            _clientes.clear()
+            _clientes_pid = os.getpid()
+        if nome not in _clientes:
+            _clientes[nome] = criar_cliente()
+        return _clientes[nome]
+
+
+def obter_supabase():
+    """Cliente compartilhado para acesso aos dados (tabelas e RPCs)."""
+    return _cliente_do_processo("dados")
+
+
+def obter_supabase_auth():
+    """Cliente compartilhado para login e cadastro.
+
+    Fica separado do cliente de dados porque o login troca o token da sessão
+    do cliente, o que alteraria as credenciais de todas as consultas.
+    """
+    return _cliente_do_processo("auth")
+
+
+def reiniciar_clientes():
+    """Descarta os clientes do processo (usado no post_fork do gunicorn)."""
+    global _clientes_pid
+    with _lock:
+        _clientes.clear()
+        _clientes_pid = os.getpid()
@@ -0,0 +1,371 @@
+"""Tarefas em segundo plano (importação de CSV, recálculos) com progresso consultável.
+
+As tarefas rodam num pool de threads limitado de cada processo, com no máximo
+MAX_TAREFAS_POR_USUARIO tarefas de um mesmo usuário ao mesmo tempo, para que
+um upload grande não ocupe o pool inteiro. O estado fica na tabela `tarefas`
+(sql/005_tarefas.sql), então o progresso pode ser consultado a partir de
+qualquer worker do gunicorn; o processo que executa a tarefa grava o
+progresso no máximo a cada INTERVALO_GRAVACAO_PROGRESSO segundos.
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from services.metricas import metricas
+from services.supabase_client import obter_supabase
+
+# Tarefas executando ao mesmo tempo em cada processo
+MAX_TAREFAS_SIMULTANEAS = int(os.getenv("BACKGROUND_JOB_WORKERS", 2))
+# Tarefas de um mesmo usuário executando ao mesmo tempo (as demais esperam na fila)
+MAX_TAREFAS_POR_USUARIO = int(os.getenv("BACKGROUND_JOB_MAX_PER_USER", 1))
+# Tarefas de um mesmo usuário aguardando na fila; acima disso o envio é recusado
+MAX_TAREFAS_NA_FILA_POR_USUARIO = int(os.getenv("BACKGROUND_JOB_MAX_QUEUED_PER_USER", 5))
+# Pausa entre lotes, para as threads das requisições não esperarem pelo GIL
+PAUSA_ENTRE_LOTES_MS = float(os.getenv("BACKGROUND_JOB_BATCH_PAUSE_MS", 5))
+# Intervalo mínimo (em segundos) entre gravações do progresso na tabela
+INTERVALO_GRAVACAO_PROGRESSO = float(os.getenv("BACKGROUND_JOB_PROGRESS_INTERVAL", 1))
+# Tarefa "executando" sem atualização há mais tempo que isso foi interrompida (ex.: worker reiniciado)
+TAREFA_SEM_SINAL_SEGUNDOS = int(os.getenv("BACKGROUND_JOB_STALE_SECONDS", 300))
+# Tarefas terminadas ficam na memória do processo por este tempo (depois, só na tabela)
+RETENCAO_TAREFAS_SEGUNDOS = int(os.getenv("BACKGROUND_JOB_RETENTION_SECONDS", 3600))
+# Arquivos enviados para as tarefas (apagados quando a tarefa termina)
+DIRETORIO_TAREFAS = os.getenv("BACKGROUND_JOB_DIR") or os.path.join(tempfile.gettempdir(), "tarefas")
+
+MAX_ERROS_TAREFA = 50
+ESTADOS_FINAIS = ("concluida", "erro", "cancelada")
+
+metricas.contador("app_tarefas_total", "Tarefas em segundo plano terminadas, por tipo e status.")
+metricas.contador("app_tarefas_duracao_segundos_total", "Tempo de execução das tarefas em segundo plano, por tipo.")
+
+
+class TarefaCancelada(Exception):
+    """Levantada por `Tarefa.progredir` quando o cancelamento foi pedido."""
+
+
+class LimiteTarefas(Exception):
+    """O usuário já tem tarefas demais na fila."""
+
+
+def _agora():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Tarefa:
+    """Uma tarefa e seu progresso (os mesmos campos da tabela `tarefas`)."""
+
+    def __init__(self, user_id, tipo, funcao, parametros, arquivo=None):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.tipo = tipo
+        self.status = "na_fila"
+        self.processadas = 0
+        self.total = None
+        self.erros = []
+        self.resultado = {}
+        self.mensagem = None
+        self.criada_em = self.atualizada_em = _agora()
+        self.cancelamento = threading.Event()
+        self.arquivo = arquivo
+        self._funcao = funcao
+        self._parametros = parametros
+        self._inicio = None
+        self._gravada_em = 0.0
+
+    def como_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "tipo": self.tipo,
+            "status": self.status,
+            "processadas": self.processadas,
+            "total": self.total,
+            "erros": list(self.erros),
+            "resultado": dict(self.resultado),
+            "mensagem": self.mensagem,
+            "criada_em": self.criada_em,
+            "atualizada_em": self.atualizada_em,
+        }
+
+    def progredir(self, processadas=None, total=None, resultado=None, erros=None):
+        """Atualiza o progresso (chamado pela função da tarefa entre um lote e outro).
+
+        Levanta TarefaCancelada se o cancelamento foi pedido, para a função parar ali.
+        """
+        if processadas is not None:
+            self.processadas = processadas
+        if total is not None:
+            self.total = total
+        if resultado is not None:
+            self.resultado = dict(resultado)
+        if erros is not None:
+            self.erros = list(erros[:MAX_ERROS_TAREFA])
+        self.atualizada_em = _agora()
+        _gravar(self)
+        if self.cancelamento.is_set():
+            raise TarefaCancelada()
+        if PAUSA_ENTRE_LOTES_MS:
+            time.sleep(PAUSA_ENTRE_LOTES_MS / 1000)
+
+
+# Tarefas deste processo (na fila, executando ou terminadas há pouco)
+_tarefas = {}
+_fila = deque()
+_executando = {}  # user_id -> quantidade
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def _obter_executor():
+    """Pool de threads do processo atual (recriado, com a fila vazia, após um fork)."""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=MAX_TAREFAS_SIMULTANEAS, thread_name_prefix="tarefa")
+        _executor_pid = os.getpid()
+        _tarefas.clear()
+        _fila.clear()
+        _executando.clear()
+    return _executor
+
+
+def _registro(tarefa):
+    """Colunas gravadas na tabela `tarefas`."""
+    dados = tarefa.como_dict()
+    return {campo: dados[campo] for campo in ("status", "processadas", "total", "erros", "resultado", "mensagem",
+                                              "atualizada_em")}
+
+
+def _gravar(tarefa, forcar=False):
+    """Grava o progresso na tabela (no máximo a cada INTERVALO_GRAVACAO_PROGRESSO, salvo `forcar`).
+
+    O cancelamento pedido por outro worker chega pela linha devolvida.
+    Erros de gravação não interrompem a tarefa.
+    """
+    agora = time.monotonic()
+    if not forcar and agora - tarefa._gravada_em < INTERVALO_GRAVACAO_PROGRESSO:
+        return
+    tarefa._gravada_em = agora
+    try:
+        linhas = obter_supabase().table("tarefas").update(_registro(tarefa)).eq("id", tarefa.id).execute().data or []
+        if linhas and linhas[0].get("cancelamento_pedido"):
+            tarefa.cancelamento.set()
+    except Exception as e:
+        print(f"Erro ao gravar o progresso da tarefa {tarefa.id}: {e}")
+
+
+def salvar_arquivo(arquivo, extensao=""):
+    """Salva um upload (FileStorage) para ser lido pela tarefa depois que a requisição terminar."""
+    os.makedirs(DIRETORIO_TAREFAS, exist_ok=True)
+    caminho = os.path.join(DIRETORIO_TAREFAS, uuid.uuid4().hex + extensao)
+    arquivo.save(caminho)
+    return caminho
+
+
+def _remover_arquivo(tarefa):
+    if tarefa.arquivo:
+        try:
+            os.remove(tarefa.arquivo)
+        except OSError:
+            pass
+        tarefa.arquivo = None
+
+
+def enviar_tarefa(user_id, tipo, funcao, arquivo=None, **parametros):
+    """Coloca `funcao(tarefa, **parametros)` na fila e retorna a tarefa sem esperar.
+
+    `funcao` retorna o resultado (dict) e deve chamar `tarefa.progredir(...)` entre os lotes.
+    `arquivo`, se informado, é apagado quando a tarefa termina (ou se o envio for recusado).
+    Levanta LimiteTarefas se o usuário já tem MAX_TAREFAS_NA_FILA_POR_USUARIO tarefas esperando.
+    """
+    tarefa = Tarefa(user_id, tipo, funcao, parametros, arquivo)
+    with _lock:
+        _obter_executor()
+        _descartar_antigas()
+        if sum(1 for na_fila in _fila if na_fila.user_id == user_id) >= MAX_TAREFAS_NA_FILA_POR_USUARIO:
+            _remover_arquivo(tarefa)
+            raise LimiteTarefas(f"Já existem {MAX_TAREFAS_NA_FILA_POR_USUARIO} tarefas aguardando. "
+                                "Aguarde a conclusão antes de enviar outra.")
+        _tarefas[tarefa.id] = tarefa
+
+    try:
+        obter_supabase().table("tarefas").insert({
+            **_registro(tarefa),
+            "id": tarefa.id,
+            "user_id": user_id,
+            "tipo": tipo,
+            "criada_em": tarefa.criada_em,
+            "cancelamento_pedido": False,
+        }).execute()
+    except Exception as e:
+        # Sem a tabela a tarefa ainda roda, mas o progresso só é visto por este processo
+        print(f"Erro ao registrar a tarefa {tarefa.id}: {e}")
+
+    with _lock:
+        _fila.append(tarefa)
+        _despachar()
+    return tarefa
+
+
+def _despachar():
+    """Inicia tarefas da fila enquanto houver vaga, respeitando o limite por usuário (com `_lock`)."""
+    executor = _obter_executor()
+    while _fila and sum(_executando.values()) < MAX_TAREFAS_SIMULTANEAS:
+        # A mais antiga cujo usuário ainda não atingiu o limite: um usuário com muitas
+        # tarefas não impede as dos outros de começarem
+        tarefa = next((na_fila for na_fila in _fila
+                       if _executando.get(na_fila.user_id, 0) < MAX_TAREFAS_POR_USUARIO), None)
+        if tarefa is None:
+            return
+        _fila.remove(tarefa)
+        _executando[tarefa.user_id] = _executando.get(tarefa.user_id, 0) + 1
+        executor.submit(_executar, tarefa)
+
+
+def _executar(tarefa):
+    try:
+        tarefa._inicio = time.perf_counter()
+        tarefa.status = "executando"
+        tarefa.atualizada_em = _agora()
+        _gravar(tarefa, forcar=True)
+        if tarefa.cancelamento.is_set():
+            raise TarefaCancelada()
+        resultado = tarefa._funcao(tarefa, **tarefa._parametros)
+        if resultado is not None:
+            tarefa.resultado = dict(resultado)
+        tarefa.status = "concluida"
+    except TarefaCancelada:
+        tarefa.status = "cancelada"
+        tarefa.mensagem = tarefa.mensagem or "Cancelada pelo usuário"
+    except Exception as e:
+        print(f"Erro na tarefa {tarefa.tipo} {tarefa.id}: {e}")
+        tarefa.status = "erro"
+        tarefa.mensagem = str(e)
+    finally:
+        _finalizar(tarefa)
+        with _lock:
+            _executando[tarefa.user_id] -= 1
+            if not _executando[tarefa.user_id]:
+                del _executando[tarefa.user_id]
+            _despachar()
+
+
+def _finalizar(tarefa):
+    _remover_arquivo(tarefa)
+    tarefa.atualizada_em = _agora()
+    _gravar(tarefa, forcar=True)
+    metricas.somar("app_tarefas_total", {"tipo": tarefa.tipo, "status": tarefa.status})
+    if tarefa._inicio is not None:
+        metricas.somar("app_tarefas_duracao_segundos_total", {"tipo": tarefa.tipo},
+                       time.perf_counter() - tarefa._inicio)
+
+
+def _descartar_antigas():
+    """Tira da memória as tarefas terminadas há mais de RETENCAO_TAREFAS_SEGUNDOS (com `_lock`)."""
+    limite = (datetime.now(timezone.utc) - timedelta(seconds=RETENCAO_TAREFAS_SEGUNDOS)).isoformat()
+    for tarefa_id, tarefa in list(_tarefas.items()):
+        if tarefa.status in ESTADOS_FINAIS and tarefa.atualizada_em < limite:
+            del _tarefas[tarefa_id]
+
+
+def _interrompida(registro):
+    """Tarefa que ficou "executando" sem sinal de vida: o processo que a executava terminou.
+
+    O sinal de vida é `atualizada_em`, gravado a cada `progredir`. Tarefas na fila
+    não contam: podem estar só esperando uma vaga no pool.
+    """
+    if registro.get("status") != "executando" or not registro.get("atualizada_em"):
+        return registro
+    atualizada_em = datetime.fromisoformat(str(registro["atualizada_em"]).replace("Z", "+00:00"))
+    if atualizada_em.tzinfo is None:
+        atualizada_em = atualizada_em.replace(tzinfo=timezone.utc)
+    if (datetime.now(timezone.utc) - atualizada_em).total_seconds() > TAREFA_SEM_SINAL_SEGUNDOS:
+        return {**registro, "status": "erro", "mensagem": "Tarefa interrompida (servidor reiniciado). Envie novamente."}
+    return registro
+
+
+COLUNAS_TAREFA = "id,user_id,tipo,status,processadas,total,erros,resultado,mensagem,criada_em,atualizada_em"
+
+
+def obter_tarefa(user_id, tarefa_id):
+    """Estado atual da tarefa do usuário (deste processo ou da tabela), ou None."""
+    tarefa = _tarefas.get(tarefa_id) if _executor_pid == os.getpid() else None
+    if tarefa is not None:
+        return tarefa.como_dict() if tarefa.user_id == user_id else None
+    try:
+        linhas = obter_supabase().table("tarefas").select(COLUNAS_TAREFA) \
+            .eq("id", tarefa_id).eq("user_id", user_id).limit(1).execute().data or []
+    except Exception as e:
+        print(f"Erro ao buscar a tarefa {tarefa_id}: {e}")
+        return None
+    return _interrompida(linhas[0]) if linhas else None
+
+
+def listar_tarefas(user_id, limite=20):
+    """Tarefas mais recentes do usuário."""
+    try:
+        linhas = obter_supabase().table("tarefas").select(COLUNAS_TAREFA) \
+            .eq("user_id", user_id).order("criada_em", desc=True).limit(limite).execute().data or []
+    except Exception as e:
+        print(f"Erro ao listar tarefas: {e}")
+        linhas = []
+    # As deste processo estão mais atualizadas que a tabela
+    locais = {tarefa.id: tarefa.como_dict() for tarefa in list(_tarefas.values()) if tarefa.user_id == user_id} \
+        if _executor_pid == os.getpid() else {}
+    tarefas = [locais.pop(linha["id"], None) or _interrompida(linha) for linha in linhas]
+    tarefas.extend(locais.values())
+    return sorted(tarefas, key=lambda tarefa: tarefa["criada_em"], reverse=True)[:limite]
+
+
+def cancelar_tarefa(user_id, tarefa_id):
+    """Pede o cancelamento. A tarefa para no próximo `progredir`; na fila, nem chega a começar.
+
+    Retorna o estado da tarefa (None se não existir).
+    """
+    with _lock:
+        tarefa = _tarefas.get(tarefa_id) if _executor_pid == os.getpid() else None
+        if tarefa is not None and tarefa.user_id != user_id:
+            return None
+        if tarefa is not None:
+            tarefa.cancelamento.set()
+            if tarefa in _fila:
+                _fila.remove(tarefa)
+                tarefa.status = "cancelada"
+                tarefa.mensagem = "Cancelada pelo usuário"
+            else:
+                tarefa = None
+    if tarefa is not None:
+        # Cancelada ainda na fila: termina aqui mesmo
+        _finalizar(tarefa)
+        return tarefa.como_dict()
+
+    try:
+        # Executando neste ou em outro processo: o pedido chega pela tabela (ou pelo evento, se for daqui)
+        obter_supabase().table("tarefas").update({"cancelamento_pedido": True}) \
+            .eq("id", tarefa_id).eq("user_id", user_id).execute()
+    except Exception as e:
+        print(f"Erro ao cancelar a tarefa {tarefa_id}: {e}")
+    return obter_tarefa(user_id, tarefa_id)
+
+
+def interromper_tarefas(espera_segundos=10):
+    """Cancela as tarefas deste processo e espera as que estão executando pararem (encerramento do worker)."""
+    with _lock:
+        if _executor_pid != os.getpid():
+            return
+        for tarefa in _tarefas.values():
+            if tarefa.status not in ESTADOS_FINAIS:
+                tarefa.mensagem = "Tarefa interrompida (servidor reiniciado). Envie novamente."
+                tarefa.cancelamento.set()
+        pendentes = list(_fila)
+        _fila.clear()
+    for tarefa in pendentes:
+        tarefa.status = "cancelada"
+        _finalizar(tarefa)
+    limite = time.monotonic() + espera_segundos
+    while _executando and time.monotonic() < limite:
+        time.sleep(0.1)
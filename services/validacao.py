@@ -0,0 +1,8 @@
+import re
+
+EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}(\.[a-zA-Z]{2,})*$')
+
+
+# Função para validar email (login, cadastro e edição de clientes)
+def is_valid_email(email):
+    return EMAIL_REGEX.match(email) is not None
@@ -0,0 +1,93 @@
+-- Resumo (rollup) diário e mensal das vendas de cada usuário.
+-- Cada venda soma em 8 linhas: (dia, mês) x (total, cliente, vendedor, pagamento).
+
+create table if not exists vendas_resumo (
+    user_id uuid not null,
+    granularidade text not null check (granularidade in ('dia', 'mes')),
+    periodo date not null,  -- dia da venda ou primeiro dia do mês
+    dimensao text not null check (dimensao in ('total', 'cliente', 'vendedor', 'pagamento')),
+    chave text not null default '',
+    receita numeric not null default 0,
+    num_vendas integer not null default 0,
+    primary key (user_id, granularidade, periodo, dimensao, chave)
+);
+
+-- Soma um lote de vendas ao resumo (usado a cada venda inserida).
+-- p_vendas: [{"user_id", "data_venda", "cliente", "vendedor", "pagamento", "valor"}, ...]
+-- A trava compartilhada por usuário espera uma reconstrução em andamento (reconstruir_vendas_resumo).
+create or replace function registrar_vendas_resumo(p_vendas jsonb)
+returns void
+language sql
+as $$
+    select pg_advisory_xact_lock_shared(hashtext('vendas_resumo'), hashtext(u.user_id))
+    from (select distinct e ->> 'user_id' as user_id from jsonb_array_elements(p_vendas) as e) u;
+
+    insert into vendas_resumo as r (user_id, granularidade, periodo, dimensao, chave, receita, num_vendas)
+    select
+        v.user_id,
+        g.granularidade,
+        case when g.granularidade = 'dia' then v.data_venda else date_trunc('month', v.data_venda)::date end,
+        d.dimensao,
+        d.chave,
+        coalesce(sum(v.valor), 0),
+        count(*)
+    from jsonb_to_recordset(p_vendas) as v(user_id uuid, data_venda date, cliente text, vendedor text, pagamento text, valor numeric)
+    cross join (values ('dia'), ('mes')) as g(granularidade)
+    cross join lateral (values
+        ('total', ''),
+        ('cliente', coalesce(v.cliente, '')),
+        ('vendedor', coalesce(v.vendedor, '')),
+        ('pagamento', coalesce(v.pagamento, ''))
+    ) as d(dimensao, chave)
+    where v.data_venda is not null
+    group by 1, 2, 3, 4, 5
+    on conflict (user_id, granularidade, periodo, dimensao, chave) do update
+        set receita = r.receita + excluded.receita,
+            num_vendas = r.num_vendas + excluded.num_vendas;
+$$;
+
+-- Recalcula do zero o resumo do usuário a partir das vendas, numa única transação
+-- (`flask reconstruir-resumo` e a tarefa em segundo plano). A trava exclusiva espera as
+-- gravações de vendas em andamento e segura as novas até o fim: nenhuma venda fica de
+-- fora nem é somada duas vezes, e quem lê vê o resumo antigo até o novo estar completo.
+-- Devolve o número de linhas geradas.
+create or replace function reconstruir_vendas_resumo(p_user_id uuid)
+returns integer
+language plpgsql
+as $$
+declare
+    v_linhas integer;
+begin
+    perform pg_advisory_xact_lock(hashtext('vendas_resumo'), hashtext(p_user_id::text));
+
+    delete from vendas_resumo where user_id = p_user_id;
+
+    insert into vendas_resumo (user_id, granularidade, periodo, dimensao, chave, receita, num_vendas)
+    select
+        v.user_id,
+        g.granularidade,
+        case when g.granularidade = 'dia' then v.data_venda::date else date_trunc('month', v.data_venda::date)::date end,
+        d.dimensao,
+        d.chave,
+        coalesce(sum(v.valor), 0),
+        count(*)
+    from vendas v
+    cross join (values ('dia'), ('mes')) as g(granularidade)
+    cross join lateral (values
+        ('total', ''),
+        ('cliente', coalesce(v.cliente, '')),
+        ('vendedor', coalesce(v.vendedor, '')),
+        ('pagamento', coalesce(v.pagamento, ''))
+    ) as d(dimensao, chave)
+    where v.user_id = p_user_id and v.data_venda is not null
+    group by 1, 2, 3, 4, 5;
+
+    get diagnostics v_linhas = row_count;
+    return v_linhas;
+end;
+$$;
+
+-- Preenche o resumo com as vendas já existentes: os gráficos passam a usar o resumo assim
+-- que ele tem alguma linha. Refeito do zero para cada usuário, então pode ser reaplicado.
+select reconstruir_vendas_resumo(u.user_id)
+from (select distinct user_id from vendas where user_id is not null) u;
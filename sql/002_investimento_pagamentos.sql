@@ -0,0 +1,95 @@
+-- Livro de pagamentos dos investimentos (somente inserção).
+-- Substitui a coluna JSON investimento.historico_pagamentos: registrar um pagamento
+-- passa a ser um insert no livro + atualização dos contadores do investimento.
+-- (investimento__c é o identificador gerado pelo banco; ajuste o tipo se não for uuid)
+
+create table if not exists investimento_pagamentos (
+    id bigint generated always as identity primary key,
+    investimento__c uuid not null references investimento (investimento__c) on delete cascade,
+    user_id uuid not null,
+    data date not null,
+    valor numeric not null,
+    origem text not null default 'app' check (origem in ('app', 'historico')),
+    criado_em timestamptz not null default now()
+);
+
+-- Histórico paginado de um investimento, por data (ver services/pagamentos_investimento.py)
+create index if not exists investimento_pagamentos_investimento_data_idx
+    on investimento_pagamentos (investimento__c, data, id);
+
+-- Total acumulado pago (o contador `pagamentos` já existe)
+alter table investimento add column if not exists total_pago numeric not null default 0;
+
+-- Registra um pagamento de forma atômica e devolve o investimento atualizado
+-- (nenhuma linha se o investimento não for do usuário).
+-- O update trava a linha do investimento, então pagamentos simultâneos não se sobrescrevem.
+create or replace function registrar_pagamento_investimento(
+    p_user_id uuid,
+    p_investimento uuid,
+    p_data date,
+    p_valor numeric,
+    p_sentido boolean default true,
+    p_encerrar boolean default false
+)
+returns setof investimento
+language sql
+as $$
+    with pagamento as (
+        insert into investimento_pagamentos (investimento__c, user_id, data, valor)
+        select investimento__c, user_id, p_data, p_valor
+        from investimento
+        where investimento__c = p_investimento and user_id = p_user_id
+        returning investimento__c, valor
+    )
+    update investimento i
+        set pagamentos = coalesce(i.pagamentos, 0) + 1,
+            total_pago = i.total_pago + pagamento.valor,
+            sentido = p_sentido,
+            encerrado = p_encerrar or not p_sentido
+    from pagamento
+    where i.investimento__c = pagamento.investimento__c
+    returning i.*;
+$$;
+
+-- Migração: copia o JSON de historico_pagamentos para o livro (origem = 'historico').
+-- Pode ser executada mais de uma vez: investimentos já migrados são ignorados.
+-- A coluna pode guardar o array direto ou uma string JSON (como o app gravava).
+-- Retorna o número de investimentos migrados. Também disponível via `flask migrar-pagamentos`.
+create or replace function migrar_historico_pagamentos(p_user_id uuid default null)
+returns integer
+language sql
+as $$
+    with pendentes as (
+        select i.investimento__c, i.user_id, i.historico_pagamentos::text::jsonb as historico
+        from investimento i
+        where (p_user_id is null or i.user_id = p_user_id)
+          and coalesce(i.historico_pagamentos::text, '') not in ('', '[]', '"[]"', 'null')
+          and not exists (
+              select 1 from investimento_pagamentos p
+              where p.investimento__c = i.investimento__c and p.origem = 'historico'
+          )
+    ), itens as (
+        select p.investimento__c, p.user_id, h.item, h.ordem
+        from pendentes p
+        cross join lateral jsonb_array_elements(
+            case when jsonb_typeof(p.historico) = 'string' then (p.historico #>> '{}')::jsonb else p.historico end
+        ) with ordinality as h(item, ordem)
+    ), inseridos as (
+        insert into investimento_pagamentos (investimento__c, user_id, data, valor, origem)
+        select investimento__c, user_id, (item ->> 'data')::date, (item ->> 'valor')::numeric, 'historico'
+        from itens
+        order by investimento__c, ordem
+        returning investimento__c, valor
+    ), totais as (
+        select investimento__c, sum(valor) as total from inseridos group by investimento__c
+    ), atualizados as (
+        update investimento i
+            set total_pago = i.total_pago + totais.total
+        from totais
+        where i.investimento__c = totais.investimento__c
+        returning 1
+    )
+    select count(*)::integer from atualizados;
+$$;
+
+select migrar_historico_pagamentos();
@@ -0,0 +1,47 @@
+-- Registro de vários pagamentos de investimentos numa única chamada (fechamento do mês).
+-- p_pagamentos: [{"investimento__c", "data", "valor", "sentido", "encerrar"}, ...]
+-- Equivale a aplicar os pagamentos um a um, na ordem do array: cada um entra no livro,
+-- os contadores somam o lote e sentido/encerrado ficam com o último pagamento de cada
+-- investimento. Itens de investimentos que não são do usuário são ignorados.
+-- Devolve os investimentos atualizados.
+create or replace function registrar_pagamentos_investimento(p_user_id uuid, p_pagamentos jsonb)
+returns setof investimento
+language sql
+as $$
+    with itens as (
+        select
+            (e.item ->> 'investimento__c')::uuid as investimento__c,
+            (e.item ->> 'data')::date as data,
+            (e.item ->> 'valor')::numeric as valor,
+            coalesce((e.item ->> 'sentido')::boolean, true) as sentido,
+            coalesce((e.item ->> 'encerrar')::boolean, false) as encerrar,
+            e.ordem
+        from jsonb_array_elements(p_pagamentos) with ordinality as e(item, ordem)
+    ), validos as (
+        select itens.*
+        from itens
+        join investimento i on i.investimento__c = itens.investimento__c and i.user_id = p_user_id
+    ), inseridos as (
+        insert into investimento_pagamentos (investimento__c, user_id, data, valor)
+        select investimento__c, p_user_id, data, valor
+        from validos
+        order by ordem
+    ), por_investimento as (
+        select
+            investimento__c,
+            count(*) as quantidade,
+            sum(valor) as total,
+            (array_agg(sentido order by ordem desc))[1] as sentido,
+            (array_agg(encerrar or not sentido order by ordem desc))[1] as encerrado
+        from validos
+        group by investimento__c
+    )
+    update investimento i
+        set pagamentos = coalesce(i.pagamentos, 0) + p.quantidade,
+            total_pago = i.total_pago + p.total,
+            sentido = p.sentido,
+            encerrado = p.encerrado
+    from por_investimento p
+    where i.investimento__c = p.investimento__c
+    returning i.*;
+$$;
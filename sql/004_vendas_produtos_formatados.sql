@@ -0,0 +1,31 @@
+-- Resumo legível dos produtos da venda, calculado uma vez na gravação
+-- (mesmo texto de formatar_produtos em routes/sales.py), em vez de a cada exibição.
+
+alter table vendas add column if not exists produtos_formatados text;
+
+-- Preenche as vendas antigas: listas de produtos (jsonb) são formatadas como no app;
+-- vendas gravadas só com o nome do produto (texto) mantêm o próprio nome.
+do $$
+begin
+    if (select data_type from information_schema.columns
+        where table_name = 'vendas' and column_name = 'produtos') = 'jsonb' then
+        update vendas v
+            set produtos_formatados = coalesce((
+                select string_agg(
+                    format('%s - Quantidade: %s - Desconto: %s%% - Preço: R$%s',
+                           p ->> 'nome', p ->> 'quantidade', p ->> 'desconto', p ->> 'preco'),
+                    ', ' order by ordem)
+                from jsonb_array_elements(v.produtos) with ordinality as e(p, ordem)
+                where p ?& array['nome', 'quantidade', 'desconto', 'preco']
+            ), '')
+        where v.produtos_formatados is null and jsonb_typeof(v.produtos) = 'array';
+
+        update vendas
+            set produtos_formatados = produtos #>> '{}'
+        where produtos_formatados is null and jsonb_typeof(produtos) = 'string';
+    else
+        update vendas
+            set produtos_formatados = produtos::text
+        where produtos_formatados is null and produtos is not null;
+    end if;
+end $$;
@@ -0,0 +1,23 @@
+-- Tarefas em segundo plano (importação de CSV, recálculos) e seu progresso.
+-- A tarefa roda num worker do gunicorn, que grava o progresso aqui; qualquer
+-- worker responde à consulta (ver services/tarefas.py). O cancelamento pedido
+-- em outro worker chega ao que executa pela coluna cancelamento_pedido.
+
+create table if not exists tarefas (
+    id uuid primary key,
+    user_id uuid not null,
+    tipo text not null,
+    status text not null default 'na_fila'
+        check (status in ('na_fila', 'executando', 'concluida', 'erro', 'cancelada')),
+    processadas integer not null default 0,
+    total integer,
+    erros jsonb not null default '[]',
+    resultado jsonb not null default '{}',
+    mensagem text,
+    cancelamento_pedido boolean not null default false,
+    criada_em timestamptz not null default now(),
+    atualizada_em timestamptz not null default now()
+);
+
+-- Tarefas recentes do usuário (GET /api/tarefas)
+create index if not exists tarefas_user_criada_idx on tarefas (user_id, criada_em desc);
@@ -0,0 +1,6 @@
+-- Identificador da venda gerado pela aplicação, para gravação em lotes (services/buffer_vendas.py).
+-- Um lote repetido (nova tentativa ou reenvio do disco) ignora as vendas que já entraram.
+
+alter table vendas add column if not exists id_envio uuid default gen_random_uuid();
+
+create unique index if not exists vendas_id_envio_idx on vendas (id_envio);
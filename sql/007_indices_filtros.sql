@@ -0,0 +1,31 @@
+-- Índices para os filtros aplicados no banco (services/filtros.py): período em data_venda,
+-- vendedor/cliente/pagamento (eq ou in), situação dos investimentos e as listagens por cursor.
+-- Todas as consultas filtram por user_id, por isso ele é sempre a primeira coluna.
+-- Em tabelas grandes, prefira criar cada índice com `create index concurrently` fora de uma transação.
+
+-- Listagem de vendas por data (com ou sem período) e carga de um período em colunas:
+-- where user_id = ? [and data_venda >= ? and data_venda <= ?] order by data_venda desc, id desc
+create index if not exists vendas_user_data_idx on vendas (user_id, data_venda, id);
+
+-- Os mesmos filtros combinados com vendedor, cliente ou forma de pagamento
+-- (um valor vira `=`, vários viram `= any(...)`, e ambos usam o índice)
+create index if not exists vendas_user_vendedor_data_idx on vendas (user_id, vendedor, data_venda, id);
+create index if not exists vendas_user_cliente_data_idx on vendas (user_id, cliente, data_venda, id);
+create index if not exists vendas_user_pagamento_data_idx on vendas (user_id, pagamento, data_venda, id);
+
+-- Demais ordenações da listagem e leitura completa em lotes (order by id)
+create index if not exists vendas_user_valor_idx on vendas (user_id, valor, id);
+create index if not exists vendas_user_id_idx on vendas (user_id, id);
+
+-- Resumo de vendas por período: a chave primária de vendas_resumo
+-- (user_id, granularidade, periodo, dimensao, chave) já atende
+-- where user_id = ? and granularidade = ? and periodo between ? and ? and dimensao in (...)
+
+-- Situação dos investimentos: encerrado = true, ou (encerrado is null or encerrado is false) para os ativos
+create index if not exists investimento_user_encerrado_idx on investimento (user_id, encerrado);
+
+-- Exportação de pagamentos por período (order by id dentro do intervalo)
+create index if not exists investimento_pagamentos_user_data_idx on investimento_pagamentos (user_id, data, id);
+
+-- Listagem de clientes filtrada por ativo
+create index if not exists clientes_user_ativo_idx on clientes (user_id, ativo, id);
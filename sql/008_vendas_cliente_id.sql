@@ -0,0 +1,24 @@
+-- Liga cada venda ao cliente pelo identificador (clientes.client__c), e não só pelo nome.
+-- A análise de clientes (services/analise_clientes.py) junta vendas e clientes por essa coluna;
+-- vendas sem cliente_id ainda são ligadas pelo nome, quando ele é de um único cliente.
+-- (client__c é o identificador gerado pelo banco; ajuste o tipo se não for uuid)
+
+alter table vendas add column if not exists cliente_id uuid;
+
+-- Preenche as vendas existentes cujo nome de cliente é único entre os clientes do usuário
+update vendas v
+set cliente_id = c.client__c
+from clientes c
+where v.cliente_id is null
+  and c.user_id = v.user_id
+  and c.nome = v.cliente
+  and not exists (
+      select 1 from clientes outro
+      where outro.user_id = c.user_id and outro.nome = c.nome and outro.client__c <> c.client__c
+  );
+
+-- Vendas de um cliente (e a leitura em lotes da análise, por user_id)
+create index if not exists vendas_user_cliente_id_idx on vendas (user_id, cliente_id);
+
+-- Cliente de uma nova venda (routes/sales.py): busca pontual pelo id ou, em formulários antigos, pelo nome
+create index if not exists clientes_user_nome_idx on clientes (user_id, nome);
@@ -0,0 +1,23 @@
+-- Versão dos dados de cada (usuário, tabela), compartilhada pelos workers do gunicorn.
+-- Cada worker guarda consultas em cache na própria memória (services/cache_dados.py).
+-- A escrita incrementa a versão, e os demais workers comparam as versões no início
+-- de cada requisição: a próxima leitura, em qualquer worker, já vê a escrita.
+
+create table if not exists cache_versoes (
+    user_id uuid not null,
+    tabela text not null,
+    versao bigint not null default 0,
+    primary key (user_id, tabela)
+);
+
+-- Incrementa (ou cria) as versões das tabelas do usuário e retorna as novas versões.
+create or replace function incrementar_versoes_cache(p_user_id uuid, p_tabelas text[])
+returns table (tabela text, versao bigint)
+language sql
+as $$
+    insert into cache_versoes as c (user_id, tabela, versao)
+    select p_user_id, t, 1 from unnest(p_tabelas) as t
+    on conflict (user_id, tabela) do update
+        set versao = c.versao + 1
+    returning c.tabela, c.versao;
+$$;
@@ -0,0 +1,29 @@
+-- Gravação de um lote do buffer de vendas (services/buffer_vendas.py) e soma ao resumo na mesma transação.
+-- p_vendas: as vendas montadas em routes/sales.py, cada uma com o seu id_envio (sql/006_vendas_id_envio.sql).
+-- Vendas com id_envio já gravado são ignoradas e não somam de novo ao resumo: repetir um lote
+-- cuja resposta se perdeu não duplica vendas nem deixa o resumo sem elas.
+-- Devolve as vendas inseridas.
+create or replace function gravar_vendas_lote(p_vendas jsonb)
+returns setof vendas
+language plpgsql
+as $$
+declare
+    v_inseridas vendas[];
+begin
+    with inseridas as (
+        insert into vendas (user_id, id_envio, produtos, produtos_formatados, cliente_id, cliente,
+                            vendedor, data_venda, pagamento, quantidade, valor)
+        select user_id, id_envio, produtos, produtos_formatados, cliente_id, cliente,
+               vendedor, data_venda, pagamento, quantidade, valor
+        from jsonb_populate_recordset(null::vendas, p_vendas)
+        on conflict (id_envio) do nothing
+        returning *
+    )
+    select coalesce(array_agg(inseridas), '{}') into v_inseridas from inseridas;
+
+    if cardinality(v_inseridas) > 0 then
+        perform registrar_vendas_resumo(to_jsonb(v_inseridas));
+    end if;
+    return query select * from unnest(v_inseridas);
+end;
+$$;
@@ -0,0 +1,19 @@
+-- Data do último pagamento de cada investimento do usuário (previsão de fluxo de caixa,
+-- services/previsao_financeira.py): a próxima parcela vence um intervalo depois dela.
+-- Uma linha por investimento com pagamentos, lida pelo índice (investimento__c, data, id).
+create or replace function ultimos_pagamentos_investimentos(p_user_id uuid)
+returns table (investimento__c uuid, data date)
+language sql
+stable
+as $$
+    select i.investimento__c, u.data
+    from investimento i
+    cross join lateral (
+        select p.data
+        from investimento_pagamentos p
+        where p.investimento__c = i.investimento__c
+        order by p.data desc
+        limit 1
+    ) u
+    where i.user_id = p_user_id;
+$$;
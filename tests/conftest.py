@@ -0,0 +1,33 @@
+"""Fixtures dos testes: a aplicação usando o banco falso dos benchmarks (benchmarks/supabase_falso.py)."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://supabase.invalido")
+os.environ.setdefault("SUPABASE_KEY", "chave-de-teste")
+
+from benchmarks.bench_rotas import instalar_banco, limpar_caches  # noqa: E402
+from benchmarks.supabase_falso import SupabaseFalso  # noqa: E402
+
+
+@pytest.fixture
+def banco():
+    banco = SupabaseFalso()
+    instalar_banco(banco)
+    limpar_caches()
+    yield banco
+    limpar_caches()
+
+
+@pytest.fixture
+def cliente(banco):
+    """Cliente de teste do Flask já autenticado como o usuário "u"."""
+    from main import app
+
+    app.config["TESTING"] = True
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["user_id"] = "u"
+    return cliente
@@ -0,0 +1,54 @@
+import uuid
+
+from services.buffer_vendas import BufferVendas
+
+
+def _venda(user_id="u", valor=100.0):
+    return {"user_id": user_id, "id_envio": str(uuid.uuid4()), "data_venda": "2024-06-15", "cliente": "Ana",
+            "vendedor": "Marina", "pagamento": "Pix", "quantidade": 1, "valor": valor}
+
+
+def _buffer(tmp_path):
+    # Prazo longo: só as chamadas a `descarregar` do teste gravam
+    return BufferVendas(atraso_ms=60_000, diretorio_falhas=str(tmp_path))
+
+
+def _total_no_resumo(banco):
+    return [(linha["num_vendas"], linha["receita"]) for linha in banco.linhas("vendas_resumo", "u")
+            if linha["granularidade"] == "dia" and linha["dimensao"] == "total"]
+
+
+def test_resposta_perdida_nao_deixa_o_resumo_sem_a_venda(banco, tmp_path):
+    gravar = banco.rpc_gravar_vendas_lote
+    tentativas = []
+
+    def gravar_e_perder_a_resposta(p_vendas):
+        tentativas.append(len(p_vendas))
+        inseridas = gravar(p_vendas)
+        if len(tentativas) == 1:
+            raise ConnectionError("connection reset")
+        return inseridas
+
+    banco.rpc_gravar_vendas_lote = gravar_e_perder_a_resposta
+    buffer = _buffer(tmp_path)
+    buffer.adicionar(_venda(valor=100.0))
+    buffer.adicionar(_venda(valor=50.0))
+    buffer.descarregar()
+
+    assert tentativas == [2, 2]
+    assert len(banco.linhas("vendas", "u")) == 2
+    assert _total_no_resumo(banco) == [(2, 150.0)]
+    assert buffer.falhas == 0
+
+
+def test_listagem_grava_so_as_vendas_do_usuario(banco, tmp_path):
+    buffer = _buffer(tmp_path)
+    buffer.adicionar(_venda("u"))
+    buffer.adicionar(_venda("v"))
+    buffer.adicionar(_venda("u"))
+
+    buffer.descarregar("u")
+
+    assert len(banco.linhas("vendas", "u")) == 2
+    assert banco.linhas("vendas", "v") == []
+    assert buffer.pendentes() == 1
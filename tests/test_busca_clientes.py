@@ -0,0 +1,26 @@
+from benchmarks.tenants_sinteticos import gerar_tenant
+from services import busca_clientes
+from services.cache_dados import cache_dados
+
+
+def _sem_trava(funcao):
+    """Falha se a trava dos índices estiver presa durante a chamada (que pode ir ao banco)."""
+    def chamada(*args, **kwargs):
+        assert not busca_clientes._lock.locked()
+        return funcao(*args, **kwargs)
+    return chamada
+
+
+def test_versoes_do_cache_sao_lidas_e_publicadas_fora_da_trava(banco, monkeypatch):
+    gerar_tenant(banco, "u", vendas=0, clientes=20, investimentos=0)
+    monkeypatch.setattr(cache_dados, "geracao", _sem_trava(cache_dados.geracao))
+    monkeypatch.setattr(cache_dados, "invalidar", _sem_trava(cache_dados.invalidar))
+
+    indice = busca_clientes.obter_indice(banco, "u")
+    assert busca_clientes.obter_indice(banco, "u") is indice
+
+    busca_clientes.registrar_alteracao("u", [{"client__c": "novo", "nome": "Zuleica Prado"}])
+
+    # A alteração foi aplicada ao índice em memória, que continua valendo
+    assert busca_clientes.obter_indice(banco, "u") is indice
+    assert busca_clientes.buscar_clientes(banco, "u", "Zuleica")["linhas"][0]["client__c"] == "novo"
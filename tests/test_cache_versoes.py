@@ -0,0 +1,124 @@
+"""Invalidação do cache entre processos (como os workers do gunicorn) pelas versões compartilhadas."""
+import multiprocessing
+
+import pytest
+
+from services.cache_dados import CacheDados, VersoesSupabase
+
+
+class VersoesCompartilhadas:
+    """Mesma interface de VersoesSupabase, com as versões num dict de um multiprocessing.Manager."""
+
+    def __init__(self, versoes, lock):
+        self._versoes = versoes
+        self._lock = lock
+
+    def publicar(self, tabelas, user_id):
+        with self._lock:
+            for tabela in tabelas:
+                self._versoes[(tabela, user_id)] = self._versoes.get((tabela, user_id), 0) + 1
+            return {tabela: self._versoes[(tabela, user_id)] for tabela in tabelas}
+
+    def ler(self, user_id):
+        return {tabela: versao for (tabela, usuario), versao in self._versoes.items() if usuario == user_id}
+
+
+def worker(versoes, banco, pedidos, respostas):
+    """Um "worker": lê `banco` pelo próprio cache e escreve invalidando o cache, como as rotas."""
+    cache = CacheDados(ttl=3600, versoes=versoes)
+    for operacao, tabela, valor in iter(pedidos.get, None):
+        cache.sincronizar("u")  # início da requisição
+        if operacao == "escrever":
+            banco[tabela] = valor
+            cache.invalidar(tabela, "u")
+            respostas.put(valor)
+            continue
+        encontrado, lido = cache.obter(tabela, "u", "todos")
+        if not encontrado:
+            lido = banco[tabela]
+            cache.guardar(tabela, "u", "todos", lido)
+        respostas.put(lido)
+
+
+@pytest.fixture
+def workers():
+    contexto = multiprocessing.get_context("spawn")
+    with contexto.Manager() as gerenciador:
+        banco = gerenciador.dict({"clientes": "v1"})
+
+        def iniciar(compartilhadas):
+            versoes = VersoesCompartilhadas(gerenciador.dict(), gerenciador.Lock()) if compartilhadas else None
+            processos = []
+            for _ in range(2):
+                pedidos, respostas = contexto.Queue(), contexto.Queue()
+                processo = contexto.Process(target=worker, args=(versoes, banco, pedidos, respostas), daemon=True)
+                processo.start()
+                processos.append((processo, pedidos, respostas))
+
+            def requisicao(indice, operacao, tabela="clientes", valor=None):
+                _, pedidos, respostas = processos[indice]
+                pedidos.put((operacao, tabela, valor))
+                return respostas.get(timeout=30)
+
+            requisicao.processos = processos
+            requisicao.versoes = versoes  # o objeto do Manager existe enquanto houver referência no processo pai
+            return requisicao
+
+        criados = []
+        yield lambda compartilhadas=True: criados.append(iniciar(compartilhadas)) or criados[-1]
+        for requisicao in criados:
+            for processo, pedidos, _ in requisicao.processos:
+                pedidos.put(None)
+                processo.join(10)
+
+
+def test_escrita_em_um_processo_invalida_o_cache_do_outro(workers):
+    requisicao = workers()
+    assert requisicao(0, "ler") == "v1"
+    assert requisicao(1, "ler") == "v1"
+
+    requisicao(1, "escrever", valor="v2")
+
+    assert requisicao(0, "ler") == "v2"
+    assert requisicao(1, "ler") == "v2"
+
+
+def test_sem_versoes_compartilhadas_o_outro_processo_le_dados_antigos(workers):
+    requisicao = workers(compartilhadas=False)
+    assert requisicao(0, "ler") == "v1"
+
+    requisicao(1, "escrever", valor="v2")
+
+    assert requisicao(0, "ler") == "v1"
+
+
+def test_versoes_no_supabase(banco):
+    cache_a, cache_b = CacheDados(versoes=VersoesSupabase()), CacheDados(versoes=VersoesSupabase())
+    cache_a.guardar("vendas", "u", "todas", ["antiga"])
+    cache_a.sincronizar("u")
+
+    cache_b.invalidar_tabelas(("vendas", "clientes"), "u")
+    assert cache_a.obter("vendas", "u", "todas") == (True, ["antiga"])
+    cache_a.sincronizar("u")
+
+    assert cache_a.obter("vendas", "u", "todas") == (False, None)
+    assert {linha["tabela"]: linha["versao"] for linha in banco.linhas("cache_versoes", "u")} == \
+        {"vendas": 1, "clientes": 1}
+    assert banco.chamadas == 3  # duas leituras das versões e uma publicação para as duas tabelas
+
+
+def test_requisicao_sincroniza_so_ao_usar_o_cache(banco, cliente):
+    from services.cache_dados import cache_dados
+
+    cache_dados.guardar("produtos", "u", ("catalogo",), "antigo")
+    banco.rpc("incrementar_versoes_cache", {"p_user_id": "u", "p_tabelas": ["produtos"]}).execute()
+    banco.zerar_contadores()
+
+    cliente.get("/api/tarefas")  # não lê o cache: sem consulta às versões
+    assert banco.linhas("cache_versoes", "u") and cache_dados.obter("produtos", "u", ("catalogo",))[0]
+    chamadas_sem_cache = banco.chamadas
+
+    cliente.post("/sales", data={"cliente": "Ana", "produto": "Camiseta", "quantidade": "1"})
+    assert banco.chamadas > chamadas_sem_cache
+    # O catálogo antigo foi descartado e recarregado do banco
+    assert cache_dados.obter("produtos", "u", ("catalogo",))[1] != "antigo"
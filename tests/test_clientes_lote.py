@@ -0,0 +1,60 @@
+from benchmarks.tenants_sinteticos import gerar_tenant
+from services.clientes_em_lote import validar_campos
+
+
+def test_email_invalido_e_recusado():
+    assert validar_campos({"email": "fulano@"}) == (None, "Email inválido")
+    assert validar_campos({"email": " fulano@exemplo.com "}) == ({"email": "fulano@exemplo.com"}, None)
+    assert validar_campos({"email": ""}) == ({"email": ""}, None)
+
+
+def test_edicao_em_lote_aponta_a_linha_com_email_invalido(banco, cliente):
+    gerar_tenant(banco, "u", vendas=0, clientes=3, investimentos=0)
+    clientes = banco.linhas("clientes", "u")
+    emails = [linha.get("email") for linha in clientes]
+
+    resposta = cliente.post("/api/clientes/lote", json={"operacao": "editar", "edicoes": [
+        {"client__c": clientes[0]["client__c"], "email": "ana@exemplo.com"},
+        {"client__c": clientes[1]["client__c"], "email": "sem-arroba.com"},
+    ]})
+
+    assert resposta.status_code == 400
+    assert resposta.get_json() == {"error": "Edição 1: Email inválido"}
+    assert [linha.get("email") for linha in banco.linhas("clientes", "u")] == emails
+
+
+def test_edicao_em_lote_publica_a_versao_do_cache_uma_vez(banco, cliente, monkeypatch):
+    gerar_tenant(banco, "u", vendas=0, clientes=3, investimentos=0)
+    clientes = banco.linhas("clientes", "u")
+    rpc, publicacoes = banco.rpc, []
+
+    def contar(funcao, parametros=None):
+        publicacoes.append(funcao)
+        return rpc(funcao, parametros)
+
+    monkeypatch.setattr(banco, "rpc", contar)
+
+    resposta = cliente.post("/api/clientes/lote", json={"operacao": "editar", "edicoes": [
+        {"client__c": linha["client__c"], "email": f"cliente{i}@exemplo.com"}
+        for i, linha in enumerate(clientes)
+    ]})
+
+    assert resposta.status_code == 200
+    assert publicacoes == ["incrementar_versoes_cache"]
+    assert [linha["email"] for linha in banco.linhas("clientes", "u")] == [
+        f"cliente{i}@exemplo.com" for i in range(3)]
+
+
+def test_edicao_sem_sessao_e_recusada(banco, cliente):
+    gerar_tenant(banco, "u", vendas=0, clientes=1, investimentos=0)
+    with cliente.session_transaction() as sessao:
+        sessao.clear()
+    formulario = {"client_id": banco.linhas("clientes", "u")[0]["client__c"], "nome": "Ana"}
+
+    resposta = cliente.post("/edit_cliente", data=formulario, headers={"Accept": "application/json"})
+    assert resposta.status_code == 401
+    assert resposta.get_json() == {"error": "Usuário não autenticado"}
+
+    resposta = cliente.post("/edit_cliente", data=formulario)
+    assert resposta.status_code == 302
+    assert resposta.headers["Location"].endswith("/login")
@@ -0,0 +1,53 @@
+from benchmarks.tenants_sinteticos import gerar_tenant
+from services.cache_dados import cache_dados
+
+GRAFICO = "/api/graficos/vendas_mensais?periodo=ano"
+
+
+def test_304_sem_carregar_os_dados(banco, cliente):
+    gerar_tenant(banco, "u", vendas=50, clientes=10, investimentos=0)
+    primeira = cliente.get(GRAFICO)
+    etag = primeira.headers["ETag"]
+    banco.zerar_contadores()
+
+    segunda = cliente.get(GRAFICO, headers={"If-None-Match": etag})
+
+    assert primeira.status_code == 200
+    assert segunda.status_code == 304
+    assert segunda.headers["ETag"] == etag
+    # Só a leitura das versões compartilhadas
+    assert banco.chamadas == 1
+
+
+def test_etag_fraco_da_resposta_comprimida_tambem_vale(banco, cliente):
+    gerar_tenant(banco, "u", vendas=50, clientes=10, investimentos=0)
+    etag = cliente.get(GRAFICO, headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    resposta = cliente.get(GRAFICO, headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+
+    assert etag.startswith("W/")
+    assert resposta.status_code == 304
+
+
+def test_etag_muda_com_uma_escrita_e_com_os_parametros(banco, cliente):
+    gerar_tenant(banco, "u", vendas=50, clientes=10, investimentos=0)
+    etag = cliente.get(GRAFICO).headers["ETag"]
+
+    assert cliente.get("/api/graficos/vendas_mensais?periodo=30d").headers["ETag"] != etag
+
+    cache_dados.invalidar("vendas", "u")
+    resposta = cliente.get(GRAFICO, headers={"If-None-Match": etag})
+
+    assert resposta.status_code == 200
+    assert resposta.headers["ETag"] != etag
+
+
+def test_sem_versoes_compartilhadas_usa_o_hash_do_conteudo(banco, cliente, monkeypatch):
+    gerar_tenant(banco, "u", vendas=50, clientes=10, investimentos=0)
+    monkeypatch.setattr(cache_dados, "versoes", None)
+    etag = cliente.get(GRAFICO).headers["ETag"]
+
+    resposta = cliente.get(GRAFICO, headers={"If-None-Match": etag})
+
+    assert not etag.startswith("W/")
+    assert resposta.status_code == 304
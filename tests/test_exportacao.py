@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+
+import pytest
+
+load_workbook = pytest.importorskip("openpyxl").load_workbook
+
+PRODUTOS = [{"nome": "Camiseta", "quantidade": 2, "desconto": 0, "preco": 49.9}]
+
+
+def _inserir_venda(banco):
+    banco.inserir("vendas", {
+        "user_id": "u",
+        "cliente": "Ana",
+        "vendedor": "Marina",
+        "data_venda": "2024-06-15",
+        "pagamento": "Pix",
+        "produtos": PRODUTOS,
+        "produtos_formatados": "Camiseta - Quantidade: 2 - Desconto: 0% - Preço: R$49.9",
+        "quantidade": 2,
+        "valor": 99.8,
+    })
+
+
+def test_exporta_produtos_em_csv_como_json(banco, cliente):
+    _inserir_venda(banco)
+    resposta = cliente.get("/exportar/vendas?formato=csv")
+
+    assert resposta.status_code == 200
+    assert resposta.headers["Content-Type"] == "text/csv; charset=utf-8"
+    linhas = list(csv.DictReader(io.StringIO(resposta.data.decode("utf-8-sig"))))
+    assert len(linhas) == 1
+    assert json.loads(linhas[0]["produtos"]) == PRODUTOS
+    assert linhas[0]["valor"] == "99.8"
+
+
+def test_exporta_produtos_em_xlsx_como_json(banco, cliente):
+    _inserir_venda(banco)
+    resposta = cliente.get("/exportar/vendas?formato=xlsx")
+
+    assert resposta.status_code == 200
+    aba = load_workbook(io.BytesIO(resposta.data)).active
+    cabecalho, linha = [[celula.value for celula in linha] for linha in aba.iter_rows()]
+    venda = dict(zip(cabecalho, linha))
+    assert json.loads(venda["produtos"]) == PRODUTOS
+    assert venda["cliente"] == "Ana"
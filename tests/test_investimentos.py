@@ -0,0 +1,127 @@
+from benchmarks.tenants_sinteticos import gerar_tenant
+
+
+class ErroPostgrest(Exception):
+    """Como o APIError do postgrest: o banco respondeu recusando a operação."""
+
+    code = "23514"
+
+
+def _investimento(banco):
+    gerar_tenant(banco, "u", vendas=0, clientes=0, investimentos=2, pagamentos=1)
+    return banco.linhas("investimento", "u")[0]
+
+
+def _pagamento(investimento, **campos):
+    return {"investment_id": investimento["investimento__c"], "data_pagamento": "2024-06-15",
+            "valor_pagamento": "150.00", **campos}
+
+
+def test_pagamento_registrado(banco, cliente):
+    investimento = _investimento(banco)
+
+    resposta = cliente.post("/atualizar_investimento", json=_pagamento(investimento))
+
+    assert resposta.status_code == 200
+    assert banco.linhas("investimento", "u")[0]["pagamentos"] == 2
+
+
+def test_pagamento_com_data_invalida_responde_400(banco, cliente):
+    investimento = _investimento(banco)
+
+    resposta = cliente.post("/atualizar_investimento", json=_pagamento(investimento, data_pagamento="15/06/2024"))
+
+    assert resposta.status_code == 400
+    assert resposta.get_json() == {"error": "Data do pagamento inválida"}
+    assert banco.linhas("investimento", "u")[0]["pagamentos"] == 1
+
+
+def test_pagamento_recusado_pelo_banco_responde_409(banco, cliente, monkeypatch):
+    investimento = _investimento(banco)
+
+    def recusar(*args, **kwargs):
+        raise ErroPostgrest("new row violates check constraint")
+
+    monkeypatch.setattr(banco, "rpc_registrar_pagamento_investimento", recusar)
+    resposta = cliente.post("/atualizar_investimento", json=_pagamento(investimento))
+
+    assert resposta.status_code == 409
+    assert resposta.get_json() == {"error": "Erro ao registrar pagamento"}
+
+
+def test_banco_indisponivel_responde_503(banco, cliente, monkeypatch):
+    investimento = _investimento(banco)
+
+    def falhar(*args, **kwargs):
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(banco, "rpc_registrar_pagamento_investimento", falhar)
+    resposta = cliente.post("/atualizar_investimento", json=_pagamento(investimento))
+
+    assert resposta.status_code == 503
+    assert "error" in resposta.get_json()
+
+
+def test_id_invalido_responde_400_sem_chamar_o_banco(banco, cliente):
+    _investimento(banco)
+    banco.zerar_contadores()
+
+    resposta = cliente.post("/atualizar_investimento", json={
+        "investment_id": "42", "data_pagamento": "2024-06-15", "valor_pagamento": "10"})
+
+    assert resposta.status_code == 400
+    assert resposta.get_json() == {"error": "ID do investimento inválido"}
+    assert banco.chamadas == 0
+
+
+def test_lote_com_um_id_invalido_registra_os_demais(banco, cliente):
+    investimento = _investimento(banco)
+    outro = banco.linhas("investimento", "u")[1]
+
+    resposta = cliente.post("/atualizar_investimentos", json={"pagamentos": [
+        _pagamento(investimento),
+        _pagamento(investimento, investment_id="nao-e-uuid"),
+        _pagamento(outro, investment_id=outro["investimento__c"].upper()),
+    ]})
+
+    corpo = resposta.get_json()
+    assert resposta.status_code == 200
+    assert [item["status"] for item in corpo["resultados"]] == ["ok", "erro", "ok"]
+    assert corpo["resultados"][1]["error"] == "ID do investimento inválido"
+    assert [linha["pagamentos"] for linha in banco.linhas("investimento", "u")] == [2, 2]
+
+
+def test_lote_recusado_pelo_banco_traz_o_erro_em_cada_item(banco, cliente, monkeypatch):
+    investimento = _investimento(banco)
+
+    def recusar(*args, **kwargs):
+        raise ErroPostgrest("new row violates check constraint")
+
+    monkeypatch.setattr(banco, "rpc_registrar_pagamentos_investimento", recusar)
+    resposta = cliente.post("/atualizar_investimentos", json=[
+        _pagamento(investimento), _pagamento(investimento, valor_pagamento="abc")])
+
+    corpo = resposta.get_json()
+    assert resposta.status_code == 409
+    assert [item["error"] for item in corpo["resultados"]] == ["Erro ao registrar pagamento",
+                                                               "Valor do pagamento inválido"]
+    assert corpo["registrados"] == 0
+
+
+def test_sentido_que_nao_e_booleano_responde_400(banco, cliente):
+    investimento = _investimento(banco)
+
+    resposta = cliente.post("/atualizar_investimento", json=_pagamento(investimento, sentido="false"))
+
+    assert resposta.status_code == 400
+    assert resposta.get_json() == {"error": "Sentido do pagamento inválido"}
+    assert banco.linhas("investimento", "u")[0]["pagamentos"] == 1
+
+
+def test_pagamento_sem_sentido_encerra_o_investimento(banco, cliente):
+    investimento = _investimento(banco)
+
+    resposta = cliente.post("/atualizar_investimento", json=_pagamento(investimento, sentido=False))
+
+    assert resposta.status_code == 200
+    assert banco.linhas("investimento", "u")[0]["encerrado"] is True
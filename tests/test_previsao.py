@@ -0,0 +1,51 @@
+from datetime import date
+
+from benchmarks.tenants_sinteticos import gerar_tenant
+from services.previsao_financeira import calcular_previsao, obter_previsao
+
+HOJE = date(2024, 6, 15)
+
+
+def _investimento(investimento_id, tipo, duracao=10, pagamentos=1, valor=1200.0, **campos):
+    return {"investimento__c": investimento_id, "valor": valor, "duracao": duracao, "pagamentos": pagamentos,
+            "tipo_pagamento": tipo, "encerrado": False, **campos}
+
+
+def test_parcela_anual_no_meio_do_ciclo_cai_um_ano_apos_o_ultimo_pagamento():
+    # Pago em março de 2024: as próximas parcelas vencem em março de 2025 e de 2026
+    previsao = calcular_previsao([_investimento("a", "anual")], [], horizonte=24, hoje=HOJE,
+                                 ultimos_pagamentos={"a": "2024-03-10"})
+
+    meses_com_saida = [mes for mes, saida in zip(previsao["meses"], previsao["saidas"]) if saida]
+    assert previsao["meses"][0] == "2024-07"
+    assert meses_com_saida == ["2025-03", "2026-03"]
+    assert previsao["total_saidas"] == 2400.0
+
+
+def test_parcela_mensal_atrasada_entra_no_primeiro_mes():
+    previsao = calcular_previsao([_investimento("m", "mensal", duracao=4, valor=100.0)], [], horizonte=6,
+                                 hoje=HOJE, ultimos_pagamentos={"m": "2024-01-05"})
+
+    assert previsao["saidas"] == [100.0, 100.0, 100.0, 0.0, 0.0, 0.0]
+
+
+def test_sem_pagamentos_a_primeira_parcela_vence_no_inicio_do_investimento():
+    investimento = _investimento("n", "anual", pagamentos=0, created_at="2024-09-01T12:00:00+00:00")
+
+    previsao = calcular_previsao([investimento], [], horizonte=12, hoje=HOJE)
+
+    assert previsao["saidas"].index(1200.0) == previsao["meses"].index("2024-09")
+
+
+def test_previsao_usa_a_data_do_ultimo_pagamento_registrado(banco):
+    gerar_tenant(banco, "u", vendas=0, clientes=0, investimentos=1, pagamentos=1)
+    investimento = banco.linhas("investimento", "u")[0]
+    investimento.update(tipo_pagamento="anual", duracao=5)
+    hoje = date.today()
+    for pagamento in banco.linhas("investimento_pagamentos", "u"):
+        pagamento["data"] = hoje.replace(day=1).isoformat()
+
+    previsao = obter_previsao(banco, "u", horizonte=12)
+
+    # Pago neste mês: a próxima parcela anual só vence daqui a 12 meses, no último mês do horizonte
+    assert [bool(saida) for saida in previsao["saidas"]] == [False] * 11 + [True]
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.tenants_sinteticos import gerar_tenant
+from services import resumo_vendas
+from services.tarefas import TAREFA_SEM_SINAL_SEGUNDOS, TarefaCancelada, _interrompida
+
+
+def _registro(status, segundos_sem_sinal):
+    atualizada_em = datetime.now(timezone.utc) - timedelta(seconds=segundos_sem_sinal)
+    return {"id": "t", "status": status, "atualizada_em": atualizada_em.isoformat()}
+
+
+def test_tarefa_na_fila_antiga_nao_e_interrompida():
+    registro = _registro("na_fila", TAREFA_SEM_SINAL_SEGUNDOS * 2)
+    assert _interrompida(registro)["status"] == "na_fila"
+
+
+def test_tarefa_executando_sem_sinal_e_interrompida():
+    assert _interrompida(_registro("executando", TAREFA_SEM_SINAL_SEGUNDOS * 2))["status"] == "erro"
+    assert _interrompida(_registro("executando", 1))["status"] == "executando"
+
+
+def test_reconstruir_resumo_refaz_o_resumo_numa_chamada(banco):
+    gerar_tenant(banco, "u", vendas=500, clientes=50, investimentos=0)
+    esperado = sorted((linha["periodo"], linha["dimensao"], linha["chave"], linha["num_vendas"])
+                      for linha in banco.linhas("vendas_resumo", "u"))
+    banco.linhas("vendas_resumo", "u")[0]["num_vendas"] += 7
+    banco.zerar_contadores()
+
+    total = resumo_vendas.reconstruir_resumo(banco, "u")
+
+    obtido = sorted((linha["periodo"], linha["dimensao"], linha["chave"], linha["num_vendas"])
+                    for linha in banco.linhas("vendas_resumo", "u"))
+    assert obtido == esperado and total == len(esperado)
+    # A reconstrução e a publicação da versão do cache
+    assert banco.chamadas == 2
+
+
+def test_reconstruir_resumo_cancelado_antes_de_comecar_mantem_o_resumo(banco):
+    gerar_tenant(banco, "u", vendas=500, clientes=50, investimentos=0)
+    antes = len(banco.linhas("vendas_resumo", "u"))
+
+    def ao_progredir(etapa, processadas, total):
+        raise TarefaCancelada()
+
+    with pytest.raises(TarefaCancelada):
+        resumo_vendas.reconstruir_resumo(banco, "u", ao_progredir)
+    assert len(banco.linhas("vendas_resumo", "u")) == antes
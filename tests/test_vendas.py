@@ -0,0 +1,51 @@
+from benchmarks.tenants_sinteticos import gerar_tenant, nome_cliente
+from services.dados_colunares import clientes_colunar_em_cache, obter_clientes_colunar
+
+VENDA = {"vendedor": "Marina", "data_venda": "2024-06-15", "pagamento": "Pix",
+         "produto": "Camiseta", "quantidade": "2", "desconto": "0"}
+
+
+def _ultima_venda(banco):
+    return banco.linhas("vendas", "u")[-1]
+
+
+def test_venda_pelo_id_do_cliente_sem_carregar_todos_os_clientes(banco, cliente):
+    gerar_tenant(banco, "u", vendas=10, clientes=20, investimentos=0)
+    escolhido = banco.linhas("clientes", "u")[3]
+
+    resposta = cliente.post("/sales", data={**VENDA, "cliente_id": escolhido["client__c"]})
+
+    assert resposta.status_code == 302
+    assert _ultima_venda(banco)["cliente_id"] == escolhido["client__c"]
+    assert _ultima_venda(banco)["cliente"] == escolhido["nome"]
+    assert clientes_colunar_em_cache("u") is None
+
+
+def test_venda_pelo_id_usa_os_clientes_em_cache(banco, cliente):
+    gerar_tenant(banco, "u", vendas=10, clientes=20, investimentos=0)
+    obter_clientes_colunar(banco, "u")
+    escolhido = banco.linhas("clientes", "u")[5]
+
+    cliente.post("/sales", data={**VENDA, "cliente_id": escolhido["client__c"]})
+
+    assert _ultima_venda(banco)["cliente"] == escolhido["nome"]
+
+
+def test_venda_pelo_nome_liga_o_cliente_unico(banco, cliente):
+    gerar_tenant(banco, "u", vendas=10, clientes=20, investimentos=0)
+
+    cliente.post("/sales", data={**VENDA, "cliente": nome_cliente(7)})
+
+    assert _ultima_venda(banco)["cliente_id"] == banco.linhas("clientes", "u")[7]["client__c"]
+
+
+def test_venda_com_cliente_inexistente_e_recusada(banco, cliente):
+    gerar_tenant(banco, "u", vendas=10, clientes=20, investimentos=0)
+    total = len(banco.linhas("vendas", "u"))
+
+    for cliente_id in ("nao-e-uuid", "00000000-0000-0000-0000-000000000000"):
+        cliente.post("/sales", data={**VENDA, "cliente_id": cliente_id})
+
+    assert len(banco.linhas("vendas", "u")) == total
+    with cliente.session_transaction() as sessao:
+        assert [mensagem for _, mensagem in sessao["_flashes"]] == ["Erro: Cliente não encontrado."] * 2